@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+分析バックエンドのベンチマーク
+pandas(基準)とpolarsの analyze_gsc_data の結果が一致することを確認し、実行時間を比較する
+
+使い方:
+    python benchmarks/analyzer_backend_benchmark.py [行数 ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from gmx_seo_reporter.analyzers.backends import GmxPandasBackend, GmxPolarsBackend
+
+
+def make_week(rows: int, seed: int) -> pd.DataFrame:
+    """ダミーのGSCデータを作成 (query/page/deviceの組、クエリは重複あり)"""
+    rng = np.random.default_rng(seed)
+    impressions = rng.integers(0, 1000, rows)
+    clicks = rng.binomial(impressions, 0.05)
+    return pd.DataFrame({
+        'query': [f'query {i}' for i in rng.integers(0, max(rows // 5, 1), rows)],
+        'page': [f'https://example.com/course/{i % 50}/page{i}' for i in rng.integers(0, max(rows // 20, 1), rows)],
+        'device': rng.choice(['DESKTOP', 'MOBILE', 'TABLET'], rows),
+        'clicks': clicks,
+        'impressions': impressions,
+        'ctr': np.divide(clicks, impressions, out=np.zeros(rows), where=impressions > 0),
+        'position': rng.uniform(1, 50, rows)
+    })
+
+
+def assert_frame_close(expected: pd.DataFrame, actual: pd.DataFrame, key: str) -> None:
+    """キーで並べ替えて、数値カラムは許容誤差つき、それ以外は完全一致で比較"""
+    expected = expected.sort_values(key).reset_index(drop=True)
+    actual = actual.sort_values(key).reset_index(drop=True)
+    assert list(expected.columns) == list(actual.columns), (list(expected.columns), list(actual.columns))
+    for column in expected.columns:
+        if expected[column].dtype.kind in 'biuf':
+            np.testing.assert_allclose(
+                actual[column].to_numpy(dtype=float),
+                expected[column].to_numpy(dtype=float),
+                rtol=1e-9,
+                err_msg=column
+            )
+        else:
+            np.testing.assert_array_equal(
+                actual[column].astype(str).to_numpy(),
+                expected[column].astype(str).to_numpy(),
+                err_msg=column
+            )
+
+
+def assert_parity(expected: dict, actual: dict) -> None:
+    """analyze_gsc_data の結果が一致することを確認"""
+    assert_frame_close(expected['wow_comparison'], actual['wow_comparison'], 'query')
+    assert_frame_close(expected['top_queries'], actual['top_queries'], 'query')
+    for dimension, wow in expected['wow_by_dimension'].items():
+        assert_frame_close(wow, actual['wow_by_dimension'][dimension], dimension)
+    for metric, stats in expected['summary_stats'].items():
+        for name, value in stats.items():
+            np.testing.assert_allclose(actual['summary_stats'][metric][name], value, rtol=1e-9)
+
+
+def measure(func, *args) -> float:
+    """実行時間(秒)を計測 (3回の最小値)"""
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    pandas_backend = GmxPandasBackend()
+    polars_backend = GmxPolarsBackend()
+
+    print(f"{'rows':>10} {'pandas (s)':>12} {'polars (s)':>12} {'speedup':>9}")
+    for rows in sizes:
+        this_week = make_week(rows, seed=1)
+        last_week = make_week(rows, seed=2)
+
+        # 結果が一致することを確認
+        assert_parity(
+            pandas_backend.analyze_gsc_data(this_week, last_week),
+            polars_backend.analyze_gsc_data(this_week, last_week)
+        )
+
+        pandas_time = measure(pandas_backend.analyze_gsc_data, this_week, last_week)
+        polars_time = measure(polars_backend.analyze_gsc_data, this_week, last_week)
+        print(f"{rows:>10,} {pandas_time:>12.3f} {polars_time:>12.3f} {pandas_time / polars_time:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
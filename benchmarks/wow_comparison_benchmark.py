@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+WoW比較のマイクロベンチマーク
+GmxDataAnalyzer.calculate_wow_comparison と旧実装(行ごとのapply)を比較する
+
+使い方:
+    python benchmarks/wow_comparison_benchmark.py [行数 ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from gmx_seo_reporter.analyzers.data_analyzer import GmxDataAnalyzer
+
+METRICS = ['clicks', 'impressions', 'ctr', 'position']
+
+
+def make_week(rows: int, seed: int) -> pd.DataFrame:
+    """ダミーのGSCデータを作成 (一部のクエリは片方の週にのみ存在)"""
+    rng = np.random.default_rng(seed)
+    impressions = rng.integers(0, 1000, rows)
+    clicks = rng.binomial(impressions, 0.05)
+    return pd.DataFrame({
+        'query': [f'query {i}' for i in rng.permutation(int(rows * 1.2))[:rows]],
+        'clicks': clicks,
+        'impressions': impressions,
+        'ctr': np.divide(clicks, impressions, out=np.zeros(rows), where=impressions > 0),
+        'position': rng.uniform(1, 50, rows)
+    })
+
+
+def legacy_wow_comparison(this_week_df, last_week_df, key_column, metric_columns):
+    """旧実装 (apply(axis=1)による変化率計算)"""
+    merged = this_week_df.merge(
+        last_week_df,
+        on=key_column,
+        how='outer',
+        suffixes=('_this_week', '_last_week')
+    )
+    for metric in metric_columns:
+        this_col = f'{metric}_this_week'
+        last_col = f'{metric}_last_week'
+        merged[this_col] = merged[this_col].fillna(0)
+        merged[last_col] = merged[last_col].fillna(0)
+        merged[f'{metric}_delta'] = merged[this_col] - merged[last_col]
+        merged[f'{metric}_change_pct'] = merged.apply(
+            lambda row: (
+                ((row[this_col] - row[last_col]) / row[last_col] * 100)
+                if row[last_col] != 0
+                else (100 if row[this_col] > 0 else 0)
+            ),
+            axis=1
+        )
+    return merged
+
+
+def measure(func, *args) -> float:
+    """実行時間(秒)を計測 (3回の最小値)"""
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    
+    print(f"{'rows':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for rows in sizes:
+        this_week = make_week(rows, seed=1)
+        last_week = make_week(rows, seed=2)
+        args = (this_week, last_week, 'query', METRICS)
+        
+        # 結果が一致することを確認
+        expected = legacy_wow_comparison(*args)
+        actual = GmxDataAnalyzer.calculate_wow_comparison(*args)
+        for metric in METRICS:
+            np.testing.assert_array_equal(
+                actual[f'{metric}_change_pct'].to_numpy(dtype=float),
+                expected[f'{metric}_change_pct'].to_numpy(dtype=float)
+            )
+        
+        legacy = measure(legacy_wow_comparison, *args)
+        vectorized = measure(GmxDataAnalyzer.calculate_wow_comparison, *args)
+        print(f"{rows:>10,} {legacy:>12.3f} {vectorized:>15.4f} {legacy / vectorized:>8.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Aggregate Engine
+今週・先週のメトリクスを1回のグループ集計で求めるモジュール
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# 集計キー: カラム名、または (キー名, DataFrameからキーを求める関数)
+GroupKey = Union[str, Tuple[str, Callable[[pd.DataFrame], pd.Series]]]
+
+
+class GmxAggregateEngine:
+    """
+    メトリクス集計クラス
+    
+    全てのメトリクスを「合計」に分解して1回のgroupby().sum()で集計し、
+    比率系のメトリクスは集計後に再計算する。
+    - ctr: clicks / impressions (clicks・impressionsがある場合)
+    - position: 表示回数による加重平均 (impressionsがある場合)
+    - 上記を再計算できない ctr/position は単純平均
+    - それ以外: 合計
+    """
+    
+    WEEK_SUFFIXES = ('_this_week', '_last_week')
+    
+    @staticmethod
+    def page_directory(depth: int = 1) -> GroupKey:
+        """
+        ページURLのディレクトリを集計キーにする
+        
+        Args:
+            depth: パスの階層数 (1の場合は 'https://example.com/course/')
+            
+        Returns:
+            GroupKey: ('directory', 関数)
+        """
+        pattern = rf'^([^:/?#]+://[^/?#]+(?:/[^/?#]+){{0,{depth}}})'
+        
+        def directory(df: pd.DataFrame) -> pd.Series:
+            return df['page'].str.extract(pattern, expand=False) + '/'
+        
+        return ('directory', directory)
+    
+    @staticmethod
+    def aggregate(
+        df: pd.DataFrame,
+        by: Optional[List[GroupKey]],
+        metric_columns: List[str]
+    ) -> pd.DataFrame:
+        """
+        キーごとにメトリクスを集計
+        
+        Args:
+            df: データフレーム
+            by: 集計キーのリスト (Noneの場合は全体を1行に集計)
+            metric_columns: 集計するメトリクスのカラム名リスト
+            
+        Returns:
+            pandas.DataFrame: キー + メトリクスのデータ (キーは一意)
+        """
+        return GmxAggregateEngine._aggregate_frames([df], by, metric_columns, suffixes=('',))
+    
+    @staticmethod
+    def aggregate_weeks(
+        this_week_df: pd.DataFrame,
+        last_week_df: pd.DataFrame,
+        by: Optional[List[GroupKey]],
+        metric_columns: List[str]
+    ) -> pd.DataFrame:
+        """
+        今週・先週のメトリクスを1回のグループ集計で求める
+        
+        片方の週にしか存在しないキーのメトリクスは0になる。
+        
+        Args:
+            this_week_df: 今週のデータ
+            last_week_df: 先週のデータ
+            by: 集計キーのリスト (Noneの場合はサイト全体を1行に集計)
+            metric_columns: 集計するメトリクスのカラム名リスト
+            
+        Returns:
+            pandas.DataFrame: キー + '{metric}_this_week' + '{metric}_last_week'
+        """
+        return GmxAggregateEngine._aggregate_frames(
+            [this_week_df, last_week_df],
+            by,
+            metric_columns,
+            suffixes=GmxAggregateEngine.WEEK_SUFFIXES
+        )
+    
+    @staticmethod
+    def _aggregate_frames(
+        frames: List[pd.DataFrame],
+        by: Optional[List[GroupKey]],
+        metric_columns: List[str],
+        suffixes: Tuple[str, ...]
+    ) -> pd.DataFrame:
+        """複数のフレームを連結し、(フレーム番号, キー) で1回だけ集計"""
+        by = by or []
+        key_names = [key if isinstance(key, str) else key[0] for key in by]
+        
+        # キーがない場合(全体集計)は定数キーで1グループにする
+        group_names = key_names or ['_all']
+        
+        # 合計に分解したカラムを作成
+        parts = []
+        for i, df in enumerate(frames):
+            columns = GmxAggregateEngine._sum_columns(df, metric_columns)
+            for key in by:
+                if isinstance(key, str):
+                    columns[key] = df[key].to_numpy()
+                else:
+                    columns[key[0]] = key[1](df).to_numpy()
+            if not key_names:
+                columns['_all'] = np.zeros(len(df), dtype=np.int8)
+            columns['_frame'] = np.full(len(df), i, dtype=np.int8)
+            parts.append(pd.DataFrame(columns))
+        
+        work = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+        value_columns = [c for c in work.columns if c not in group_names and c != '_frame']
+        
+        # (キー, フレーム番号) で1回だけ集計し、フレーム番号を列方向に展開
+        sums = work.groupby(group_names + ['_frame'], sort=False, dropna=False).sum()
+        sums = sums.unstack('_frame', fill_value=0).reindex(
+            columns=pd.MultiIndex.from_product([value_columns, range(len(frames))]),
+            fill_value=0
+        )
+        
+        # 全体集計でデータが1行もない場合も1行(全て0)を返す
+        if not key_names and len(sums) == 0:
+            sums = pd.DataFrame(0, index=pd.Index([0], name='_all'), columns=sums.columns)
+        
+        result = {}
+        for i, suffix in enumerate(suffixes):
+            part = sums.xs(i, axis=1, level=1)
+            for metric, values in GmxAggregateEngine._finalize(part, metric_columns).items():
+                result[f'{metric}{suffix}'] = values
+        
+        result = pd.DataFrame(result, index=sums.index)
+        if key_names:
+            return result.reset_index()
+        return result.reset_index(drop=True)
+    
+    @staticmethod
+    def _sum_columns(df: pd.DataFrame, metric_columns: List[str]) -> Dict[str, np.ndarray]:
+        """メトリクスを合計で集計できるカラムに分解"""
+        columns = set(df.columns)
+        columns_out = {}
+        
+        for metric in metric_columns:
+            if metric == 'ctr' and {'clicks', 'impressions'} <= columns:
+                columns_out['_clicks'] = df['clicks'].to_numpy(dtype=np.float64)
+                columns_out['_impressions'] = df['impressions'].to_numpy(dtype=np.float64)
+            elif metric == 'position' and 'impressions' in columns:
+                impressions = df['impressions'].to_numpy(dtype=np.float64)
+                columns_out['_impressions'] = impressions
+                columns_out['_weighted_position'] = (
+                    df['position'].to_numpy(dtype=np.float64) * impressions
+                )
+            elif metric in ('ctr', 'position'):
+                columns_out[f'_sum_{metric}'] = df[metric].to_numpy(dtype=np.float64)
+                columns_out['_rows'] = np.ones(len(df), dtype=np.int64)
+            else:
+                columns_out[metric] = df[metric].to_numpy()
+        
+        return columns_out
+    
+    @staticmethod
+    def _finalize(sums: pd.DataFrame, metric_columns: List[str]) -> Dict[str, np.ndarray]:
+        """合計から各メトリクスを求める"""
+        result = {}
+        
+        def ratio(numerator: str, denominator: str) -> np.ndarray:
+            num = sums[numerator].to_numpy(dtype=np.float64)
+            den = sums[denominator].to_numpy(dtype=np.float64)
+            out = np.zeros(len(sums))
+            np.divide(num, den, out=out, where=den != 0)
+            return out
+        
+        for metric in metric_columns:
+            if metric == 'ctr' and '_clicks' in sums.columns:
+                result[metric] = ratio('_clicks', '_impressions')
+            elif metric == 'position' and '_weighted_position' in sums.columns:
+                result[metric] = ratio('_weighted_position', '_impressions')
+            elif metric in ('ctr', 'position'):
+                result[metric] = ratio(f'_sum_{metric}', '_rows')
+            else:
+                result[metric] = sums[metric].to_numpy()
+        
+        return result
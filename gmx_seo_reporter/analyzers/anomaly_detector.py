@@ -0,0 +1,173 @@
+"""
+Anomaly Detector
+クエリ・ページ・チャネルごとに、直近の週を過去の週と比較して異常値を検出するモジュール
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from gmx_seo_reporter.analyzers.rolling_analyzer import GmxRollingAnalyzer
+
+
+class GmxAnomalyDetector:
+    """
+    異常検知クラス
+
+    (キー × 週) の行列の最後の列(直近の週)を、それより前の週を基準として
+    ロバストZスコア (0.6745 × (値 − 中央値) / MAD) で評価する。
+    中央値・MADは行列全体に対する np.median(axis=1) でまとめて求めるため、
+    キーが10万件あってもキーごとのループは発生しない。
+    MADが0の場合は平均絶対偏差 × 1.2533 を代わりに使い、
+    件数のメトリクスではばらつきの下限を√中央値にする。
+    """
+
+    # 正規分布でZスコアと同じ尺度にするための係数
+    MAD_SCALE = 0.6745
+    MEAN_AD_SCALE = 1.2533
+
+    DEFAULT_THRESHOLD = 3.5
+
+    @staticmethod
+    def robust_z_scores(matrix: np.ndarray, count_floor: bool = True) -> np.ndarray:
+        """
+        直近の週のロバストZスコアを計算
+
+        Args:
+            matrix: (キー × 週) の行列 (最後の列が直近の週)
+            count_floor: Trueの場合、ばらつきの下限を√中央値 (ポアソン分布の標準偏差) にする
+                         (クリック数などの件数が少ないキーで、±1の変化を外れ値にしないため)
+
+        Returns:
+            numpy.ndarray: キーごとのZスコア (基準となる週がない・ばらつきがない場合は0)
+        """
+        return GmxAnomalyDetector._score(np.asarray(matrix, dtype=np.float64), count_floor)[0]
+
+    @staticmethod
+    def _score(matrix: np.ndarray, count_floor: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """ロバストZスコアと基準(過去の週の中央値)を計算"""
+        if matrix.shape[1] < 2:
+            return np.zeros(len(matrix)), np.zeros(len(matrix))
+
+        baseline = matrix[:, :-1]
+        latest = matrix[:, -1]
+
+        median = np.median(baseline, axis=1)
+        deviation = np.abs(baseline - median[:, None])
+        mad = np.median(deviation, axis=1)
+
+        # 標準偏差に相当するばらつき (MADが0の場合は平均絶対偏差で代用)
+        scale = mad / GmxAnomalyDetector.MAD_SCALE
+        zero_mad = mad == 0
+        scale[zero_mad] = GmxAnomalyDetector.MEAN_AD_SCALE * deviation[zero_mad].mean(axis=1)
+        if count_floor:
+            scale = np.maximum(scale, np.sqrt(np.maximum(median, 0)))
+
+        # ばらつきが0ならスコアを付けない
+        z_scores = np.zeros(len(matrix))
+        np.divide(latest - median, scale, out=z_scores, where=scale > 0)
+        return z_scores, median
+
+    @staticmethod
+    def detect(
+        keys: np.ndarray,
+        matrix: np.ndarray,
+        threshold: float = DEFAULT_THRESHOLD,
+        min_weeks: int = 4,
+        min_volume: float = 0,
+        count_floor: bool = True
+    ) -> pd.DataFrame:
+        """
+        (キー × 週) の行列から、直近の週が外れ値になっているキーを検出
+
+        Args:
+            keys: キーの配列 (行列の行の順)
+            matrix: (キー × 週) の行列 (最後の列が直近の週)
+            threshold: 外れ値とするZスコアの絶対値
+            min_weeks: 基準に必要な週数 (直近の週を除く)
+            min_volume: 直近の週か基準の中央値のどちらかがこの値以上のキーのみ対象にする
+            count_floor: robust_z_scoresを参照
+
+        Returns:
+            pandas.DataFrame: key, latest, baseline, change_pct, z_score
+                              (Zスコアの絶対値が大きい順)
+        """
+        columns = ['key', 'latest', 'baseline', 'change_pct', 'z_score']
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[1] - 1 < min_weeks:
+            return pd.DataFrame(columns=columns)
+
+        z_scores, baseline = GmxAnomalyDetector._score(matrix, count_floor)
+        latest = matrix[:, -1]
+
+        mask = (np.abs(z_scores) >= threshold) & (np.maximum(latest, baseline) >= min_volume)
+        rows = np.flatnonzero(mask)
+        rows = rows[np.argsort(-np.abs(z_scores[rows]), kind='stable')]
+
+        change_pct = np.where(latest[rows] > 0, 100.0, 0.0)
+        nonzero = baseline[rows] != 0
+        change_pct[nonzero] = (
+            (latest[rows][nonzero] - baseline[rows][nonzero]) / baseline[rows][nonzero] * 100
+        )
+
+        return pd.DataFrame({
+            'key': np.asarray(keys)[rows],
+            'latest': latest[rows],
+            'baseline': baseline[rows],
+            'change_pct': change_pct,
+            'z_score': z_scores[rows]
+        }, columns=columns)
+
+    @staticmethod
+    def detect_from_rolling(
+        rolling: GmxRollingAnalyzer,
+        metrics: List[str],
+        threshold: float = DEFAULT_THRESHOLD,
+        min_weeks: int = 4,
+        min_volume: float = 0,
+        dimension: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        移動集計が保持している週次の値から異常値を検出
+
+        Args:
+            rolling: 移動集計クラス
+            metrics: 対象メトリクスのリスト
+            threshold: 外れ値とするZスコアの絶対値
+            min_weeks: 基準に必要な週数 (直近の週を除く)
+            min_volume: 対象にする最小の値 (detectを参照)
+            dimension: 結果のdimensionカラムに入れる名前 (省略時はキーのカラム名)
+
+        Returns:
+            pandas.DataFrame: dimension, metric + detectの結果のカラム
+        """
+        frames = []
+        for metric in metrics:
+            anomalies = GmxAnomalyDetector.detect(
+                rolling.keys,
+                rolling.get_week_matrix(metric),
+                threshold=threshold,
+                min_weeks=min_weeks,
+                min_volume=min_volume
+            )
+            anomalies.insert(0, 'metric', metric)
+            anomalies.insert(0, 'dimension', dimension or rolling.key_column)
+            frames.append(anomalies)
+
+        return GmxAnomalyDetector.combine(frames)
+
+    @staticmethod
+    def combine(frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """
+        複数の検出結果を連結し、Zスコアの絶対値が大きい順に並べる
+
+        Args:
+            frames: detect/detect_from_rollingの結果のリスト
+
+        Returns:
+            pandas.DataFrame: 連結した検出結果
+        """
+        result = pd.concat(frames, ignore_index=True)
+        order = np.argsort(-np.abs(result['z_score'].to_numpy(dtype=np.float64)), kind='stable')
+        return result.iloc[order].reset_index(drop=True)
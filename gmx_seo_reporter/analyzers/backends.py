@@ -0,0 +1,296 @@
+"""
+Analyzer Backends
+analyze_gsc_data / analyze_ga4_data の実装を切り替えるためのモジュール
+
+- pandas: GmxDataAnalyzer をそのまま使う (基準となる実装)
+- polars: Polarsのlazy APIで集計・WoW比較を行う (大規模サイト向け、要 polars)
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from gmx_seo_reporter.analyzers.cannibalization import GmxCannibalizationDetector
+from gmx_seo_reporter.analyzers.data_analyzer import GmxDataAnalyzer
+
+try:
+    import polars as pl
+except ImportError:  # polarsはオプション
+    pl = None
+
+
+class GmxAnalyzerBackend(ABC):
+    """
+    分析バックエンドの基底クラス
+
+    analyze_gsc_data / analyze_ga4_data は GmxDataAnalyzer と同じキーの
+    辞書を返し、DataFrameは全てpandasで返す (サマリー生成・グラフ生成は共通)。
+    両方を実装していないバックエンドは作成時にTypeErrorになる。
+    """
+
+    name = ''
+
+    @abstractmethod
+    def analyze_gsc_data(self, this_week_df: pd.DataFrame, last_week_df: pd.DataFrame) -> Dict:
+        """
+        GSCデータを分析
+
+        Args:
+            this_week_df: 今週のGSCデータ
+            last_week_df: 先週のGSCデータ
+
+        Returns:
+            Dict: 分析結果 (GmxDataAnalyzer.analyze_gsc_data と同じ形式)
+        """
+
+    @abstractmethod
+    def analyze_ga4_data(self, this_week_df: pd.DataFrame, last_week_df: pd.DataFrame) -> Dict:
+        """
+        GA4データを分析
+
+        Args:
+            this_week_df: 今週のGA4データ
+            last_week_df: 先週のGA4データ
+
+        Returns:
+            Dict: 分析結果 (GmxDataAnalyzer.analyze_ga4_data と同じ形式)
+        """
+
+
+class GmxPandasBackend(GmxAnalyzerBackend):
+    """pandasバックエンド (基準となる実装)"""
+
+    name = 'pandas'
+
+    def analyze_gsc_data(self, this_week_df: pd.DataFrame, last_week_df: pd.DataFrame) -> Dict:
+        return GmxDataAnalyzer.analyze_gsc_data(this_week_df, last_week_df)
+
+    def analyze_ga4_data(self, this_week_df: pd.DataFrame, last_week_df: pd.DataFrame) -> Dict:
+        return GmxDataAnalyzer.analyze_ga4_data(this_week_df, last_week_df)
+
+
+class GmxPolarsBackend(GmxAnalyzerBackend):
+    """
+    Polarsバックエンド
+
+    クエリ単位の集計、WoW比較、ディメンション別WoW比較、サマリー統計、
+    トップクエリをlazyクエリとして組み立て、collect_all でまとめて
+    (マルチスレッドで)実行する。ctrはclicks/impressions、positionは
+    表示回数による加重平均で、pandasバックエンドと同じ値になる。
+    ページ階層の集計・カニバリゼーション検出・変動の大きい項目の選択は
+    NumPyで実装されているため、結果をpandasに変換してから共通の処理を使う。
+    """
+
+    name = 'polars'
+
+    def __init__(self):
+        """初期化"""
+        if pl is None:
+            raise ImportError(
+                "analysis.backend に polars を指定する場合は polars をインストールしてください "
+                "(pip install polars)"
+            )
+
+    def analyze_gsc_data(self, this_week_df: pd.DataFrame, last_week_df: pd.DataFrame) -> Dict:
+        metrics = GmxDataAnalyzer.GSC_METRICS
+        this_week = self._to_polars(this_week_df).lazy()
+        last_week = self._to_polars(last_week_df).lazy()
+
+        this_week_by_query = self._aggregate(this_week, ['query'], metrics)
+        last_week_by_query = self._aggregate(last_week, ['query'], metrics)
+
+        queries = {
+            'wow_comparison': self._merge_weeks(this_week_by_query, last_week_by_query, ['query'], metrics),
+            'summary_totals': self._merge_weeks(
+                self._aggregate(this_week, [], metrics),
+                self._aggregate(last_week, [], metrics),
+                [],
+                metrics
+            ),
+            'top_queries': this_week_by_query.sort(
+                'clicks', descending=True, nulls_last=True, maintain_order=True
+            ).head(20)
+        }
+        dimensions = [
+            d for d in GmxDataAnalyzer.GSC_BREAKDOWN_DIMENSIONS
+            if d in this_week_df.columns and d in last_week_df.columns
+        ]
+        for dimension in dimensions:
+            queries[dimension] = self._merge_weeks(
+                self._aggregate(this_week, [dimension], metrics),
+                self._aggregate(last_week, [dimension], metrics),
+                [dimension],
+                metrics,
+                sort=False
+            )
+
+        # 全てのlazyクエリをまとめて実行 (共通部分は1回だけ計算される)
+        collected = pl.collect_all(list(queries.values()))
+        results = {name: self._to_pandas(df) for name, df in zip(queries, collected)}
+        for name in ['wow_comparison', 'summary_totals'] + dimensions:
+            results[name] = GmxDataAnalyzer._add_wow_columns(results[name], metrics)
+
+        wow_comparison = results['wow_comparison']
+        movers_index = GmxDataAnalyzer.get_movers_index(wow_comparison, metrics, n=10)
+
+        page_rollup = None
+        if 'page' in this_week_df.columns and 'page' in last_week_df.columns:
+            page_rollup = GmxDataAnalyzer.calculate_page_rollup(this_week_df, last_week_df, metrics)
+
+        cannibalization = None
+        if {'query', 'page'} <= set(this_week_df.columns):
+            cannibalization = GmxCannibalizationDetector.detect(this_week_df)
+
+        return {
+            'wow_comparison': wow_comparison,
+            'summary_stats': self._summary_stats(results['summary_totals'], metrics),
+            'top_queries': results['top_queries'],
+            'biggest_movers': {
+                direction: wow_comparison.iloc[indices]
+                for direction, indices in movers_index['clicks'].items()
+            },
+            'movers_index': movers_index,
+            'wow_by_dimension': {dimension: results[dimension] for dimension in dimensions},
+            'page_rollup': page_rollup,
+            'cannibalization': cannibalization
+        }
+
+    def analyze_ga4_data(self, this_week_df: pd.DataFrame, last_week_df: pd.DataFrame) -> Dict:
+        metrics = ['sessions', 'totalUsers', 'screenPageViews']
+        this_week = self._to_polars(this_week_df).lazy()
+        last_week = self._to_polars(last_week_df).lazy()
+
+        wow_comparison, summary_totals = [
+            GmxDataAnalyzer._add_wow_columns(self._to_pandas(df), metrics)
+            for df in pl.collect_all([
+                self._merge_weeks(this_week, last_week, ['sessionDefaultChannelGroup'], metrics),
+                self._merge_weeks(
+                    self._aggregate(this_week, [], metrics),
+                    self._aggregate(last_week, [], metrics),
+                    [],
+                    metrics
+                )
+            ])
+        ]
+
+        return {
+            'wow_comparison': wow_comparison,
+            'summary_stats': self._summary_stats(summary_totals, metrics)
+        }
+
+    @staticmethod
+    def _aggregate(lf: 'pl.LazyFrame', keys: List[str], metrics: List[str]) -> 'pl.LazyFrame':
+        """キーごとにメトリクスを集計 (キーがない場合は全体を1行に集計)"""
+        columns = lf.collect_schema().names()
+        has_impressions = 'impressions' in columns
+        expressions = []
+
+        for metric in metrics:
+            if metric == 'ctr' and {'clicks', 'impressions'} <= set(columns):
+                expression = GmxPolarsBackend._ratio(pl.col('clicks').sum(), pl.col('impressions').sum())
+            elif metric == 'position' and has_impressions:
+                expression = GmxPolarsBackend._ratio(
+                    (pl.col('position').cast(pl.Float64) * pl.col('impressions')).sum(),
+                    pl.col('impressions').sum()
+                )
+            elif metric in ('ctr', 'position'):
+                expression = pl.col(metric).cast(pl.Float64).mean().fill_null(0.0)
+            else:
+                expression = pl.col(metric).sum()
+            expressions.append(expression.alias(metric))
+
+        if not keys:
+            return lf.select(expressions)
+        return lf.group_by(keys, maintain_order=True).agg(expressions)
+
+    @staticmethod
+    def _ratio(numerator: 'pl.Expr', denominator: 'pl.Expr') -> 'pl.Expr':
+        """分母が0の場合は0とする比率"""
+        return pl.when(denominator != 0).then(numerator / denominator).otherwise(0.0)
+
+    @staticmethod
+    def _merge_weeks(
+        this_week: 'pl.LazyFrame',
+        last_week: 'pl.LazyFrame',
+        keys: List[str],
+        metrics: List[str],
+        sort: bool = True
+    ) -> 'pl.LazyFrame':
+        """
+        今週・先週を結合 (差分と変化率はpandasに変換後に GmxDataAnalyzer._add_wow_columns で計算)
+
+        sort=True の場合はpandasの外部結合と同じくキーの昇順に並べ、片方の週にない値は
+        nullのまま返す (pandasと同じく変換後に欠損値として0で埋めるため、dtypeも一致する)。
+        sort=False の場合は GmxAggregateEngine.aggregate_weeks と同じく今週→先週の
+        出現順に並べ、片方の週にない値は0とする。
+        """
+        this_week = this_week.rename({m: f'{m}_this_week' for m in metrics})
+        last_week = last_week.rename({m: f'{m}_last_week' for m in metrics})
+
+        if not keys:
+            return pl.concat([this_week, last_week], how='horizontal')
+
+        if sort:
+            return this_week.join(
+                last_week, on=keys, how='full', coalesce=True
+            ).sort(keys, nulls_last=True)
+
+        merged = this_week.with_row_index('_this_order').join(
+            last_week.with_row_index('_last_order'), on=keys, how='full', coalesce=True
+        ).sort(['_this_order', '_last_order'], nulls_last=True)
+        week_columns = [f'{m}{suffix}' for suffix in ('_this_week', '_last_week') for m in metrics]
+        return merged.select(keys + [pl.col(c).fill_null(0) for c in week_columns])
+
+    @staticmethod
+    def _summary_stats(totals: pd.DataFrame, metrics: List[str]) -> Dict[str, Dict[str, float]]:
+        """全体集計のWoW比較結果をサマリー統計の形式に変換"""
+        row = totals.iloc[0]
+        return {
+            metric: {
+                'this_week': row[f'{metric}_this_week'],
+                'last_week': row[f'{metric}_last_week'],
+                'delta': row[f'{metric}_delta'],
+                'change_pct': row[f'{metric}_change_pct'] if row[f'{metric}_last_week'] != 0 else 0
+            }
+            for metric in metrics
+        }
+
+    @staticmethod
+    def _to_polars(df: pd.DataFrame) -> 'pl.DataFrame':
+        """pandas → Polars (pyarrowなしで変換できるようnumpy配列経由、文字列・カテゴリはString型)"""
+        return pl.DataFrame([
+            pl.Series(column, df[column].to_numpy())
+            if df[column].dtype.kind in 'biuf'
+            else pl.Series(column, df[column].to_numpy(dtype=object), dtype=pl.String, strict=False)
+            for column in df.columns
+        ])
+
+    @staticmethod
+    def _to_pandas(df: 'pl.DataFrame') -> pd.DataFrame:
+        """Polars → pandas (pyarrowなしで変換できるようnumpy配列経由)"""
+        return pd.DataFrame({column: df[column].to_numpy() for column in df.columns})
+
+
+ANALYZER_BACKENDS = {
+    GmxPandasBackend.name: GmxPandasBackend,
+    GmxPolarsBackend.name: GmxPolarsBackend
+}
+
+
+def get_analyzer_backend(name: Optional[str] = None) -> GmxAnalyzerBackend:
+    """
+    名前から分析バックエンドを作成
+
+    Args:
+        name: 'pandas' / 'polars' (Noneの場合は 'pandas')
+
+    Returns:
+        GmxAnalyzerBackend: 分析バックエンド
+    """
+    name = name or GmxPandasBackend.name
+    if name not in ANALYZER_BACKENDS:
+        raise ValueError(
+            f"analysis.backend は {list(ANALYZER_BACKENDS)} のいずれかを指定してください: {name}"
+        )
+    return ANALYZER_BACKENDS[name]()
@@ -0,0 +1,138 @@
+"""
+Cannibalization Detector
+同じクエリで自サイトの複数ページが競合しているか(カニバリゼーション)を検出するモジュール
+"""
+
+import numpy as np
+import pandas as pd
+
+from gmx_seo_reporter.analyzers.movers_engine import GmxMoversEngine
+
+
+class GmxCannibalizationDetector:
+    """
+    カニバリゼーション検出クラス
+
+    クエリ・ページをそれぞれ整数コードに変換し、(クエリ, ページ) の組を
+    疎行列(COO形式: クエリコード × ページコード → 表示回数/クリック数)として扱う。
+    組をクエリ順にソートし、np.bincount と区間の先頭の取り出しだけで
+    全クエリを評価するため、メモリは (クエリ数 × ページ数) ではなく
+    組の数に比例する。
+
+    クリックが最も多いページを主ページとし、失われたクリック数を
+    Σ 他ページの表示回数 × max(主ページのCTR − そのページのCTR, 0) で推定する。
+    """
+
+    @staticmethod
+    def detect(
+        df: pd.DataFrame,
+        min_impressions: int = 100,
+        min_share: float = 0.1,
+        n: int = 20
+    ) -> pd.DataFrame:
+        """
+        複数のページが競合しているクエリを検出
+
+        Args:
+            df: query, page, clicks, impressions のカラムを持つデータ
+                (device などで同じ組が複数行あってもよい)
+            min_impressions: 対象にするクエリの最小表示回数
+            min_share: 競合ページとみなす表示回数のシェア
+            n: 取得する件数 (失われたクリック数の多い順)
+
+        Returns:
+            pandas.DataFrame: query, competing_pages, impressions, clicks, primary_page,
+                              primary_share, primary_ctr, lost_clicks, pages
+                              (pagesは競合ページのURLのリスト、表示回数の多い順)
+        """
+        columns = [
+            'query', 'competing_pages', 'impressions', 'clicks', 'primary_page',
+            'primary_share', 'primary_ctr', 'lost_clicks', 'pages'
+        ]
+        if len(df) == 0:
+            return pd.DataFrame(columns=columns)
+
+        query_codes, queries = pd.factorize(df['query'])
+        page_codes, pages = pd.factorize(df['page'])
+        queries, pages = pd.Index(queries), pd.Index(pages)
+
+        # (クエリ, ページ) の組ごとに合計 (クエリ順にソートされたCOO形式)
+        pair_keys = query_codes.astype(np.int64) * len(pages) + page_codes
+        unique_keys, pair_index = np.unique(pair_keys, return_inverse=True)
+        pair_query = unique_keys // len(pages)
+        pair_page = unique_keys % len(pages)
+        pair_impressions = np.bincount(
+            pair_index, weights=df['impressions'].to_numpy(dtype=np.float64),
+            minlength=len(unique_keys)
+        )
+        pair_clicks = np.bincount(
+            pair_index, weights=df['clicks'].to_numpy(dtype=np.float64),
+            minlength=len(unique_keys)
+        )
+
+        # クエリごとの合計と、各組の表示回数シェア
+        query_impressions = np.bincount(pair_query, weights=pair_impressions, minlength=len(queries))
+        query_clicks = np.bincount(pair_query, weights=pair_clicks, minlength=len(queries))
+        share = np.zeros(len(unique_keys))
+        np.divide(pair_impressions, query_impressions[pair_query], out=share,
+                  where=query_impressions[pair_query] > 0)
+        competing = np.bincount(
+            pair_query, weights=(share >= min_share).astype(np.float64), minlength=len(queries)
+        )
+
+        # 主ページ: クエリ内でクリック数(同数なら表示回数)が最大のページ
+        order = np.lexsort((-pair_impressions, -pair_clicks, pair_query))
+        starts = np.flatnonzero(np.r_[True, pair_query[order][1:] != pair_query[order][:-1]])
+        primary = np.full(len(queries), -1, dtype=np.int64)
+        primary[pair_query[order][starts]] = order[starts]
+
+        pair_ctr = np.zeros(len(unique_keys))
+        np.divide(pair_clicks, pair_impressions, out=pair_ctr, where=pair_impressions > 0)
+        primary_ctr = pair_ctr[primary]
+
+        # 主ページのCTRを得られていれば増えていたクリック数
+        lost = pair_impressions * np.maximum(primary_ctr[pair_query] - pair_ctr, 0)
+        lost_clicks = np.bincount(pair_query, weights=lost, minlength=len(queries))
+
+        flagged = np.flatnonzero((competing >= 2) & (query_impressions >= min_impressions))
+        result = pd.DataFrame({
+            'query': queries[flagged],
+            'competing_pages': competing[flagged].astype(np.int64),
+            'impressions': query_impressions[flagged],
+            'clicks': query_clicks[flagged],
+            'primary_page': pages[pair_page[primary[flagged]]],
+            'primary_share': share[primary[flagged]],
+            'primary_ctr': primary_ctr[flagged],
+            'lost_clicks': lost_clicks[flagged]
+        })
+        result = result.iloc[GmxMoversEngine.top(result, 'lost_clicks', n)].reset_index(drop=True)
+
+        # 上位のクエリのみ競合ページのリストを作成
+        result['pages'] = GmxCannibalizationDetector._competing_page_lists(
+            queries.get_indexer(result['query']), pair_query, pair_page,
+            pair_impressions, share, pages, min_share
+        )
+        return result[columns]
+
+    @staticmethod
+    def _competing_page_lists(
+        query_codes: np.ndarray,
+        pair_query: np.ndarray,
+        pair_page: np.ndarray,
+        pair_impressions: np.ndarray,
+        share: np.ndarray,
+        pages: pd.Index,
+        min_share: float
+    ) -> list:
+        """指定したクエリの競合ページのURLリスト (表示回数の多い順)"""
+        # pair_queryはソート済みなので二分探索で各クエリの区間を求める
+        starts = np.searchsorted(pair_query, query_codes, side='left')
+        ends = np.searchsorted(pair_query, query_codes, side='right')
+
+        lists = []
+        for start, end in zip(starts, ends):
+            rows = np.arange(start, end)
+            rows = rows[share[rows] >= min_share]
+            rows = rows[np.argsort(-pair_impressions[rows], kind='stable')]
+            lists.append(list(pages[pair_page[rows]]))
+        return lists
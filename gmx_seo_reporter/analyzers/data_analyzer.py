@@ -3,20 +3,58 @@ Data Analyzer
 データ分析と前週比較(WoW)を行うモジュール
 """
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
+from gmx_seo_reporter.analyzers.aggregate_engine import GmxAggregateEngine
+from gmx_seo_reporter.analyzers.cannibalization import GmxCannibalizationDetector
+from gmx_seo_reporter.analyzers.movers_engine import GmxMoversEngine
+from gmx_seo_reporter.analyzers.page_rollup import GmxPageRollup
+
 
 class GmxDataAnalyzer:
     """データ分析クラス"""
     
+    # GSCのメトリクス
+    GSC_METRICS = ['clicks', 'impressions', 'ctr', 'position']
+    
+    # ディメンション別にWoWを計算するGSCのディメンション
+    GSC_BREAKDOWN_DIMENSIONS = ['page', 'device']
+    
+    # 値が小さいほど良いメトリクス (改善/悪化の向きを逆にする)
+    LOWER_IS_BETTER_METRICS = {'position'}
+    
+    @staticmethod
+    def aggregate_by_keys(
+        df: pd.DataFrame,
+        keys: List[str],
+        metric_columns: List[str]
+    ) -> pd.DataFrame:
+        """
+        キーごとにメトリクスを集約
+        
+        ctrはclicks/impressions、positionは表示回数による加重平均で
+        再計算し、それ以外のメトリクスは合計する。
+        
+        Args:
+            df: データフレーム
+            keys: 集約キーとなるカラム名のリスト
+            metric_columns: 集約するメトリクスのカラム名リスト
+            
+        Returns:
+            pandas.DataFrame: キー + メトリクスのデータ (キーは一意)
+        """
+        return GmxAggregateEngine.aggregate(df, keys, metric_columns)
+    
     @staticmethod
     def calculate_wow_comparison(
         this_week_df: pd.DataFrame,
         last_week_df: pd.DataFrame,
-        key_column: str,
-        metric_columns: List[str]
+        key_column: Union[str, List[str]],
+        metric_columns: List[str],
+        aggregate: bool = False
     ) -> pd.DataFrame:
         """
         Week over Week (WoW) 比較を計算
@@ -24,20 +62,38 @@ class GmxDataAnalyzer:
         Args:
             this_week_df: 今週のデータ
             last_week_df: 先週のデータ
-            key_column: キーとなるカラム名 (例: 'query')
+            key_column: キーとなるカラム名、または複合キーのカラム名リスト
+                        (例: 'query', ['query', 'device'])
             metric_columns: 比較するメトリクスのカラム名リスト
+            aggregate: Trueの場合は事前にキーごとに集約する
+                       (キーが重複しているとマージで行数が増えるため)
             
         Returns:
             pandas.DataFrame: WoW比較結果
         """
+        keys = [key_column] if isinstance(key_column, str) else list(key_column)
+        
         # 今週と先週のデータをマージ
-        merged = this_week_df.merge(
-            last_week_df,
-            on=key_column,
-            how='outer',
-            suffixes=('_this_week', '_last_week')
-        )
+        if aggregate:
+            # 両週を連結して1回のグループ集計で今週/先週のカラムを作成
+            merged = GmxAggregateEngine.aggregate_weeks(
+                this_week_df, last_week_df, keys, metric_columns
+            )
+        elif len(keys) == 1:
+            merged = this_week_df.merge(
+                last_week_df,
+                on=keys[0],
+                how='outer',
+                suffixes=('_this_week', '_last_week')
+            )
+        else:
+            merged = GmxDataAnalyzer._merge_on_hashed_keys(this_week_df, last_week_df, keys)
         
+        return GmxDataAnalyzer._add_wow_columns(merged, metric_columns)
+    
+    @staticmethod
+    def _add_wow_columns(merged: pd.DataFrame, metric_columns: List[str]) -> pd.DataFrame:
+        """今週/先週のカラムから差分と変化率のカラムを追加"""
         # 各メトリクスについて差分と変化率を計算
         for metric in metric_columns:
             this_col = f'{metric}_this_week'
@@ -53,17 +109,80 @@ class GmxDataAnalyzer:
             merged[delta_col] = merged[this_col] - merged[last_col]
             
             # 変化率を計算 (%)
-            merged[change_col] = merged.apply(
-                lambda row: (
-                    ((row[this_col] - row[last_col]) / row[last_col] * 100)
-                    if row[last_col] != 0
-                    else (100 if row[this_col] > 0 else 0)
-                ),
-                axis=1
+            # 先週が0の場合は、今週が正なら100、それ以外は0とする
+            this_values = merged[this_col].to_numpy(dtype=np.float64)
+            last_values = merged[last_col].to_numpy(dtype=np.float64)
+            change_pct = np.where(this_values > 0, 100.0, 0.0)
+            nonzero = last_values != 0
+            change_pct[nonzero] = (
+                (this_values[nonzero] - last_values[nonzero]) / last_values[nonzero] * 100
             )
+            merged[change_col] = change_pct
         
         return merged
     
+    @staticmethod
+    def _merge_on_hashed_keys(
+        this_week_df: pd.DataFrame,
+        last_week_df: pd.DataFrame,
+        keys: List[str]
+    ) -> pd.DataFrame:
+        """
+        複合キーを64bitハッシュ1列にまとめてマージ
+        
+        Args:
+            this_week_df: 今週のデータ
+            last_week_df: 先週のデータ
+            keys: 複合キーのカラム名リスト
+            
+        Returns:
+            pandas.DataFrame: キー + 今週/先週のカラムのデータ
+        """
+        this_week_df = this_week_df.assign(
+            _key_hash=pd.util.hash_pandas_object(this_week_df[keys], index=False).to_numpy()
+        )
+        last_week_df = last_week_df.assign(
+            _key_hash=pd.util.hash_pandas_object(last_week_df[keys], index=False).to_numpy()
+        )
+        
+        merged = this_week_df.merge(
+            last_week_df,
+            on='_key_hash',
+            how='outer',
+            suffixes=('_this_week', '_last_week')
+        )
+        
+        # 片方の週にしかない行もキーが埋まるように今週→先週の順で結合
+        for key in keys:
+            merged[key] = merged[f'{key}_this_week'].combine_first(merged[f'{key}_last_week'])
+        
+        merged = merged.drop(
+            columns=['_key_hash']
+            + [f'{key}_this_week' for key in keys]
+            + [f'{key}_last_week' for key in keys]
+        )
+        return merged[keys + [c for c in merged.columns if c not in keys]]
+    
+    @staticmethod
+    def calculate_page_rollup(
+        this_week_df: pd.DataFrame,
+        last_week_df: pd.DataFrame,
+        metric_columns: List[str]
+    ) -> pd.DataFrame:
+        """
+        ページ階層(ホスト/ディレクトリ)ごとのWoW比較を計算
+        
+        Args:
+            this_week_df: 今週のデータ (pageカラムが必要)
+            last_week_df: 先週のデータ (pageカラムが必要)
+            metric_columns: 比較するメトリクスのカラム名リスト
+            
+        Returns:
+            pandas.DataFrame: node, parent, depth, is_page, children, pages + WoW比較結果
+        """
+        rollup = GmxPageRollup.rollup_weeks(this_week_df, last_week_df, metric_columns)
+        return GmxDataAnalyzer._add_wow_columns(rollup, metric_columns)
+    
     @staticmethod
     def get_top_performers(
         df: pd.DataFrame,
@@ -81,7 +200,7 @@ class GmxDataAnalyzer:
         Returns:
             pandas.DataFrame: トップN件のデータ
         """
-        return df.nlargest(n, metric_column)
+        return df.iloc[GmxMoversEngine.top(df, metric_column, n)]
     
     @staticmethod
     def get_biggest_movers(
@@ -102,19 +221,50 @@ class GmxDataAnalyzer:
         Returns:
             Dict: {'improved': DataFrame, 'declined': DataFrame}
         """
-        delta_col = f'{metric}_delta'
+        indices = GmxDataAnalyzer.get_movers_index(wow_df, [metric], n)[metric]
         
         result = {}
         
         if direction in ['up', 'both']:
             # 最も改善した項目
-            improved = wow_df.nlargest(n, delta_col)
-            result['improved'] = improved
+            result['improved'] = wow_df.iloc[indices['improved']]
         
         if direction in ['down', 'both']:
             # 最も悪化した項目
-            declined = wow_df.nsmallest(n, delta_col)
-            result['declined'] = declined
+            result['declined'] = wow_df.iloc[indices['declined']]
+        
+        return result
+    
+    @staticmethod
+    def get_movers_index(
+        wow_df: pd.DataFrame,
+        metrics: List[str],
+        n: int = 10
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        全メトリクスの改善・悪化上位N件の行番号を1回の部分ソートで取得
+        
+        positionのように値が小さいほど良いメトリクスは、差分が最も小さい項目を
+        'improved' とする。
+        
+        Args:
+            wow_df: WoW比較データ
+            metrics: 対象メトリクスのリスト
+            n: 取得する件数
+            
+        Returns:
+            Dict: {メトリクス: {'improved': 行番号配列, 'declined': 行番号配列}}
+                  (wow_df.iloc[行番号] で行を取得できる)
+        """
+        ranked = GmxMoversEngine.rank(wow_df, [f'{metric}_delta' for metric in metrics], n)
+        
+        result = {}
+        for metric in metrics:
+            indices = ranked[f'{metric}_delta']
+            if metric in GmxDataAnalyzer.LOWER_IS_BETTER_METRICS:
+                result[metric] = {'improved': indices['bottom'], 'declined': indices['top']}
+            else:
+                result[metric] = {'improved': indices['top'], 'declined': indices['bottom']}
         
         return result
     
@@ -137,9 +287,14 @@ class GmxDataAnalyzer:
         """
         summary = {}
         
+        # 両週の合計を1回の集計で求める (ctr/positionは表示回数で加重)
+        totals = GmxAggregateEngine.aggregate_weeks(
+            this_week_df, last_week_df, None, metric_columns
+        ).iloc[0]
+        
         for metric in metric_columns:
-            this_total = this_week_df[metric].sum()
-            last_total = last_week_df[metric].sum()
+            this_total = totals[f'{metric}_this_week']
+            last_total = totals[f'{metric}_last_week']
             delta = this_total - last_total
             change_pct = (delta / last_total * 100) if last_total != 0 else 0
             
@@ -167,40 +322,72 @@ class GmxDataAnalyzer:
         Returns:
             Dict: 分析結果
         """
+        metrics = GmxDataAnalyzer.GSC_METRICS
+        
+        # query/page/deviceの行をクエリ単位に集約 (重複キーによる多対多マージを防ぐ)
+        this_week_by_query = GmxDataAnalyzer.aggregate_by_keys(this_week_df, ['query'], metrics)
+        last_week_by_query = GmxDataAnalyzer.aggregate_by_keys(last_week_df, ['query'], metrics)
+        
         # WoW比較
         wow_comparison = GmxDataAnalyzer.calculate_wow_comparison(
-            this_week_df,
-            last_week_df,
+            this_week_by_query,
+            last_week_by_query,
             key_column='query',
-            metric_columns=['clicks', 'impressions', 'ctr', 'position']
+            metric_columns=metrics
         )
         
+        # ページ別・デバイス別のWoW比較
+        wow_by_dimension = {}
+        for dimension in GmxDataAnalyzer.GSC_BREAKDOWN_DIMENSIONS:
+            if dimension in this_week_df.columns and dimension in last_week_df.columns:
+                wow_by_dimension[dimension] = GmxDataAnalyzer.calculate_wow_comparison(
+                    this_week_df,
+                    last_week_df,
+                    key_column=dimension,
+                    metric_columns=metrics,
+                    aggregate=True
+                )
+        
+        # ページ階層(ディレクトリ)ごとのWoW比較
+        page_rollup = None
+        if 'page' in this_week_df.columns and 'page' in last_week_df.columns:
+            page_rollup = GmxDataAnalyzer.calculate_page_rollup(this_week_df, last_week_df, metrics)
+        
+        # 複数のページが競合しているクエリ (今週)
+        cannibalization = None
+        if {'query', 'page'} <= set(this_week_df.columns):
+            cannibalization = GmxCannibalizationDetector.detect(this_week_df)
+        
         # サマリー統計
         summary_stats = GmxDataAnalyzer.calculate_summary_stats(
             this_week_df,
             last_week_df,
-            metric_columns=['clicks', 'impressions', 'ctr', 'position']
+            metric_columns=metrics
         )
         
         # トップクエリ
         top_queries = GmxDataAnalyzer.get_top_performers(
-            this_week_df,
+            this_week_by_query,
             metric_column='clicks',
             n=20
         )
         
-        # 最も変化が大きかったクエリ
-        biggest_movers_clicks = GmxDataAnalyzer.get_biggest_movers(
-            wow_comparison,
-            metric='clicks',
-            n=10
-        )
+        # 全メトリクスで最も変化が大きかったクエリ (行番号のみ)
+        movers_index = GmxDataAnalyzer.get_movers_index(wow_comparison, metrics, n=10)
+        biggest_movers_clicks = {
+            direction: wow_comparison.iloc[indices]
+            for direction, indices in movers_index['clicks'].items()
+        }
         
         return {
             'wow_comparison': wow_comparison,
             'summary_stats': summary_stats,
             'top_queries': top_queries,
-            'biggest_movers': biggest_movers_clicks
+            'biggest_movers': biggest_movers_clicks,
+            'movers_index': movers_index,
+            'wow_by_dimension': wow_by_dimension,
+            'page_rollup': page_rollup,
+            'cannibalization': cannibalization
         }
     
     @staticmethod
@@ -0,0 +1,115 @@
+"""
+Movers Engine
+全メトリクスの上位・下位N件を1回の部分ソートで選択するモジュール
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+class GmxMoversEngine:
+    """
+    上位・下位N件の選択クラス
+
+    対象カラムを (行 × カラム) の行列にまとめ、np.partition 1回で
+    各カラムのN番目の値(境界値)を求めてから上位/下位N件の行番号を選ぶ。
+    結果はDataFrameのコピーではなく行番号(iloc)の配列で返すため、
+    ランキングの種類を増やしても元のフレームを複製するコストはかからない。
+
+    並び順は nlargest/nsmallest(keep='first') と同じ
+    (値の順、同値は元の行順)で、NaNの行は選択しない。
+    """
+
+    @staticmethod
+    def rank(
+        df: pd.DataFrame,
+        columns: List[str],
+        n: int
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        各カラムの上位・下位N件の行番号を取得
+
+        Args:
+            df: データフレーム
+            columns: ランキング対象のカラム名リスト
+            n: 取得する件数
+
+        Returns:
+            Dict: {カラム名: {'top': 行番号配列, 'bottom': 行番号配列}}
+        """
+        values = df[columns].to_numpy(dtype=np.float64)
+        top = GmxMoversEngine._select(-values, n)
+        bottom = GmxMoversEngine._select(values, n)
+
+        return {
+            column: {'top': top[i], 'bottom': bottom[i]}
+            for i, column in enumerate(columns)
+        }
+
+    @staticmethod
+    def top(df: pd.DataFrame, column: str, n: int) -> np.ndarray:
+        """
+        1カラムの上位N件の行番号を取得
+
+        Args:
+            df: データフレーム
+            column: ランキング対象のカラム名
+            n: 取得する件数
+
+        Returns:
+            numpy.ndarray: 行番号配列 (値の大きい順)
+        """
+        values = df[[column]].to_numpy(dtype=np.float64)
+        return GmxMoversEngine._select(-values, n)[0]
+
+    @staticmethod
+    def bottom(df: pd.DataFrame, column: str, n: int) -> np.ndarray:
+        """
+        1カラムの下位N件の行番号を取得
+
+        Args:
+            df: データフレーム
+            column: ランキング対象のカラム名
+            n: 取得する件数
+
+        Returns:
+            numpy.ndarray: 行番号配列 (値の小さい順)
+        """
+        values = df[[column]].to_numpy(dtype=np.float64)
+        return GmxMoversEngine._select(values, n)[0]
+
+    @staticmethod
+    def _select(keys: np.ndarray, n: int) -> List[np.ndarray]:
+        """(行 × カラム) の行列から、カラムごとに値の小さいN件の行番号を選ぶ"""
+        rows, n_columns = keys.shape
+        k = min(n, rows)
+        if k <= 0:
+            return [np.empty(0, dtype=np.intp) for _ in range(n_columns)]
+
+        # NaNは末尾に回るように+infにし、全カラムの境界値を1回の部分ソートで求める
+        nan_mask = np.isnan(keys)
+        keys = np.where(nan_mask, np.inf, keys)
+        thresholds = np.partition(keys, k - 1, axis=0)[k - 1]
+        valid_counts = rows - nan_mask.sum(axis=0)
+
+        result = []
+        for j in range(n_columns):
+            column = keys[:, j]
+            threshold = thresholds[j]
+
+            if valid_counts[j] <= k:
+                # 有効な行がN件以下の場合は全て選択
+                selected = np.flatnonzero(~nan_mask[:, j])
+            else:
+                # 境界値より小さい行 + 境界値と同値の行を元の行順にNまで
+                strict = np.flatnonzero(column < threshold)
+                ties = np.flatnonzero(column == threshold)[:k - len(strict)]
+                selected = np.concatenate([strict, ties])
+
+            # 値の順、同値は元の行順に並べる
+            order = np.lexsort((selected, column[selected]))
+            result.append(selected[order])
+
+        return result
@@ -0,0 +1,223 @@
+"""
+Page Rollup
+ページURLのプレフィックス木(ホスト/ディレクトリ階層)ごとにメトリクスを集計するモジュール
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+class GmxPageTrie:
+    """
+    ページURLのプレフィックス木
+
+    'https://example.com/course/excel/intro' は以下のノードに分解する。
+    - 'https://example.com/'                (depth 0)
+    - 'https://example.com/course/'         (depth 1)
+    - 'https://example.com/course/excel/'   (depth 2)
+    - 'https://example.com/course/excel/intro' (depth 3, ページ)
+    末尾が '/' のページ ('https://example.com/course/') はディレクトリのノードと同じになる。
+    """
+
+    def __init__(self):
+        """初期化"""
+        self.labels: List[str] = []
+        self.parents: List[int] = []
+        self.depths: List[int] = []
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def insert(self, url: str) -> int:
+        """
+        ページURLを追加
+
+        Args:
+            url: ページURL
+
+        Returns:
+            int: ページのノードID
+        """
+        url = url.split('#', 1)[0]
+        scheme_end = url.find('://')
+        host_end = url.find('/', scheme_end + 3 if scheme_end >= 0 else 0)
+        if host_end < 0:
+            url += '/'
+            host_end = len(url) - 1
+        return self._node(url, host_end + 1)
+
+    def _node(self, label: str, root_length: int) -> int:
+        """ノードを取得 (なければ未登録の祖先ノードと合わせて追加)"""
+        node_id = self._ids.get(label)
+        if node_id is not None:
+            return node_id
+
+        if len(label) <= root_length:
+            parent, depth = -1, 0
+        else:
+            # クエリ文字列はページの一部として扱い、パス部分から親ディレクトリを求める
+            trimmed = label.split('?', 1)[0] if '?' in label else label.rstrip('/')
+            parent = self._node(trimmed[:trimmed.rfind('/') + 1], root_length)
+            depth = self.depths[parent] + 1
+
+        node_id = len(self.labels)
+        self._ids[label] = node_id
+        self.labels.append(label)
+        self.parents.append(parent)
+        self.depths.append(depth)
+        return node_id
+
+    def insert_many(self, urls: np.ndarray) -> np.ndarray:
+        """
+        ページURLをまとめて追加 (同じURLは1回だけ分解する)
+
+        Args:
+            urls: ページURLの配列
+
+        Returns:
+            numpy.ndarray: 各URLのノードID
+        """
+        codes, uniques = pd.factorize(pd.Series(urls, dtype=object))
+        node_ids = np.fromiter((self.insert(url) for url in uniques), dtype=np.int64, count=len(uniques))
+        return node_ids[codes]
+
+    def rollup(self, node_ids: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        ページの値を全ての祖先ノードに積み上げる
+
+        各ノードの値をbincountで求めたあと、深い階層から順に
+        親ノードへ1回ずつ加算する (階層数ぶんのベクトル演算のみ)。
+
+        Args:
+            node_ids: 各行のノードID
+            values: 各行の値 (行 × カラム)
+
+        Returns:
+            numpy.ndarray: 各ノードの合計 (ノード × カラム)
+        """
+        n_nodes = len(self.labels)
+        sums = np.column_stack([
+            np.bincount(node_ids, weights=values[:, i], minlength=n_nodes)
+            for i in range(values.shape[1])
+        ]) if values.shape[1] > 0 else np.zeros((n_nodes, 0))
+
+        parents = np.asarray(self.parents, dtype=np.int64)
+        depths = np.asarray(self.depths, dtype=np.int64)
+        for depth in range(depths.max(initial=0), 0, -1):
+            nodes = np.flatnonzero(depths == depth)
+            np.add.at(sums, parents[nodes], sums[nodes])
+
+        return sums
+
+
+class GmxPageRollup:
+    """
+    ページ階層の集計クラス
+
+    ページURLのプレフィックス木を作成し、今週・先週のメトリクスを
+    1回のボトムアップ集計で全てのディレクトリ階層に積み上げる。
+    ctrはclicks/impressions、positionは表示回数による加重平均で再計算する。
+    """
+
+    RATIO_METRICS = {'ctr', 'position'}
+
+    @staticmethod
+    def rollup_weeks(
+        this_week_df: pd.DataFrame,
+        last_week_df: pd.DataFrame,
+        metric_columns: List[str],
+        page_column: str = 'page'
+    ) -> pd.DataFrame:
+        """
+        今週・先週のメトリクスをページ階層ごとに集計
+
+        Args:
+            this_week_df: 今週のデータ
+            last_week_df: 先週のデータ
+            metric_columns: 集計するメトリクスのカラム名リスト
+                            (ctr/positionにはclicks/impressionsのカラムが必要)
+            page_column: ページURLのカラム名
+
+        Returns:
+            pandas.DataFrame: node, parent, depth, is_page, children, pages +
+                              '{metric}_this_week' + '{metric}_last_week'
+        """
+        trie = GmxPageTrie()
+        frames = [this_week_df, last_week_df]
+        row_node_ids = trie.insert_many(np.concatenate([df[page_column].to_numpy() for df in frames]))
+        sum_columns = GmxPageRollup._sum_column_names(metric_columns)
+
+        # 今週・先週の合計カラムを横に並べて1回で積み上げる
+        values = np.zeros((len(row_node_ids), len(sum_columns) * 2))
+        offset = 0
+        for week, df in enumerate(frames):
+            rows = slice(offset, offset + len(df))
+            for i, column in enumerate(sum_columns):
+                values[rows, week * len(sum_columns) + i] = GmxPageRollup._sum_values(df, column)
+            offset += len(df)
+
+        sums = trie.rollup(row_node_ids, values)
+
+        # 各ノード配下のページ数 (いずれかの週にデータがあるページ)
+        is_page = np.zeros(len(trie), dtype=bool)
+        is_page[row_node_ids] = True
+        pages = trie.rollup(np.flatnonzero(is_page), np.ones((int(is_page.sum()), 1)))[:, 0]
+
+        # 各ノードの子ノードの数 (0より大きければディレクトリ、ページと兼ねる場合もある)
+        parents = np.asarray(trie.parents, dtype=np.int64)
+        children = np.bincount(parents[parents >= 0], minlength=len(trie))
+
+        result = {
+            'node': trie.labels,
+            'parent': [trie.labels[p] if p >= 0 else None for p in trie.parents],
+            'depth': trie.depths,
+            'is_page': is_page,
+            'children': children,
+            'pages': pages.astype(np.int64)
+        }
+        for week, suffix in enumerate(('_this_week', '_last_week')):
+            week_sums = dict(zip(
+                sum_columns,
+                sums[:, week * len(sum_columns):(week + 1) * len(sum_columns)].T
+            ))
+            for metric in metric_columns:
+                result[f'{metric}{suffix}'] = GmxPageRollup._finalize(week_sums, metric)
+
+        return pd.DataFrame(result)
+
+    @staticmethod
+    def _sum_column_names(metric_columns: List[str]) -> List[str]:
+        """メトリクスを合計で集計できるカラムに分解"""
+        columns = [m for m in metric_columns if m not in GmxPageRollup.RATIO_METRICS]
+        if 'ctr' in metric_columns:
+            columns += ['clicks', 'impressions']
+        if 'position' in metric_columns:
+            columns += ['impressions', '_weighted_position']
+        return list(dict.fromkeys(columns))
+
+    @staticmethod
+    def _sum_values(df: pd.DataFrame, column: str) -> np.ndarray:
+        """合計カラムの値"""
+        if column == '_weighted_position':
+            return (
+                df['position'].to_numpy(dtype=np.float64)
+                * df['impressions'].to_numpy(dtype=np.float64)
+            )
+        return df[column].to_numpy(dtype=np.float64)
+
+    @staticmethod
+    def _finalize(sums: Dict[str, np.ndarray], metric: str) -> np.ndarray:
+        """合計からメトリクスを求める"""
+        if metric == 'ctr':
+            numerator, denominator = sums['clicks'], sums['impressions']
+        elif metric == 'position':
+            numerator, denominator = sums['_weighted_position'], sums['impressions']
+        else:
+            return sums[metric]
+
+        out = np.zeros(len(denominator))
+        np.divide(numerator, denominator, out=out, where=denominator != 0)
+        return out
@@ -0,0 +1,477 @@
+"""
+Rolling Analyzer
+複数週(4週/13週/52週など)の移動集計を週ごとに差分更新するモジュール
+"""
+
+import json
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from gmx_seo_reporter.analyzers.aggregate_engine import GmxAggregateEngine
+
+
+class GmxRollingAnalyzer:
+    """
+    移動集計クラス
+
+    週ごとに、その週にデータのあるキー(クエリ・ページ・チャネルなど)の
+    (キー番号, メトリクス) だけを疎に保持し、窓ごとに以下の累積値を持つ。
+    新しい週を追加するときは、その週を足して窓から外れた週を引くだけなので、
+    更新コストは窓の長さや過去のキー数によらず1週分の行数に比例する。
+    - 週次の値の合計と二乗和 (平均・分散)
+    - 週次の値 × 表示回数の合計 (ctr/positionの表示回数による加重平均)
+    - データのある週の数 (窓内にデータのないキーは結果から除く)
+
+    新しいキーは累積値の配列の末尾に追加し(容量を倍々に確保するため全体のコピーは償却O(1))、
+    保持している全ての週にデータがなくなったキーは、その数が残りのキー数を超えたときにまとめて削除する。
+
+    状態は save()/load() で .npz ファイルに保存し、次回の実行に引き継ぐ。
+    """
+
+    DEFAULT_WINDOWS = (4, 13, 52)
+
+    # 表示回数で加重平均するメトリクス
+    WEIGHTED_METRICS = {'ctr', 'position'}
+    WEIGHT_COLUMN = 'impressions'
+
+    # 累積値の名前
+    SUM_NAMES = ('sum', 'sumsq', 'weighted', 'count')
+
+    def __init__(
+        self,
+        key_column: str,
+        metric_columns: List[str],
+        windows: Sequence[int] = DEFAULT_WINDOWS
+    ):
+        """
+        初期化
+
+        Args:
+            key_column: キーとなるカラム名 (例: 'query', 'page')
+            metric_columns: 集計するメトリクスのカラム名リスト
+            windows: 移動集計の週数のリスト
+        """
+        self.key_column = key_column
+        self.metric_columns = list(metric_columns)
+        self.windows = sorted(set(int(w) for w in windows))
+
+        # 窓から外れる週と、直近の週の差し替え時に戻す週を保持するため+1
+        self.capacity = self.windows[-1] + 1
+        self.week_count = 0
+        self.last_week: Optional[date] = None
+
+        # キー: 番号の対応 (番号は累積値の配列の行)
+        self._key_list: List = []
+        self._key_ids: Dict = {}
+
+        # 週ごとの疎なデータ (キー番号, 値) のリングバッファ
+        self._weeks = [self._empty_week() for _ in range(self.capacity)]
+
+        # キーごとの、保持している週のうちデータのある週の数
+        self._present = np.zeros(0, dtype=np.int64)
+        self._sums = {w: self._empty_sums(0) for w in self.windows}
+
+    def _empty_week(self):
+        """データのない週"""
+        return np.zeros(0, dtype=np.int64), np.zeros((0, len(self.metric_columns)))
+
+    def _empty_sums(self, n_rows: int) -> Dict[str, np.ndarray]:
+        """窓ごとの累積値 (合計・二乗和・加重合計・データのある週の数)"""
+        shape = (n_rows, len(self.metric_columns))
+        sums = {name: np.zeros(shape) for name in self.SUM_NAMES if name != 'count'}
+        sums['count'] = np.zeros(n_rows, dtype=np.int64)
+        return sums
+
+    @property
+    def n_keys(self) -> int:
+        """キー番号の数 (削除待ちのキーを含む)"""
+        return len(self._key_list)
+
+    @property
+    def _weight_index(self) -> Optional[int]:
+        """加重平均に使うメトリクスの位置 (表示回数がない場合はNone)"""
+        if self.WEIGHT_COLUMN in self.metric_columns:
+            return self.metric_columns.index(self.WEIGHT_COLUMN)
+        return None
+
+    def update(self, week_start: Union[date, datetime, str], df: pd.DataFrame) -> bool:
+        """
+        1週分のデータを追加
+
+        直近の週と同じ週を渡した場合は、その週のデータを差し替える。
+        間の週が抜けている場合は、抜けた週をデータなしとして扱う。
+
+        Args:
+            week_start: 週の開始日 (月曜日)
+            df: その週のデータ (キーが重複していてもよい)
+
+        Returns:
+            bool: 追加した場合True (直近の週より古い週の場合はFalse)
+        """
+        week_start = pd.Timestamp(week_start).date()
+
+        if self.last_week is not None:
+            if week_start < self.last_week:
+                return False
+            if week_start == self.last_week:
+                self._retract_latest()
+            else:
+                skipped = (week_start - self.last_week).days // 7 - 1
+                for _ in range(min(skipped, self.capacity)):
+                    self._push(*self._empty_week())
+
+        weekly = GmxAggregateEngine.aggregate(df, [self.key_column], self.metric_columns)
+        rows = self._ensure_keys(weekly[self.key_column])
+        self._push(rows, weekly[self.metric_columns].to_numpy(dtype=np.float64))
+
+        self.last_week = week_start
+        if self.n_keys - self.live_count > self.live_count:
+            self._compact()
+        return True
+
+    def _ensure_keys(self, keys: pd.Series) -> np.ndarray:
+        """未知のキーを末尾に追加し、各キーの番号を返す"""
+        rows = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            key_id = self._key_ids.get(key)
+            if key_id is None:
+                key_id = len(self._key_list)
+                self._key_ids[key] = key_id
+                self._key_list.append(key)
+            rows[i] = key_id
+
+        self._reserve(self.n_keys)
+        return rows
+
+    def _reserve(self, n_rows: int) -> None:
+        """累積値の配列をn_rows行以上確保 (不足する場合は倍の容量に拡張)"""
+        allocated = len(self._present)
+        if n_rows <= allocated:
+            return
+
+        size = max(n_rows, allocated * 2, 64)
+        self._present = self._resized(self._present, size)
+        for sums in self._sums.values():
+            for name, array in sums.items():
+                sums[name] = self._resized(array, size)
+
+    @staticmethod
+    def _resized(array: np.ndarray, n_rows: int) -> np.ndarray:
+        """先頭n_rows行の配列 (足りない行は0)"""
+        resized = np.zeros((n_rows,) + array.shape[1:], dtype=array.dtype)
+        n = min(n_rows, len(array))
+        resized[:n] = array[:n]
+        return resized
+
+    @property
+    def live_count(self) -> int:
+        """保持している週のいずれかにデータのあるキーの数"""
+        return int(np.count_nonzero(self._present[:self.n_keys]))
+
+    def _compact(self) -> None:
+        """保持している全ての週にデータのないキーを削除し、番号を詰める"""
+        n = self.n_keys
+        live = self._present[:n] > 0
+        new_ids = np.cumsum(live) - 1
+
+        self._key_list = [key for key, keep in zip(self._key_list, live) if keep]
+        self._key_ids = {key: i for i, key in enumerate(self._key_list)}
+        self._weeks = [(new_ids[rows], values) for rows, values in self._weeks]
+
+        size = max(len(self._key_list), 64)
+        self._present = self._resized(self._present[:n][live], size)
+        for sums in self._sums.values():
+            for name, array in sums.items():
+                sums[name] = self._resized(array[:n][live], size)
+
+    def _contributions(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """1週分の値が各累積値に与える寄与"""
+        weight = self._weight_index
+        weights = values[:, [weight]] if weight is not None else np.ones((len(values), 1))
+        return {
+            'sum': values,
+            'sumsq': values * values,
+            'weighted': values * weights,
+            'count': np.ones(len(values), dtype=np.int64)
+        }
+
+    def _apply(self, sums: Dict[str, np.ndarray], week, sign: int) -> None:
+        """1週分の寄与を累積値に足す(sign=1)または引く(sign=-1)"""
+        rows, values = week
+        if len(rows) == 0:
+            return
+        for name, contribution in self._contributions(values).items():
+            # 1週の中でキーは重複しないため、ファンシーインデックスでそのまま加算できる
+            sums[name][rows] += sign * contribution
+
+    def _push(self, rows: np.ndarray, values: np.ndarray) -> None:
+        """週を追加し、窓から外れた週を引く"""
+        slot = self.week_count % self.capacity
+
+        # リングバッファから外れる週
+        self._present[self._weeks[slot][0]] -= 1
+
+        for window, sums in self._sums.items():
+            if self.week_count >= window:
+                self._apply(sums, self._weeks[(self.week_count - window) % self.capacity], -1)
+            self._apply(sums, (rows, values), 1)
+
+        self._weeks[slot] = (rows, values)
+        self._present[rows] += 1
+        self.week_count += 1
+
+    def _retract_latest(self) -> None:
+        """直近の週を取り消し、窓から外れていた週を戻す"""
+        self.week_count -= 1
+        slot = self.week_count % self.capacity
+        removed = self._weeks[slot]
+
+        for window, sums in self._sums.items():
+            self._apply(sums, removed, -1)
+            if self.week_count >= window:
+                self._apply(sums, self._weeks[(self.week_count - window) % self.capacity], 1)
+
+        self._present[removed[0]] -= 1
+        self._weeks[slot] = self._empty_week()
+
+    def _latest_values(self) -> np.ndarray:
+        """直近の週の値 (キー番号 × メトリクス、データのないキーは0)"""
+        latest = np.zeros((self.n_keys, len(self.metric_columns)))
+        if self.week_count > 0:
+            rows, values = self._weeks[(self.week_count - 1) % self.capacity]
+            latest[rows] = values
+        return latest
+
+    def get_trends(self, window: int) -> pd.DataFrame:
+        """
+        指定した窓の移動集計を取得
+
+        窓内のいずれかの週にデータのあるキーのみを返す。
+        記録した週数が窓の週数に満たない間は、窓の値(合計・平均・標準偏差・変化率)はNaNとする。
+
+        Args:
+            window: 週数 (windowsに含まれるもの)
+
+        Returns:
+            pandas.DataFrame: キー + メトリクスごとに以下のカラム
+                - '{metric}_{N}w': N週の合計 (ctr/positionは表示回数による加重平均)
+                - '{metric}_{N}w_mean': 週あたりの平均 (データのない週は0)
+                - '{metric}_{N}w_std': 週ごとの値の標準偏差
+                - '{metric}_latest': 直近の週の値
+                - '{metric}_vs_{N}w_pct': 直近の週の、週平均に対する変化率 (%)
+        """
+        if window not in self._sums:
+            raise ValueError(f"windowは {self.windows} のいずれかを指定してください: {window}")
+
+        n = self.n_keys
+        rows = np.flatnonzero(self._sums[window]['count'][:n] > 0)
+        sums = {name: array[rows] for name, array in self._sums[window].items()}
+        latest = self._latest_values()[rows]
+        full = self.week_count >= window
+        weight = self._weight_index
+
+        result = {self.key_column: np.array([self._key_list[i] for i in rows], dtype=object)}
+        for i, metric in enumerate(self.metric_columns):
+            mean = sums['sum'][:, i] / window
+            variance = np.maximum(sums['sumsq'][:, i] / window - mean * mean, 0)
+
+            if metric in self.WEIGHTED_METRICS and weight is not None:
+                total = np.zeros(len(mean))
+                np.divide(sums['weighted'][:, i], sums['sum'][:, weight], out=total,
+                          where=sums['sum'][:, weight] != 0)
+                baseline = total
+            elif metric in self.WEIGHTED_METRICS:
+                total = mean
+                baseline = mean
+            else:
+                total = sums['sum'][:, i]
+                baseline = mean
+
+            change_pct = np.where(latest[:, i] > 0, 100.0, 0.0)
+            nonzero = baseline != 0
+            change_pct[nonzero] = (latest[nonzero, i] - baseline[nonzero]) / baseline[nonzero] * 100
+
+            # 窓の週数に満たない間は、少ない週数の値を窓の値として返さない
+            if not full:
+                total, mean, variance, change_pct = (
+                    np.full(len(rows), np.nan) for _ in range(4)
+                )
+
+            result[f'{metric}_{window}w'] = total
+            result[f'{metric}_{window}w_mean'] = mean
+            result[f'{metric}_{window}w_std'] = np.sqrt(variance)
+            result[f'{metric}_latest'] = latest[:, i]
+            result[f'{metric}_vs_{window}w_pct'] = change_pct
+
+        return pd.DataFrame(result)
+
+    def get_all_trends(self) -> Dict[int, pd.DataFrame]:
+        """
+        全ての窓の移動集計を取得
+
+        Returns:
+            Dict: {週数: get_trends(週数)の結果}
+        """
+        return {window: self.get_trends(window) for window in self.windows}
+
+    @property
+    def keys(self) -> np.ndarray:
+        """保持している週のいずれかにデータのあるキーの配列 (get_week_matrixの行の順)"""
+        return np.array(
+            [key for key, present in zip(self._key_list, self._present) if present > 0],
+            dtype=object
+        )
+
+    def _stored_weeks(self) -> List:
+        """保持している週の疎なデータ (古い週から順)"""
+        weeks = min(self.week_count, self.capacity)
+        return [self._weeks[(self.week_count - offset) % self.capacity] for offset in range(weeks, 0, -1)]
+
+    def get_week_matrix(self, metric: str) -> np.ndarray:
+        """
+        1メトリクスの (キー × 週) の行列を取得
+
+        Args:
+            metric: メトリクスのカラム名
+
+        Returns:
+            numpy.ndarray: 行はkeysの順、列は古い週から順 (最後の列が直近の週、データのない週は0)
+        """
+        live = self._present[:self.n_keys] > 0
+        positions = np.cumsum(live) - 1
+        column = self.metric_columns.index(metric)
+
+        weeks = self._stored_weeks()
+        matrix = np.zeros((int(live.sum()), len(weeks)))
+        for i, (rows, values) in enumerate(weeks):
+            matrix[positions[rows], i] = values[:, column]
+        return matrix
+
+    def get_history(self) -> pd.DataFrame:
+        """
+        保持している週次の値を取得
+
+        Returns:
+            pandas.DataFrame: week_start, キー, メトリクス (古い週から順、データのあるキーのみ)
+        """
+        weeks = self._stored_weeks()
+        frames = []
+        for offset, (rows, values) in zip(range(len(weeks), 0, -1), weeks):
+            frame = pd.DataFrame(values, columns=self.metric_columns)
+            frame.insert(0, self.key_column, np.array([self._key_list[i] for i in rows], dtype=object))
+            frame.insert(0, 'week_start', self.last_week - timedelta(weeks=offset - 1))
+            frames.append(frame)
+
+        if not frames:
+            return pd.DataFrame(columns=['week_start', self.key_column] + self.metric_columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def _metadata(self) -> Dict:
+        """状態ファイルの互換性確認に使う設定"""
+        return {
+            'key_column': self.key_column,
+            'metric_columns': self.metric_columns,
+            'windows': self.windows
+        }
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        状態を.npzファイルに保存
+
+        週ごとの疎なデータを古い週から順に連結して保存する
+        (窓ごとの累積値は読み込み時に週のデータから再計算する)。
+
+        Args:
+            path: 保存先のパス
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # データのなくなったキーを除いてから保存する
+        if self.live_count < self.n_keys:
+            self._compact()
+
+        weeks = self._stored_weeks()
+        state = dict(
+            self._metadata(),
+            week_count=self.week_count,
+            last_week=self.last_week.isoformat() if self.last_week else None
+        )
+
+        # 書き込み途中で中断しても前回の状態が壊れないよう一時ファイル経由で置き換える
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                state=np.array(json.dumps(state)),
+                keys=np.array(self._key_list, dtype=str),
+                week_lengths=np.array([len(rows) for rows, _ in weeks], dtype=np.int64),
+                week_rows=np.concatenate([rows for rows, _ in weeks] or [np.zeros(0, dtype=np.int64)]),
+                week_values=np.concatenate(
+                    [values for _, values in weeks] or [np.zeros((0, len(self.metric_columns)))]
+                )
+            )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        key_column: str,
+        metric_columns: List[str],
+        windows: Sequence[int] = DEFAULT_WINDOWS
+    ) -> 'GmxRollingAnalyzer':
+        """
+        保存した状態を読み込み
+
+        ファイルがない場合は空の状態から開始する。キー・メトリクス・窓の設定が
+        異なる場合や古い形式のファイルの場合は、履歴を引き継げないため ValueError とする。
+
+        Args:
+            path: 状態ファイルのパス
+            key_column: キーとなるカラム名
+            metric_columns: 集計するメトリクスのカラム名リスト
+            windows: 移動集計の週数のリスト
+
+        Returns:
+            GmxRollingAnalyzer: 移動集計クラス
+        """
+        analyzer = cls(key_column, metric_columns, windows)
+        path = Path(path)
+        if not path.exists():
+            return analyzer
+
+        with np.load(path, allow_pickle=False) as data:
+            state = json.loads(str(data['state']))
+            mismatched = {
+                k: (state.get(k), v) for k, v in analyzer._metadata().items() if state.get(k) != v
+            }
+            if mismatched:
+                raise ValueError(f"移動集計の状態ファイルの設定が異なります: {path} {mismatched}")
+            if 'week_rows' not in data:
+                raise ValueError(f"移動集計の状態ファイルの形式が古いため読み込めません: {path}")
+
+            analyzer.week_count = state['week_count']
+            analyzer.last_week = date.fromisoformat(state['last_week']) if state['last_week'] else None
+            analyzer._key_list = list(data['keys'].astype(object))
+            analyzer._key_ids = {key: i for i, key in enumerate(analyzer._key_list)}
+
+            analyzer._reserve(len(analyzer._key_list))
+
+            # 古い週から順に、リングバッファの元の位置へ戻して累積値を再計算
+            lengths = data['week_lengths']
+            bounds = np.concatenate([[0], np.cumsum(lengths)])
+            week_rows, week_values = data['week_rows'], data['week_values']
+            for offset, i in zip(range(len(lengths), 0, -1), range(len(lengths))):
+                week = (week_rows[bounds[i]:bounds[i + 1]], week_values[bounds[i]:bounds[i + 1]])
+                analyzer._weeks[(analyzer.week_count - offset) % analyzer.capacity] = week
+                analyzer._present[week[0]] += 1
+                for window, sums in analyzer._sums.items():
+                    if offset <= window:
+                        analyzer._apply(sums, week, 1)
+
+        return analyzer
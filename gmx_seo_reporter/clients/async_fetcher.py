@@ -0,0 +1,135 @@
+"""
+Async Fetcher
+GSCとGA4のデータ取得を並行して実行するモジュール
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from gmx_seo_reporter.clients.ga4_client import GmxGa4Client
+from gmx_seo_reporter.clients.gsc_client import GmxGscClient
+
+
+class GmxAsyncFetcher:
+    """GSC/GA4の週次データ取得を並行実行するクラス"""
+    
+    def __init__(
+        self,
+        gsc_client: GmxGscClient,
+        ga4_client: GmxGa4Client,
+        deadline: Optional[float] = 600.0,
+        request_timeout: Optional[float] = 120.0,
+        max_workers: int = 2
+    ):
+        """
+        初期化
+        
+        Args:
+            gsc_client: Search Consoleクライアント
+            ga4_client: GA4クライアント
+            deadline: 取得ごとの期限(秒)
+                      GSCは週ごとの取得全体(ページング・シャードを含む)、
+                      GA4は今週・先週の取得全体に適用する。Noneの場合は無制限
+            request_timeout: GA4のAPI呼び出し1回ごとのタイムアウト(秒)
+                             (GSCの呼び出しごとのタイムアウトは GmxGoogleAuth の timeout)
+            max_workers: GSC呼び出しを実行するスレッド数
+        """
+        self.gsc_client = gsc_client
+        self.ga4_client = ga4_client
+        self.deadline = deadline
+        self.request_timeout = request_timeout
+        self.max_workers = max_workers
+    
+    def fetch_weekly_data(
+        self,
+        site_url: str,
+        gsc_options: Dict,
+        ga4_dimensions: List[str],
+        ga4_metrics: List[str]
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        今週・先週のGSC/GA4データを並行して取得
+        
+        Args:
+            site_url: サイトURL
+            gsc_options: GmxGscClient.get_weekly_dataに渡すオプション
+                         (dimensions, row_limit, paginate, ...)
+            ga4_dimensions: GA4のディメンションのリスト
+            ga4_metrics: GA4のメトリクスのリスト
+            
+        Returns:
+            Tuple: (GSC今週, GSC先週, GA4今週, GA4先週)
+        """
+        return asyncio.run(self.fetch_weekly_data_async(
+            site_url,
+            gsc_options,
+            ga4_dimensions,
+            ga4_metrics
+        ))
+    
+    async def fetch_weekly_data_async(
+        self,
+        site_url: str,
+        gsc_options: Dict,
+        ga4_dimensions: List[str],
+        ga4_metrics: List[str]
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        fetch_weekly_dataの非同期版
+        
+        GSCはブロッキングAPIのためスレッドプールで実行し、
+        GA4はBetaAnalyticsDataAsyncClientで今週・先週を1リクエストで取得する。
+        期限を過ぎた場合は asyncio.TimeoutError を送出する。実行中のGSC呼び出しは
+        中断できないため、呼び出しごとのタイムアウトまでバックグラウンドで実行され、
+        プロセスの終了時にはその完了を待つ。
+        
+        Args:
+            site_url: サイトURL
+            gsc_options: GmxGscClient.get_weekly_dataに渡すオプション
+            ga4_dimensions: GA4のディメンションのリスト
+            ga4_metrics: GA4のメトリクスのリスト
+            
+        Returns:
+            Tuple: (GSC今週, GSC先週, GA4今週, GA4先週)
+        """
+        loop = asyncio.get_running_loop()
+        
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            gsc_this_week = loop.run_in_executor(
+                executor,
+                partial(self.gsc_client.get_this_week_data, site_url=site_url, **gsc_options)
+            )
+            gsc_last_week = loop.run_in_executor(
+                executor,
+                partial(self.gsc_client.get_last_week_data, site_url=site_url, **gsc_options)
+            )
+            ga4_weeks = self.ga4_client.get_comparison_data_async(
+                dimensions=ga4_dimensions,
+                metrics=ga4_metrics,
+                timeout=self.request_timeout
+            )
+            
+            results = await asyncio.gather(
+                self._with_deadline(gsc_this_week),
+                self._with_deadline(gsc_last_week),
+                self._with_deadline(ga4_weeks)
+            )
+        finally:
+            # 期限切れの場合に未開始の呼び出しを取り消す (実行中のスレッドは止められない)
+            executor.shutdown(wait=False, cancel_futures=True)
+            # イベントループの終了前に非同期クライアントのチャネルを閉じる
+            await self.ga4_client.close_async()
+        
+        gsc_this_week_df, gsc_last_week_df, (ga4_this_week_df, ga4_last_week_df) = results
+        return gsc_this_week_df, gsc_last_week_df, ga4_this_week_df, ga4_last_week_df
+    
+    async def _with_deadline(self, awaitable):
+        """期限付きで待機"""
+        if self.deadline is None:
+            return await awaitable
+        return await asyncio.wait_for(awaitable, timeout=self.deadline)
@@ -0,0 +1,84 @@
+"""
+Discovery
+googleapiclientのDiscoveryドキュメントをローカルから読み込むモジュール
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+# Discoveryドキュメントを上書きするディレクトリ ({api}.{version}.json を配置)
+DISCOVERY_DIR_ENV = 'GMX_DISCOVERY_DIR'
+
+_documents: Dict[Tuple[str, str], str] = {}
+_lock = threading.Lock()
+
+
+def load_discovery_document(
+    api_name: str,
+    api_version: str,
+    discovery_dir: Optional[str] = None
+) -> str:
+    """
+    Discoveryドキュメントを取得 (ネットワークにはアクセスしない)
+    
+    discovery_dir(未指定の場合は環境変数GMX_DISCOVERY_DIR)に
+    '{api_name}.{api_version}.json' があればそれを使用し、なければ
+    google-api-python-clientに同梱されているドキュメントを使用する。
+    読み込んだドキュメントはプロセス内でキャッシュする。
+    
+    Args:
+        api_name: API名 (例: 'searchconsole')
+        api_version: APIバージョン (例: 'v1')
+        discovery_dir: Discoveryドキュメントのディレクトリ
+        
+    Returns:
+        str: DiscoveryドキュメントのJSON文字列
+    """
+    key = (api_name, api_version)
+    
+    with _lock:
+        document = _documents.get(key)
+        if document is not None:
+            return document
+        
+        if discovery_dir is None:
+            discovery_dir = os.getenv(DISCOVERY_DIR_ENV)
+        
+        if discovery_dir:
+            path = Path(discovery_dir) / f"{api_name}.{api_version}.json"
+            if path.exists():
+                document = path.read_text(encoding='utf-8')
+        
+        if document is None:
+            document = get_static_doc(api_name, api_version)
+        
+        if document is None:
+            raise ValueError(
+                f"Discoveryドキュメントが見つかりません: {api_name} {api_version}"
+            )
+        
+        _documents[key] = document
+    
+    return document
+
+
+def build_service(api_name: str, api_version: str, http, discovery_dir: Optional[str] = None):
+    """
+    ローカルのDiscoveryドキュメントからAPIサービスを構築
+    
+    Args:
+        api_name: API名 (例: 'searchconsole')
+        api_version: APIバージョン (例: 'v1')
+        http: 認証済みHTTPトランスポート
+        discovery_dir: Discoveryドキュメントのディレクトリ
+        
+    Returns:
+        googleapiclient.discovery.Resource: APIサービス
+    """
+    document = load_discovery_document(api_name, api_version, discovery_dir)
+    return build_from_document(document, http=http)
@@ -2,44 +2,73 @@
 import os
 import shutil
 from pathlib import Path
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
-from google.oauth2 import service_account
-from google.oauth2.credentials import Credentials
-import json
+
+from gmx_seo_reporter.clients.discovery import build_service
+from gmx_seo_reporter.clients.google_auth import GmxGoogleAuth
+from gmx_seo_reporter.clients.rate_limiter import GmxRateLimiter
 
 class GmxDriveClient:
     """Google Drive API Client"""
     
     SCOPES = ['https://www.googleapis.com/auth/drive']
+    
+    # API version (discovery document is loaded locally)
+    API_NAME = 'drive'
+    API_VERSION = 'v3'
 
-    def __init__(self, folder_id: str, credentials_json: dict = None):
+    # Default rate limit (requests per second)
+    DEFAULT_QPS = 10
+
+    def __init__(
+        self,
+        folder_id: str,
+        credentials_json: dict = None,
+        auth: GmxGoogleAuth = None,
+        rate_limiter: GmxRateLimiter = None
+    ):
         """
         Initialize Drive Client
         
         Args:
             folder_id (str): Target Google Drive Folder ID
             credentials_json (dict, optional): Service Account Credentials
+            auth (GmxGoogleAuth, optional): Shared auth factory.
+                                            Takes precedence over credentials_json.
+            rate_limiter (GmxRateLimiter, optional): Rate limit / retry policy.
+                                                     Defaults to DEFAULT_QPS.
         """
         self.folder_id = folder_id
         
-        if credentials_json:
-            # Check if it's a Service Account or User OAuth Token
-            if 'type' in credentials_json and credentials_json['type'] == 'service_account':
-                print("   🔑 Authenticating with Service Account...")
-                self.creds = service_account.Credentials.from_service_account_info(
-                    credentials_json, scopes=self.SCOPES
-                )
-            else:
-                print("   🔑 Authenticating with OAuth Token (User Account)...")
-                # Assuming credentials_json is the token.json content
-                self.creds = Credentials.from_authorized_user_info(credentials_json, self.SCOPES)
+        if auth is None:
+            if not credentials_json:
+                # Fallback for local testing or environment variable
+                # Ideally should pass credentials explicitly
+                raise ValueError("Credentials are required")
+            auth = GmxGoogleAuth(credentials_json)
+        
+        # Check if it's a Service Account or User OAuth Token
+        if auth.is_service_account:
+            print("   🔑 Authenticating with Service Account...")
         else:
-            # Fallback for local testing or environment variable
-            # Ideally should pass credentials explicitly
-            raise ValueError("Credentials are required")
+            print("   🔑 Authenticating with OAuth Token (User Account)...")
+        
+        self.auth = auth
+        self.creds = auth.get_credentials(self.SCOPES)
+
+        self.service = build_service(
+            self.API_NAME,
+            self.API_VERSION,
+            http=auth.authorized_http(self.SCOPES)
+        )
+
+        if rate_limiter is None:
+            rate_limiter = GmxRateLimiter(qps=self.DEFAULT_QPS, name='drive')
+        self.rate_limiter = rate_limiter
 
-        self.service = build('drive', 'v3', credentials=self.creds)
+    def _execute(self, request):
+        """Execute an API request with rate limiting and retry on 429/5xx"""
+        return self.rate_limiter.call(request.execute)
 
     def upload_folder(self, local_folder_path: str | Path, target_folder_id: str = None) -> str:
         """
@@ -74,9 +103,9 @@ class GmxDriveClient:
             drive_folder_id = existing['id']
             print(f"   Drive folder exists: {local_folder.name} (ID: {drive_folder_id})")
         else:
-            drive_folder = self.service.files().create(
+            drive_folder = self._execute(self.service.files().create(
                 body=folder_metadata, fields='id'
-            ).execute()
+            ))
             drive_folder_id = drive_folder.get('id')
             print(f"   Created Drive folder: {local_folder.name} (ID: {drive_folder_id})")
 
@@ -93,7 +122,7 @@ class GmxDriveClient:
     def _find_folder(self, name: str, parent_id: str):
         """Find a folder by name inside a parent folder"""
         query = f"mimeType='application/vnd.google-apps.folder' and name='{name}' and '{parent_id}' in parents and trashed=false"
-        results = self.service.files().list(q=query, spaces='drive', fields='files(id, name)').execute()
+        results = self._execute(self.service.files().list(q=query, spaces='drive', fields='files(id, name)'))
         files = results.get('files', [])
         return files[0] if files else None
 
@@ -114,22 +143,22 @@ class GmxDriveClient:
         existing = self._find_file(file_path.name, parent_id)
         if existing:
             # Update existing file content
-            self.service.files().update(
+            self._execute(self.service.files().update(
                 fileId=existing['id'],
                 media_body=media
-            ).execute()
+            ))
             print(f"   Updated file: {file_path.name}")
         else:
-            self.service.files().create(
+            self._execute(self.service.files().create(
                 body=file_metadata,
                 media_body=media,
                 fields='id'
-            ).execute()
+            ))
             print(f"   Uploaded file: {file_path.name}")
 
     def _find_file(self, name: str, parent_id: str):
         """Find a file by name inside a parent folder"""
         query = f"name='{name}' and '{parent_id}' in parents and trashed=false"
-        results = self.service.files().list(q=query, spaces='drive', fields='files(id, name)').execute()
+        results = self._execute(self.service.files().list(q=query, spaces='drive', fields='files(id, name)'))
         files = results.get('files', [])
         return files[0] if files else None
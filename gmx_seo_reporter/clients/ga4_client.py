@@ -3,20 +3,28 @@ Google Analytics 4 API Client
 GA4からデータを取得するクライアント
 """
 
-import json
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-from google.analytics.data_v1beta import BetaAnalyticsDataClient
+from google.analytics.data_v1beta import (
+    BetaAnalyticsDataAsyncClient,
+    BetaAnalyticsDataClient,
+)
 from google.analytics.data_v1beta.types import (
     DateRange,
     Dimension,
     Metric,
     RunReportRequest,
 )
-from google.oauth2 import service_account
+
+from gmx_seo_reporter.clients.google_auth import GmxGoogleAuth
+from gmx_seo_reporter.clients.rate_limiter import GmxRateLimiter
+from gmx_seo_reporter.storage.raw_data_store import GmxRawDataStore
 
 
 class GmxGa4Client:
@@ -24,10 +32,35 @@ class GmxGa4Client:
     
     SCOPES = ['https://www.googleapis.com/auth/analytics.readonly']
     
+    # RunReportRequestに指定できる期間の最大数
+    MAX_DATE_RANGES_PER_REQUEST = 4
+    
+    # RunReportの1リクエストあたりの最大行数
+    MAX_ROWS_PER_REQUEST = 250000
+    
+    # レート制限のデフォルト値 (1秒あたりのリクエスト数)
+    DEFAULT_QPS = 10
+    
+    # メトリクスごとのdtype (未定義のメトリクスはfloat64)
+    METRIC_DTYPES = {
+        'sessions': np.int64,
+        'totalUsers': np.int64,
+        'activeUsers': np.int64,
+        'newUsers': np.int64,
+        'screenPageViews': np.int64,
+        'eventCount': np.int64,
+        'engagedSessions': np.int64
+    }
+    
     def __init__(
         self,
         property_id: Optional[str] = None,
-        credentials_json: Optional[str] = None
+        credentials_json: Optional[str] = None,
+        store: Optional[GmxRawDataStore] = None,
+        page_size: int = 100000,
+        max_workers: int = 4,
+        auth: Optional[GmxGoogleAuth] = None,
+        rate_limiter: Optional[GmxRateLimiter] = None
     ):
         """
         初期化
@@ -37,6 +70,15 @@ class GmxGa4Client:
                         Noneの場合は環境変数から取得
             credentials_json: サービスアカウントのJSONキー(文字列)
                             Noneの場合は環境変数から取得
+            store: 取得済みデータのローカルキャッシュ
+                   指定した場合は確定済みの期間をAPIから再取得しない
+            page_size: 1リクエストあたりの取得行数 (最大250,000)
+            max_workers: 2ページ目以降を並行取得するスレッド数
+                         (1の場合は逐次取得)
+            auth: 他のクライアントと共有する認証ファクトリ
+                  指定した場合はcredentials_jsonは使用しない
+            rate_limiter: API呼び出しのレート制限・リトライ
+                          Noneの場合はDEFAULT_QPSで作成
         """
         # プロパティIDを取得
         if property_id is None:
@@ -49,28 +91,27 @@ class GmxGa4Client:
             )
         
         self.property_id = property_id
+        self.store = store
+        self.page_size = min(page_size, self.MAX_ROWS_PER_REQUEST)
+        self.max_workers = max_workers
         
-        # 認証情報を取得
-        if credentials_json is None:
-            credentials_json = os.getenv('GMX_SERVICE_ACCOUNT_CREDENTIALS')
-            
-        if not credentials_json:
-            raise ValueError(
-                "認証情報が見つかりません。"
-                "GMX_SERVICE_ACCOUNT_CREDENTIALS環境変数を設定してください。"
-            )
+        if rate_limiter is None:
+            rate_limiter = GmxRateLimiter(qps=self.DEFAULT_QPS, name='ga4')
+        self.rate_limiter = rate_limiter
         
-        # JSON文字列をパース
-        credentials_info = json.loads(credentials_json)
+        # 認証情報を取得
+        if auth is None:
+            auth = GmxGoogleAuth(credentials_json)
         
-        # 認証情報を作成
-        self.credentials = service_account.Credentials.from_service_account_info(
-            credentials_info,
-            scopes=self.SCOPES
-        )
+        self.auth = auth
+        self.credentials = auth.get_credentials(self.SCOPES)
         
         # GA4 APIクライアントを構築
         self.client = BetaAnalyticsDataClient(credentials=self.credentials)
+        
+        # 非同期クライアントは初回の非同期呼び出し時に作成
+        self._async_client = None
+        self._async_loop = None
     
     def run_report(
         self,
@@ -91,46 +132,406 @@ class GmxGa4Client:
         Returns:
             pandas.DataFrame: 取得したデータ
         """
-        request = RunReportRequest(
+        # totalUsersなどは日別に合算できないため、期間単位でキャッシュする
+        return self.run_multi_range_report(
+            date_ranges=[(start_date, end_date)],
+            dimensions=dimensions,
+            metrics=metrics
+        )[0]
+    
+    def run_multi_range_report(
+        self,
+        date_ranges: List[Tuple[datetime, datetime]],
+        dimensions: List[str],
+        metrics: List[str]
+    ) -> List[pd.DataFrame]:
+        """
+        複数の期間をまとめて1回のRunReportで取得
+        
+        GA4は複数のdate_rangesを指定すると各行に'dateRange'ディメンションを
+        付与するため、それを使って期間ごとのDataFrameに分割する。
+        1リクエストあたり最大4期間のため、それを超える場合は分割して取得する。
+        
+        Args:
+            date_ranges: (開始日, 終了日) のリスト
+            dimensions: ディメンションのリスト
+            metrics: メトリクスのリスト
+            
+        Returns:
+            List[pandas.DataFrame]: date_rangesと同じ順序の期間別データ
+        """
+        results, pending = self._load_cached_ranges(date_ranges, dimensions, metrics)
+        
+        for chunk in self._chunk_ranges(pending):
+            request = self._build_request([date_ranges[i] for i in chunk], dimensions, metrics)
+            responses = self._run_paged_report(request)
+            frames = self._split_responses(responses, len(chunk), dimensions, metrics)
+            self._store_ranges(chunk, frames, date_ranges, dimensions, metrics, results)
+        
+        return results
+    
+    async def run_multi_range_report_async(
+        self,
+        date_ranges: List[Tuple[datetime, datetime]],
+        dimensions: List[str],
+        metrics: List[str],
+        timeout: Optional[float] = None
+    ) -> List[pd.DataFrame]:
+        """
+        run_multi_range_reportの非同期版
+        
+        BetaAnalyticsDataAsyncClientを使用するため、イベントループ上で
+        他のAPI呼び出しと並行して実行できる。
+        
+        Args:
+            date_ranges: (開始日, 終了日) のリスト
+            dimensions: ディメンションのリスト
+            metrics: メトリクスのリスト
+            timeout: 1リクエストあたりのタイムアウト(秒)
+            
+        Returns:
+            List[pandas.DataFrame]: date_rangesと同じ順序の期間別データ
+        """
+        results, pending = self._load_cached_ranges(date_ranges, dimensions, metrics)
+        
+        # 非同期クライアントは実行中のイベントループに紐づけて作成する
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = BetaAnalyticsDataAsyncClient(credentials=self.credentials)
+            self._async_loop = loop
+        
+        for chunk in self._chunk_ranges(pending):
+            request = self._build_request([date_ranges[i] for i in chunk], dimensions, metrics)
+            
+            # 1ページ目でrow_countを取得し、残りのページを並行取得
+            first = await self._run_report_async(self._page_request(request, 0), timeout)
+            rest = await asyncio.gather(*[
+                self._run_report_async(self._page_request(request, offset), timeout)
+                for offset in self._remaining_offsets(first)
+            ])
+            frames = self._split_responses([first, *rest], len(chunk), dimensions, metrics)
+            self._store_ranges(chunk, frames, date_ranges, dimensions, metrics, results)
+        
+        return results
+    
+    def iter_report(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        dimensions: List[str],
+        metrics: List[str]
+    ) -> Iterator[pd.DataFrame]:
+        """
+        レポートをページ単位で取得するジェネレータ
+        
+        row_countに達するまでoffsetを進めてページごとのDataFrameをyieldする。
+        ローカルキャッシュは使用しない。
+        
+        Args:
+            start_date: 開始日
+            end_date: 終了日
+            dimensions: ディメンションのリスト
+            metrics: メトリクスのリスト
+            
+        Yields:
+            pandas.DataFrame: 1ページ分のデータ
+        """
+        request = self._build_request([(start_date, end_date)], dimensions, metrics)
+        offset = 0
+        
+        while True:
+            response = self._run_report(self._page_request(request, offset))
+            if not response.rows:
+                break
+            
+            yield self._response_to_frame(response, dimensions, metrics)
+            
+            offset += len(response.rows)
+            if offset >= response.row_count:
+                break
+    
+    def _run_paged_report(self, request: RunReportRequest) -> List:
+        """
+        全ページを取得
+        
+        1ページ目のrow_countから残りのoffsetを求め、
+        max_workersが2以上の場合は残りのページを並行して取得する。
+        
+        Args:
+            request: RunReportRequest (limit/offsetは上書きする)
+            
+        Returns:
+            List[RunReportResponse]: ページ順のレスポンス
+        """
+        first = self._run_report(self._page_request(request, 0))
+        offsets = self._remaining_offsets(first)
+        
+        def fetch_page(offset: int):
+            return self._run_report(self._page_request(request, offset))
+        
+        if self.max_workers > 1 and len(offsets) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                rest = list(executor.map(fetch_page, offsets))
+        else:
+            rest = [fetch_page(offset) for offset in offsets]
+        
+        return [first, *rest]
+    
+    def _run_report(self, request: RunReportRequest):
+        """レート制限とリトライ付きでRunReportを実行"""
+        return self.rate_limiter.call(self.client.run_report, request)
+    
+    async def close_async(self) -> None:
+        """
+        非同期クライアントのチャネルを閉じる
+        
+        非同期クライアントはイベントループに紐づくため、ループを終了する前
+        (asyncio.runを抜ける前)に呼び出す。
+        """
+        if self._async_client is not None:
+            await self._async_client.transport.close()
+            self._async_client = None
+            self._async_loop = None
+    
+    async def _run_report_async(self, request: RunReportRequest, timeout: Optional[float]):
+        """_run_reportの非同期版"""
+        return await self.rate_limiter.call_async(
+            lambda: self._async_client.run_report(request, timeout=timeout)
+        )
+    
+    def _page_request(self, request: RunReportRequest, offset: int) -> RunReportRequest:
+        """limit/offsetを設定したリクエストのコピーを作成"""
+        page = RunReportRequest()
+        RunReportRequest.copy_from(page, request)
+        page.limit = self.page_size
+        page.offset = offset
+        return page
+    
+    def _remaining_offsets(self, first_response) -> List[int]:
+        """1ページ目のrow_countから2ページ目以降のoffsetを計算"""
+        return list(range(self.page_size, first_response.row_count, self.page_size))
+    
+    @staticmethod
+    def _range_key(
+        date_range: Tuple[datetime, datetime],
+        dimensions: List[str],
+        metrics: List[str]
+    ) -> Tuple[str, str]:
+        """キャッシュのキー (dimension_key, partition) を作成"""
+        start_date, end_date = date_range
+        dimension_key = ','.join(dimensions) + '|' + ','.join(metrics)
+        partition = f"{start_date.strftime('%Y-%m-%d')}_{end_date.strftime('%Y-%m-%d')}"
+        return dimension_key, partition
+    
+    def _load_cached_ranges(
+        self,
+        date_ranges: List[Tuple[datetime, datetime]],
+        dimensions: List[str],
+        metrics: List[str]
+    ) -> Tuple[List[Optional[pd.DataFrame]], List[int]]:
+        """キャッシュ済みの期間を読み込み、取得が必要な期間のインデックスを返す"""
+        results = [None] * len(date_ranges)
+        pending = []
+        
+        for i, date_range in enumerate(date_ranges):
+            if self.store is not None:
+                dimension_key, partition = self._range_key(date_range, dimensions, metrics)
+                cached = self.store.get('ga4', self.property_id, dimension_key, partition)
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            pending.append(i)
+        
+        return results, pending
+    
+    def _store_ranges(
+        self,
+        chunk: List[int],
+        frames: List[pd.DataFrame],
+        date_ranges: List[Tuple[datetime, datetime]],
+        dimensions: List[str],
+        metrics: List[str],
+        results: List[Optional[pd.DataFrame]]
+    ) -> None:
+        """取得した期間別データを結果に格納し、キャッシュに保存"""
+        for i, df in zip(chunk, frames):
+            results[i] = df
+            if self.store is not None:
+                dimension_key, partition = self._range_key(date_ranges[i], dimensions, metrics)
+                self.store.put(
+                    'ga4',
+                    self.property_id,
+                    dimension_key,
+                    partition,
+                    df,
+                    is_final=self.store.is_final(date_ranges[i][1])
+                )
+    
+    def _chunk_ranges(self, indices: List[int]) -> List[List[int]]:
+        """1リクエストに指定できる期間数ごとに分割"""
+        step = self.MAX_DATE_RANGES_PER_REQUEST
+        return [indices[i:i + step] for i in range(0, len(indices), step)]
+    
+    def _build_request(
+        self,
+        date_ranges: List[Tuple[datetime, datetime]],
+        dimensions: List[str],
+        metrics: List[str]
+    ) -> RunReportRequest:
+        """RunReportRequestを作成 (期間にはrange_0, range_1, ...の名前を付ける)"""
+        return RunReportRequest(
             property=f"properties/{self.property_id}",
-            date_ranges=[DateRange(
-                start_date=start_date.strftime('%Y-%m-%d'),
-                end_date=end_date.strftime('%Y-%m-%d')
-            )],
+            date_ranges=[
+                DateRange(
+                    start_date=start_date.strftime('%Y-%m-%d'),
+                    end_date=end_date.strftime('%Y-%m-%d'),
+                    name=f"range_{i}"
+                )
+                for i, (start_date, end_date) in enumerate(date_ranges)
+            ],
             dimensions=[Dimension(name=dim) for dim in dimensions],
             metrics=[Metric(name=metric) for metric in metrics]
         )
+    
+    def _split_responses(
+        self,
+        responses: List,
+        range_count: int,
+        dimensions: List[str],
+        metrics: List[str]
+    ) -> List[pd.DataFrame]:
+        """
+        ページ単位のレスポンスを結合し、期間別のDataFrameに分割
         
-        response = self.client.run_report(request)
+        期間が複数の場合は'dateRange'ディメンションが付与されるため、
+        各レスポンスのdimension_headersから位置を求めて期間ごとに分ける。
+        """
+        pages = [
+            self._response_to_frame(
+                response,
+                self._response_dimensions(response, dimensions, range_count),
+                metrics
+            )[dimensions + metrics + (['dateRange'] if range_count > 1 else [])]
+            for response in responses
+        ]
+        combined = pages[0] if len(pages) == 1 else pd.concat(pages, ignore_index=True)
         
-        # レスポンスをDataFrameに変換
-        if not response.rows:
-            # データがない場合は空のDataFrameを返す
-            columns = dimensions + metrics
-            return pd.DataFrame(columns=columns)
+        if range_count == 1:
+            return [combined]
         
-        data = []
+        groups = dict(tuple(combined.groupby('dateRange', sort=False)))
         
-        for row in response.rows:
-            item = {}
+        return [
+            groups.get(f"range_{i}", combined.iloc[0:0])
+            .drop(columns='dateRange')
+            .reset_index(drop=True)
+            for i in range(range_count)
+        ]
+    
+    @staticmethod
+    def _response_dimensions(response, dimensions: List[str], range_count: int) -> List[str]:
+        """
+        レスポンスの行のディメンションの並び (dimension_headersの順)
+        
+        Args:
+            response: RunReportResponse
+            dimensions: リクエストしたディメンション
+            range_count: リクエストした期間の数
             
-            # ディメンションの値を取得
-            for i, dim in enumerate(dimensions):
-                item[dim] = row.dimension_values[i].value
+        Returns:
+            List[str]: ディメンション名のリスト
+        """
+        headers = [header.name for header in response.dimension_headers]
+        if not headers:
+            # 行がない場合などヘッダーがない場合は、リクエストした順とする
+            return dimensions + (['dateRange'] if range_count > 1 else [])
+        
+        expected = set(dimensions) | ({'dateRange'} if range_count > 1 else set())
+        if not expected <= set(headers):
+            raise ValueError(
+                f"GA4のレスポンスに必要なディメンションがありません: "
+                f"{sorted(expected - set(headers))} (dimension_headers: {headers})"
+            )
+        return headers
+    
+    @staticmethod
+    def _response_to_frame(
+        response,
+        dimensions: List[str],
+        metrics: List[str]
+    ) -> pd.DataFrame:
+        """
+        RunReportのレスポンスをDataFrameに変換
+        
+        proto-plusのラッパーを介さずに生のprotobufからカラムごとに値を
+        取り出し、メトリクスはMETRIC_DTYPESのdtypeで一括変換する。
+        
+        Args:
+            response: RunReportResponse
+            dimensions: ディメンションのリスト
+            metrics: メトリクスのリスト
             
-            # メトリクスの値を取得
-            for i, metric in enumerate(metrics):
-                value = row.metric_values[i].value
-                # 数値に変換
-                try:
-                    item[metric] = float(value)
-                except ValueError:
-                    item[metric] = value
+        Returns:
+            pandas.DataFrame: 変換したデータ
+        """
+        rows = type(response).pb(response).rows
+        columns = {}
+        
+        # ディメンションの値を取得
+        for i, dim in enumerate(dimensions):
+            columns[dim] = pd.Series(
+                [row.dimension_values[i].value for row in rows],
+                dtype=None if len(rows) else object
+            )
+        
+        # メトリクスの値を取得
+        for i, metric in enumerate(metrics):
+            values = [row.metric_values[i].value for row in rows]
+            dtype = GmxGa4Client.METRIC_DTYPES.get(metric, np.float64)
+            try:
+                columns[metric] = np.array(values, dtype=dtype)
+            except ValueError:
+                # 数値に変換できない値を含む場合はセル単位で変換
+                columns[metric] = GmxGa4Client._convert_cells(values)
+        
+        return pd.DataFrame(columns)
+    
+    @staticmethod
+    def _convert_cells(values: List[str]) -> List:
+        """数値に変換できる値のみfloatに変換"""
+        converted = []
+        for value in values:
+            try:
+                converted.append(float(value))
+            except ValueError:
+                converted.append(value)
+        return converted
+    
+    @staticmethod
+    def _get_week_range(week_offset: int) -> Tuple[datetime, datetime]:
+        """
+        週の開始日(月曜日)と終了日(日曜日)を計算
+        
+        Args:
+            week_offset: 週のオフセット (0=今週, 1=先週, 2=先々週)
             
-            data.append(item)
+        Returns:
+            Tuple[datetime, datetime]: (月曜日, 日曜日)
+        """
+        # 今日の日付
+        today = datetime.now()
+        
+        # 週の開始日(月曜日)を計算
+        days_since_monday = today.weekday()
+        this_monday = today - timedelta(days=days_since_monday)
+        
+        # 指定された週のオフセットを適用
+        target_monday = this_monday - timedelta(weeks=week_offset)
+        
+        # 週の終了日(日曜日)
+        target_sunday = target_monday + timedelta(days=6)
         
-        df = pd.DataFrame(data)
-        return df
+        return target_monday, target_sunday
     
     def get_weekly_data(
         self,
@@ -155,18 +556,7 @@ class GmxGa4Client:
         if metrics is None:
             metrics = ['sessions', 'totalUsers', 'screenPageViews']
         
-        # 今日の日付
-        today = datetime.now()
-        
-        # 週の開始日(月曜日)を計算
-        days_since_monday = today.weekday()
-        this_monday = today - timedelta(days=days_since_monday)
-        
-        # 指定された週のオフセットを適用
-        target_monday = this_monday - timedelta(weeks=week_offset)
-        
-        # 週の終了日(日曜日)
-        target_sunday = target_monday + timedelta(days=6)
+        target_monday, target_sunday = self._get_week_range(week_offset)
         
         # データを取得
         return self.run_report(
@@ -176,6 +566,72 @@ class GmxGa4Client:
             metrics=metrics
         )
     
+    def get_multi_week_data(
+        self,
+        week_offsets: List[int],
+        dimensions: List[str] = None,
+        metrics: List[str] = None
+    ) -> List[pd.DataFrame]:
+        """
+        複数週のデータをまとめて取得
+        
+        Args:
+            week_offsets: 週のオフセットのリスト (0=今週, 1=先週, 2=先々週)
+            dimensions: ディメンションのリスト
+            metrics: メトリクスのリスト
+            
+        Returns:
+            List[pandas.DataFrame]: week_offsetsと同じ順序の週次データ
+        """
+        if dimensions is None:
+            dimensions = ['sessionDefaultChannelGroup']
+        
+        if metrics is None:
+            metrics = ['sessions', 'totalUsers', 'screenPageViews']
+        
+        return self.run_multi_range_report(
+            date_ranges=[self._get_week_range(offset) for offset in week_offsets],
+            dimensions=dimensions,
+            metrics=metrics
+        )
+    
+    def get_comparison_data(
+        self,
+        dimensions: List[str] = None,
+        metrics: List[str] = None
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """今週と先週のデータを1回のリクエストで取得"""
+        this_week, last_week = self.get_multi_week_data(
+            week_offsets=[1, 2],  # 先週(完全な週), 先々週
+            dimensions=dimensions,
+            metrics=metrics
+        )
+        return this_week, last_week
+    
+    async def get_comparison_data_async(
+        self,
+        dimensions: List[str] = None,
+        metrics: List[str] = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """get_comparison_dataの非同期版"""
+        if dimensions is None:
+            dimensions = ['sessionDefaultChannelGroup']
+        
+        if metrics is None:
+            metrics = ['sessions', 'totalUsers', 'screenPageViews']
+        
+        this_week, last_week = await self.run_multi_range_report_async(
+            date_ranges=[
+                self._get_week_range(1),  # 先週(完全な週)
+                self._get_week_range(2)   # 先々週
+            ],
+            dimensions=dimensions,
+            metrics=metrics,
+            timeout=timeout
+        )
+        return this_week, last_week
+    
     def get_this_week_data(
         self,
         dimensions: List[str] = None,
@@ -0,0 +1,149 @@
+"""
+Google Auth
+Googleクライアント間で認証情報とHTTPトランスポートを共有するモジュール
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Union
+
+import google_auth_httplib2
+import httplib2
+from google.auth.transport.requests import Request
+from google.oauth2 import service_account
+from google.oauth2.credentials import Credentials
+
+
+class GmxGoogleAuth:
+    """
+    認証情報とHTTPトランスポートのファクトリ
+    
+    サービスアカウント(またはOAuthトークン)のJSONを一度だけパースし、
+    スコープごとに認証情報を共有する。アクセストークンは有効期限まで
+    使い回す。HTTPトランスポートはスコープごとのプールで共有し、スレッドが
+    変わってもKeep-Alive接続(TLSセッション)を再利用する。
+    """
+    
+    def __init__(
+        self,
+        credentials_json: Optional[Union[str, Dict]] = None,
+        timeout: Optional[float] = 120
+    ):
+        """
+        初期化
+        
+        Args:
+            credentials_json: サービスアカウントのJSONキー(文字列または辞書)
+                            Noneの場合は環境変数から取得
+            timeout: HTTPリクエストのタイムアウト(秒)
+        """
+        if credentials_json is None:
+            credentials_json = os.getenv('GMX_SERVICE_ACCOUNT_CREDENTIALS')
+        
+        if not credentials_json:
+            raise ValueError(
+                "認証情報が見つかりません。"
+                "GMX_SERVICE_ACCOUNT_CREDENTIALS環境変数を設定してください。"
+            )
+        
+        # JSON文字列をパース
+        if isinstance(credentials_json, str):
+            credentials_json = json.loads(credentials_json)
+        
+        self.credentials_info = credentials_json
+        self.timeout = timeout
+        
+        self._credentials = {}
+        self._lock = threading.Lock()
+        
+        # スコープごとの未使用のHTTPトランスポート
+        self._idle_transports: Dict[tuple, List[google_auth_httplib2.AuthorizedHttp]] = {}
+    
+    @property
+    def is_service_account(self) -> bool:
+        """サービスアカウントの認証情報かどうか"""
+        return self.credentials_info.get('type') == 'service_account'
+    
+    def get_credentials(self, scopes: List[str]):
+        """
+        スコープに対応する認証情報を取得 (スコープごとに1つを共有)
+        
+        Args:
+            scopes: OAuthスコープのリスト
+            
+        Returns:
+            google.auth.credentials.Credentials: 認証情報
+        """
+        key = tuple(sorted(scopes))
+        
+        with self._lock:
+            credentials = self._credentials.get(key)
+            if credentials is None:
+                if self.is_service_account:
+                    credentials = service_account.Credentials.from_service_account_info(
+                        self.credentials_info,
+                        scopes=list(scopes)
+                    )
+                else:
+                    # OAuthトークン(token.jsonの内容)の場合
+                    credentials = Credentials.from_authorized_user_info(
+                        self.credentials_info,
+                        list(scopes)
+                    )
+                self._credentials[key] = credentials
+            
+            # 有効期限切れの場合のみ更新 (複数スレッドからの同時更新を防ぐ)
+            if not credentials.valid:
+                credentials.refresh(Request())
+        
+        return credentials
+    
+    def authorized_http(self, scopes: List[str]) -> google_auth_httplib2.AuthorizedHttp:
+        """
+        認証済みHTTPトランスポートを新しく作成
+        
+        APIサービスの構築や、1つのスレッドからのみ使うクライアント用。
+        複数のスレッドからリクエストを実行する場合は borrow_http を使う。
+        
+        Args:
+            scopes: OAuthスコープのリスト
+            
+        Returns:
+            google_auth_httplib2.AuthorizedHttp: 認証済みHTTPトランスポート
+        """
+        return google_auth_httplib2.AuthorizedHttp(
+            self.get_credentials(scopes),
+            http=httplib2.Http(timeout=self.timeout)
+        )
+    
+    @contextmanager
+    def borrow_http(self, scopes: List[str]) -> Iterator[google_auth_httplib2.AuthorizedHttp]:
+        """
+        プールからHTTPトランスポートを借りる
+        
+        httplib2.Httpはスレッドセーフではないため、同時に1つのスレッドだけが使うよう
+        withの間だけ貸し出し、終了後はプールに戻す。スレッドプールが呼び出しごとに
+        作り直されても、接続(Keep-Alive・TLSセッション)は次の呼び出しで再利用される。
+        プールの大きさは同時に実行したリクエスト数の最大値になる。
+        
+        Args:
+            scopes: OAuthスコープのリスト
+            
+        Yields:
+            google_auth_httplib2.AuthorizedHttp: 認証済みHTTPトランスポート
+        """
+        key = tuple(sorted(scopes))
+        
+        with self._lock:
+            idle = self._idle_transports.setdefault(key, [])
+            http = idle.pop() if idle else None
+        if http is None:
+            http = self.authorized_http(scopes)
+        
+        try:
+            yield http
+        finally:
+            with self._lock:
+                idle.append(http)
@@ -3,14 +3,17 @@ Google Search Console API Client
 Search Consoleからデータを取得するクライアント
 """
 
-import json
-import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 
+import numpy as np
 import pandas as pd
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from gmx_seo_reporter.clients.discovery import build_service
+from gmx_seo_reporter.clients.google_auth import GmxGoogleAuth
+from gmx_seo_reporter.clients.rate_limiter import GmxRateLimiter
+from gmx_seo_reporter.storage.raw_data_store import GmxRawDataStore
 
 
 class GmxGscClient:
@@ -18,34 +21,80 @@ class GmxGscClient:
     
     SCOPES = ['https://www.googleapis.com/auth/webmasters.readonly']
     
-    def __init__(self, credentials_json: Optional[str] = None):
+    # 使用するAPIのバージョン (Discoveryドキュメントはローカルから読み込む)
+    API_NAME = 'searchconsole'
+    API_VERSION = 'v1'
+    
+    # レート制限のデフォルト値 (1秒あたりのリクエスト数)
+    DEFAULT_QPS = 10
+    
+    # Search Analytics APIの1リクエストあたりの最大行数
+    MAX_ROWS_PER_REQUEST = 25000
+    
+    METRICS = ['clicks', 'impressions', 'ctr', 'position']
+    
+    # メトリクスごとのdtype (clicks/impressionsは整数値)
+    METRIC_DTYPES = {
+        'clicks': np.int64,
+        'impressions': np.int64,
+        'ctr': np.float64,
+        'position': np.float64
+    }
+    
+    # デバイス別シャーディングで使用するデバイス種別
+    DEVICES = ['DESKTOP', 'MOBILE', 'TABLET']
+    
+    def __init__(
+        self,
+        credentials_json: Optional[str] = None,
+        store: Optional[GmxRawDataStore] = None,
+        auth: Optional[GmxGoogleAuth] = None,
+        rate_limiter: Optional[GmxRateLimiter] = None
+    ):
         """
         初期化
         
         Args:
             credentials_json: サービスアカウントのJSONキー(文字列)
                             Noneの場合は環境変数から取得
+            store: 取得済みデータのローカルキャッシュ
+                   指定した場合は未取得・未確定の日付のみAPIから取得
+            auth: 他のクライアントと共有する認証ファクトリ
+                  指定した場合はcredentials_jsonは使用しない
+            rate_limiter: API呼び出しのレート制限・リトライ
+                          Noneの場合はDEFAULT_QPSで作成
         """
-        if credentials_json is None:
-            credentials_json = os.getenv('GMX_SERVICE_ACCOUNT_CREDENTIALS')
-            
-        if not credentials_json:
-            raise ValueError(
-                "認証情報が見つかりません。"
-                "GMX_SERVICE_ACCOUNT_CREDENTIALS環境変数を設定してください。"
-            )
+        if auth is None:
+            auth = GmxGoogleAuth(credentials_json)
         
-        # JSON文字列をパース
-        credentials_info = json.loads(credentials_json)
+        self.auth = auth
+        self.credentials = auth.get_credentials(self.SCOPES)
         
-        # 認証情報を作成
-        self.credentials = service_account.Credentials.from_service_account_info(
-            credentials_info,
-            scopes=self.SCOPES
+        # Search Console APIサービスを構築
+        self.service = build_service(
+            self.API_NAME,
+            self.API_VERSION,
+            http=auth.authorized_http(self.SCOPES)
         )
         
-        # Search Console APIサービスを構築
-        self.service = build('searchconsole', 'v1', credentials=self.credentials)
+        self.store = store
+        
+        if rate_limiter is None:
+            rate_limiter = GmxRateLimiter(qps=self.DEFAULT_QPS, name='gsc')
+        self.rate_limiter = rate_limiter
+    
+    def _execute(self, request):
+        """
+        APIリクエストを実行
+        
+        httplib2はスレッドセーフではないため、共有のプールから借りた
+        トランスポートを指定して実行する。429/5xxはバックオフしてリトライする。
+        """
+        def execute():
+            with self.auth.borrow_http(self.SCOPES) as http:
+                return request.execute(http=http)
+        
+        return self.rate_limiter.call(execute)
     
     def get_search_analytics(
         self,
@@ -53,7 +102,9 @@ class GmxGscClient:
         start_date: datetime,
         end_date: datetime,
         dimensions: List[str] = None,
-        row_limit: int = 1000
+        row_limit: int = 1000,
+        paginate: bool = False,
+        max_rows: Optional[int] = None
     ) -> pd.DataFrame:
         """
         Search Analyticsデータを取得
@@ -63,7 +114,9 @@ class GmxGscClient:
             start_date: 開始日
             end_date: 終了日
             dimensions: ディメンション (デフォルト: ['query'])
-            row_limit: 取得行数の上限
+            row_limit: 取得行数の上限 (paginate=Falseの場合)
+            paginate: Trueの場合はstartRowを進めて全ページを取得
+            max_rows: ページング時の取得行数の上限 (Noneの場合は無制限)
             
         Returns:
             pandas.DataFrame: 取得したデータ
@@ -71,52 +124,407 @@ class GmxGscClient:
         if dimensions is None:
             dimensions = ['query']
         
-        request = {
-            'startDate': start_date.strftime('%Y-%m-%d'),
-            'endDate': end_date.strftime('%Y-%m-%d'),
-            'dimensions': dimensions,
-            'rowLimit': row_limit,
-            'startRow': 0
-        }
-        
-        response = self.service.searchanalytics().query(
-            siteUrl=site_url,
-            body=request
-        ).execute()
-        
-        # レスポンスをDataFrameに変換
-        if 'rows' not in response:
+        if paginate:
+            chunks = self.iter_search_analytics(
+                site_url=site_url,
+                start_date=start_date,
+                end_date=end_date,
+                dimensions=dimensions,
+                max_rows=max_rows
+            )
+        else:
+            chunks = self.iter_search_analytics(
+                site_url=site_url,
+                start_date=start_date,
+                end_date=end_date,
+                dimensions=dimensions,
+                page_size=row_limit,
+                max_rows=row_limit
+            )
+        
+        frames = list(chunks)
+        if not frames:
             # データがない場合は空のDataFrameを返す
-            columns = dimensions + ['clicks', 'impressions', 'ctr', 'position']
-            return pd.DataFrame(columns=columns)
+            return self._rows_to_frame([], dimensions)
+        
+        return pd.concat(frames, ignore_index=True)
+    
+    def iter_search_analytics(
+        self,
+        site_url: str,
+        start_date: datetime,
+        end_date: datetime,
+        dimensions: List[str] = None,
+        page_size: int = MAX_ROWS_PER_REQUEST,
+        max_rows: Optional[int] = None,
+        dimension_filter_groups: Optional[List[Dict]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Search Analyticsデータをページ単位で取得するジェネレータ
+        
+        APIが空のページを返すか、max_rowsに達するまでstartRowを進めて
+        ページごとのDataFrameをyieldする。
+        
+        Args:
+            site_url: サイトURL
+            start_date: 開始日
+            end_date: 終了日
+            dimensions: ディメンション (デフォルト: ['query'])
+            page_size: 1リクエストあたりの行数 (最大25,000)
+            max_rows: 取得行数の上限 (Noneの場合は無制限)
+            dimension_filter_groups: APIのdimensionFilterGroups
+            
+        Yields:
+            pandas.DataFrame: 1ページ分のデータ
+        """
+        if dimensions is None:
+            dimensions = ['query']
         
-        rows = response['rows']
-        data = []
+        page_size = min(page_size, self.MAX_ROWS_PER_REQUEST)
+        start_row = 0
         
-        for row in rows:
-            item = {}
+        while True:
+            limit = page_size
+            if max_rows is not None:
+                limit = min(limit, max_rows - start_row)
+            if limit <= 0:
+                break
+            
+            request = {
+                'startDate': start_date.strftime('%Y-%m-%d'),
+                'endDate': end_date.strftime('%Y-%m-%d'),
+                'dimensions': dimensions,
+                'rowLimit': limit,
+                'startRow': start_row
+            }
+            if dimension_filter_groups:
+                request['dimensionFilterGroups'] = dimension_filter_groups
+            
+            response = self._execute(self.service.searchanalytics().query(
+                siteUrl=site_url,
+                body=request
+            ))
             
-            # ディメンションの値を取得
-            for i, dim in enumerate(dimensions):
-                item[dim] = row['keys'][i]
+            rows = response.get('rows', [])
+            if not rows:
+                break
             
-            # メトリクスの値を取得
-            item['clicks'] = row['clicks']
-            item['impressions'] = row['impressions']
-            item['ctr'] = row['ctr']
-            item['position'] = row['position']
+            yield self._rows_to_frame(rows, dimensions)
+            
+            start_row += len(rows)
+            
+            # 要求した行数に満たなければ最終ページ
+            if len(rows) < limit:
+                break
+    
+    def get_search_analytics_sharded(
+        self,
+        site_url: str,
+        start_date: datetime,
+        end_date: datetime,
+        dimensions: List[str] = None,
+        shard_by: str = 'date',
+        max_workers: int = 4,
+        max_rows: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        期間を日別(またはデバイス別)のサブクエリに分割して並列取得
+        
+        各シャードはページングで全行を取得し、結果はget_search_analyticsと
+        同じ形(ディメンション + clicks/impressions/ctr/position)にマージする。
+        
+        Args:
+            site_url: サイトURL
+            start_date: 開始日
+            end_date: 終了日
+            dimensions: ディメンション (デフォルト: ['query'])
+            shard_by: 分割単位 ('date' または 'device')
+            max_workers: 同時実行するスレッド数の上限
+            max_rows: シャードごとの取得行数の上限 (Noneの場合は無制限)
             
-            data.append(item)
+        Returns:
+            pandas.DataFrame: マージしたデータ
+        """
+        if dimensions is None:
+            dimensions = ['query']
+        
+        # シャードごとの (開始日, 終了日, フィルタ) を作成
+        if shard_by == 'date':
+            days = (end_date.date() - start_date.date()).days + 1
+            shards = [
+                (start_date + timedelta(days=i), start_date + timedelta(days=i), None)
+                for i in range(days)
+            ]
+        elif shard_by == 'device':
+            shards = [
+                (start_date, end_date, [{
+                    'filters': [{
+                        'dimension': 'device',
+                        'operator': 'equals',
+                        'expression': device
+                    }]
+                }])
+                for device in self.DEVICES
+            ]
+        else:
+            raise ValueError(f"未対応のシャード単位です: {shard_by}")
         
-        df = pd.DataFrame(data)
-        return df
+        def fetch_shard(shard) -> List[pd.DataFrame]:
+            shard_start, shard_end, filter_groups = shard
+            return list(self.iter_search_analytics(
+                site_url=site_url,
+                start_date=shard_start,
+                end_date=shard_end,
+                dimensions=dimensions,
+                max_rows=max_rows,
+                dimension_filter_groups=filter_groups
+            ))
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(fetch_shard, shards))
+        
+        frames = [frame for chunks in results for frame in chunks]
+        if not frames:
+            return self._rows_to_frame([], dimensions)
+        
+        merged = pd.concat(frames, ignore_index=True)
+        
+        # シャードのキーがディメンションに含まれていれば行は重複しない
+        if shard_by in dimensions:
+            return merged
+        
+        return self._aggregate_rows(merged, dimensions)
+    
+    def get_search_analytics_cached(
+        self,
+        site_url: str,
+        start_date: datetime,
+        end_date: datetime,
+        dimensions: List[str] = None,
+        row_limit: int = 1000,
+        paginate: bool = False,
+        max_rows: Optional[int] = None,
+        shard_by: Optional[str] = None,
+        max_workers: int = 4
+    ) -> pd.DataFrame:
+        """
+        ローカルキャッシュを使ってSearch Analyticsデータを取得
+        
+        日別のデータをキャッシュし、未取得または未確定の日付のみを
+        'date'ディメンション付きで取得する。未取得の日付が飛び飛びの場合は、
+        連続した日付ごとに取得する (間のキャッシュ済みの日付は取得しない)。
+        結果は期間全体で集約して get_search_analytics と同じ形で返す。
+        
+        行数の上限 (paginate=Falseの場合はrow_limit、paginate=Trueの場合はmax_rows) を
+        指定した場合は、日ごとに上限の行数まで取得してキャッシュし、
+        集約後にクリック数の多い順に上限の行数を返す。上限ごとに別のデータとしてキャッシュする。
+        これは期間全体を1リクエストで取得した上位N行の近似であり、一致しない場合がある:
+        どの日も日別の上位N行に入らない行は週の上位N行に入っていても結果に含まれず、
+        結果に含まれる行も上位N行から外れた日の値は合計に含まれない(少なく集計される)。
+        正確な値が必要な場合は、上限を日別の行数より大きくする(または無制限にする)。
+        
+        Args:
+            site_url: サイトURL
+            start_date: 開始日
+            end_date: 終了日
+            dimensions: ディメンション (デフォルト: ['query'])
+            row_limit: 取得行数の上限 (paginate=Falseの場合)
+            paginate: Trueの場合は全ページを取得
+            max_rows: ページング時の取得行数の上限 (Noneの場合は無制限)
+            shard_by: 未取得の日付を分割して並列取得する単位 ('date' / 'device' / None)
+                      行数の上限がある場合は日ごとに上限を適用するため常に日別に分割し、
+                      'device' は使用しない (警告を出す)
+            max_workers: 並列取得時のスレッド数の上限
+            
+        Returns:
+            pandas.DataFrame: 取得したデータ
+        """
+        if dimensions is None:
+            dimensions = ['query']
+        
+        if self.store is None:
+            raise ValueError("storeが設定されていません")
+        
+        if shard_by not in (None, 'date', 'device'):
+            raise ValueError(f"未対応のシャード単位です: {shard_by}")
+        
+        row_cap = max_rows if paginate else row_limit
+        if row_cap is not None and shard_by == 'device':
+            warnings.warn(
+                "行数の上限を指定したキャッシュ取得では日ごとに上限を適用するため、"
+                "shard_by='device' の代わりに日別に分割して取得します",
+                stacklevel=2
+            )
+        dimension_key = ','.join(dimensions)
+        if row_cap is not None:
+            dimension_key += f'|rows={row_cap}'
+        days = [
+            (start_date + timedelta(days=i)).strftime('%Y-%m-%d')
+            for i in range((end_date.date() - start_date.date()).days + 1)
+        ]
+        
+        missing = self.store.missing_partitions('gsc', site_url, dimension_key, days)
+        
+        by_day = {}
+        for run in self._contiguous_days(missing):
+            fetched = self._fetch_daily(
+                site_url, run[0], run[-1], dimensions, row_cap, shard_by, max_workers
+            )
+            fetched_by_day = dict(tuple(fetched.groupby('date', sort=False)))
+            for day in run:
+                day_df = fetched_by_day.get(day, fetched.iloc[0:0]).drop(columns='date')
+                by_day[day] = day_df
+                self.store.put(
+                    'gsc',
+                    site_url,
+                    dimension_key,
+                    day,
+                    day_df,
+                    is_final=self.store.is_final(datetime.strptime(day, '%Y-%m-%d'))
+                )
+        
+        frames = []
+        for day in days:
+            if day in by_day:
+                frames.append(by_day[day])
+            else:
+                frames.append(self.store.get('gsc', site_url, dimension_key, day))
+        
+        frames = [frame for frame in frames if frame is not None and len(frame) > 0]
+        if not frames:
+            return self._rows_to_frame([], dimensions)
+        
+        result = self._aggregate_rows(pd.concat(frames, ignore_index=True), dimensions)
+        if row_cap is not None and len(result) > row_cap:
+            result = result.sort_values('clicks', ascending=False, kind='stable').head(row_cap)
+            result = result.reset_index(drop=True)
+        return result
+    
+    @staticmethod
+    def _contiguous_days(days: List[str]) -> List[List[str]]:
+        """日付('%Y-%m-%d')のリストを連続した日付ごとに分割"""
+        runs = []
+        previous = None
+        for day in days:
+            current = datetime.strptime(day, '%Y-%m-%d')
+            if previous is None or current - previous != timedelta(days=1):
+                runs.append([])
+            runs[-1].append(day)
+            previous = current
+        return runs
+    
+    def _fetch_daily(
+        self,
+        site_url: str,
+        first_day: str,
+        last_day: str,
+        dimensions: List[str],
+        row_cap: Optional[int],
+        shard_by: Optional[str],
+        max_workers: int
+    ) -> pd.DataFrame:
+        """
+        連続した期間を'date'ディメンション付きで取得
+        
+        行数の上限がある場合は、日ごとに上限の行数までになるよう日別に分割して取得する。
+        上限がない場合は shard_by ('date' / 'device') で分割し、Noneの場合は一括で取得する。
+        """
+        fetch_start = datetime.strptime(first_day, '%Y-%m-%d')
+        fetch_end = datetime.strptime(last_day, '%Y-%m-%d')
+        daily_dimensions = dimensions + ['date']
+        
+        if row_cap is not None or shard_by is not None:
+            return self.get_search_analytics_sharded(
+                site_url=site_url,
+                start_date=fetch_start,
+                end_date=fetch_end,
+                dimensions=daily_dimensions,
+                shard_by='date' if row_cap is not None else shard_by,
+                max_workers=max_workers,
+                max_rows=row_cap
+            )
+        
+        return self.get_search_analytics(
+            site_url=site_url,
+            start_date=fetch_start,
+            end_date=fetch_end,
+            dimensions=daily_dimensions,
+            paginate=True
+        )
+    
+    @staticmethod
+    def _aggregate_rows(df: pd.DataFrame, dimensions: List[str]) -> pd.DataFrame:
+        """
+        同じディメンションの行を集約
+        
+        clicks/impressionsは合計し、ctrはclicks/impressions、
+        positionは表示回数で加重平均して再計算する。
+        
+        Args:
+            df: 集約するデータ
+            dimensions: 集約キーとなるディメンション
+            
+        Returns:
+            pandas.DataFrame: 集約したデータ
+        """
+        work = df.assign(_weighted_position=df['position'] * df['impressions'])
+        grouped = work.groupby(dimensions, sort=False, as_index=False).agg(
+            clicks=('clicks', 'sum'),
+            impressions=('impressions', 'sum'),
+            _weighted_position=('_weighted_position', 'sum')
+        )
+        
+        impressions = grouped['impressions'].where(grouped['impressions'] != 0)
+        grouped['ctr'] = (grouped['clicks'] / impressions).fillna(0)
+        grouped['position'] = (grouped['_weighted_position'] / impressions).fillna(0)
+        
+        return grouped[dimensions + GmxGscClient.METRICS]
+    
+    @staticmethod
+    def _rows_to_frame(rows: List[Dict], dimensions: List[str]) -> pd.DataFrame:
+        """
+        APIレスポンスの行をDataFrameに変換
+        
+        行ごとのdictを作らず、カラムごとに配列を作成する。
+        メトリクスのdtypeはMETRIC_DTYPESで事前に固定する。
+        
+        Args:
+            rows: レスポンスの'rows'
+            dimensions: ディメンション
+            
+        Returns:
+            pandas.DataFrame: 変換したデータ
+        """
+        count = len(rows)
+        columns = {}
+        
+        # ディメンションの値を取得
+        for i, dim in enumerate(dimensions):
+            columns[dim] = pd.Series(
+                [row['keys'][i] for row in rows],
+                dtype=None if count else object
+            )
+        
+        # メトリクスの値を取得
+        for metric, dtype in GmxGscClient.METRIC_DTYPES.items():
+            columns[metric] = np.fromiter(
+                (row[metric] for row in rows),
+                dtype=dtype,
+                count=count
+            )
+        
+        return pd.DataFrame(columns)
     
     def get_weekly_data(
         self,
         site_url: str,
         week_offset: int = 0,
         dimensions: List[str] = None,
-        row_limit: int = 1000
+        row_limit: int = 1000,
+        paginate: bool = False,
+        max_rows: Optional[int] = None,
+        shard_by: Optional[str] = None,
+        max_workers: int = 4
     ) -> pd.DataFrame:
         """
         週次データを取得
@@ -125,7 +533,11 @@ class GmxGscClient:
             site_url: サイトURL
             week_offset: 週のオフセット (0=今週, 1=先週, 2=先々週)
             dimensions: ディメンション
-            row_limit: 取得行数の上限
+            row_limit: 取得行数の上限 (paginate=Falseの場合)
+            paginate: Trueの場合は全ページを取得
+            max_rows: ページング時の取得行数の上限
+            shard_by: 指定した場合は 'date'/'device' 単位で分割して並列取得
+            max_workers: 分割取得時のスレッド数の上限
             
         Returns:
             pandas.DataFrame: 週次データ
@@ -144,38 +556,80 @@ class GmxGscClient:
         target_sunday = target_monday + timedelta(days=6)
         
         # データを取得
+        if self.store is not None:
+            return self.get_search_analytics_cached(
+                site_url=site_url,
+                start_date=target_monday,
+                end_date=target_sunday,
+                dimensions=dimensions,
+                row_limit=row_limit,
+                paginate=paginate,
+                max_rows=max_rows,
+                shard_by=shard_by,
+                max_workers=max_workers
+            )
+        
+        if shard_by:
+            return self.get_search_analytics_sharded(
+                site_url=site_url,
+                start_date=target_monday,
+                end_date=target_sunday,
+                dimensions=dimensions,
+                shard_by=shard_by,
+                max_workers=max_workers,
+                max_rows=max_rows
+            )
+        
         return self.get_search_analytics(
             site_url=site_url,
             start_date=target_monday,
             end_date=target_sunday,
             dimensions=dimensions,
-            row_limit=row_limit
+            row_limit=row_limit,
+            paginate=paginate,
+            max_rows=max_rows
         )
     
     def get_this_week_data(
         self,
         site_url: str,
         dimensions: List[str] = None,
-        row_limit: int = 1000
+        row_limit: int = 1000,
+        paginate: bool = False,
+        max_rows: Optional[int] = None,
+        shard_by: Optional[str] = None,
+        max_workers: int = 4
     ) -> pd.DataFrame:
         """今週のデータを取得"""
         return self.get_weekly_data(
             site_url=site_url,
             week_offset=1,  # 先週(完全な週)
             dimensions=dimensions,
-            row_limit=row_limit
+            row_limit=row_limit,
+            paginate=paginate,
+            max_rows=max_rows,
+            shard_by=shard_by,
+            max_workers=max_workers
         )
     
     def get_last_week_data(
         self,
         site_url: str,
         dimensions: List[str] = None,
-        row_limit: int = 1000
+        row_limit: int = 1000,
+        paginate: bool = False,
+        max_rows: Optional[int] = None,
+        shard_by: Optional[str] = None,
+        max_workers: int = 4
     ) -> pd.DataFrame:
         """先週のデータを取得"""
         return self.get_weekly_data(
             site_url=site_url,
             week_offset=2,  # 先々週
             dimensions=dimensions,
-            row_limit=row_limit
+            row_limit=row_limit,
+            paginate=paginate,
+            max_rows=max_rows,
+            shard_by=shard_by,
+            max_workers=max_workers
         )
@@ -0,0 +1,189 @@
+"""
+Rate Limiter
+API呼び出しのレート制限とリトライを行うモジュール
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from google.api_core import exceptions as api_exceptions
+from googleapiclient.errors import HttpError
+
+T = TypeVar('T')
+
+
+class GmxRateLimiter:
+    """
+    トークンバケット方式のレート制限 + 指数バックオフ付きリトライ
+    
+    429(クォータ超過)を受けた場合はレートを半分に下げ、成功が続くと
+    設定値まで徐々に戻す(AIMD)。スレッド・asyncioのどちらからも使用できる。
+    """
+    
+    # リトライ対象のHTTPステータス
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+    
+    # リトライ対象のgRPC例外 (GA4 Data API)
+    RETRYABLE_EXCEPTIONS = (
+        api_exceptions.TooManyRequests,
+        api_exceptions.ResourceExhausted,
+        api_exceptions.InternalServerError,
+        api_exceptions.BadGateway,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.GatewayTimeout,
+        api_exceptions.DeadlineExceeded,
+        ConnectionError,
+        TimeoutError,
+    )
+    
+    def __init__(
+        self,
+        qps: float,
+        burst: Optional[int] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        name: str = '',
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        初期化
+        
+        Args:
+            qps: 1秒あたりの最大リクエスト数
+            burst: バケットの容量 (Noneの場合はqpsを切り上げた値)
+            max_retries: 最大リトライ回数
+            base_delay: バックオフの初期待機時間(秒)
+            max_delay: バックオフの最大待機時間(秒)
+            name: ログ表示用の名前
+            clock: 経過時間の計測に使う時計 (テスト用に差し替え可能)
+            sleep: callで待機に使う関数 (テスト用に差し替え可能)
+        """
+        self.max_qps = qps
+        self.qps = qps
+        self.burst = burst if burst is not None else max(1, int(qps + 0.999))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.name = name
+        self._clock = clock
+        self._sleep = sleep
+        
+        self._tokens = float(self.burst)
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+        
+        # 統計情報
+        self.throttled_seconds = 0.0
+        self.request_count = 0
+        self.retry_count = 0
+    
+    def _reserve(self) -> float:
+        """トークンを1つ予約し、使用可能になるまでの待機時間を返す"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                float(self.burst),
+                self._tokens + (now - self._updated_at) * self.qps
+            )
+            self._updated_at = now
+            self._tokens -= 1
+            self.request_count += 1
+            
+            delay = -self._tokens / self.qps if self._tokens < 0 else 0.0
+            self.throttled_seconds += delay
+            return delay
+    
+    def _backoff(self, attempt: int, exc: Exception) -> float:
+        """リトライまでの待機時間を計算 (フルジッター)"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        
+        with self._lock:
+            if self._is_quota_error(exc):
+                # クォータ超過時はレートを半分に下げる
+                self.qps = max(self.max_qps / 16, self.qps / 2)
+            self.retry_count += 1
+            self.throttled_seconds += delay
+        
+        return delay
+    
+    def _on_success(self) -> None:
+        """成功時にレートを設定値まで徐々に戻す"""
+        if self.qps < self.max_qps:
+            with self._lock:
+                self.qps = min(self.max_qps, self.qps + self.max_qps / 10)
+    
+    def call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        レート制限とリトライ付きで関数を実行
+        
+        Args:
+            func: 実行する関数
+            *args, **kwargs: 関数の引数
+            
+        Returns:
+            関数の戻り値
+        """
+        attempt = 0
+        while True:
+            delay = self._reserve()
+            if delay > 0:
+                self._sleep(delay)
+            
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not self.is_retryable(e):
+                    raise
+                self._sleep(self._backoff(attempt, e))
+                attempt += 1
+                continue
+            
+            self._on_success()
+            return result
+    
+    async def call_async(self, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        callの非同期版
+        
+        Args:
+            func: コルーチンを返す関数 (リトライのたびに呼び出す)
+            
+        Returns:
+            コルーチンの戻り値
+        """
+        attempt = 0
+        while True:
+            delay = self._reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            try:
+                result = await func()
+            except Exception as e:
+                if attempt >= self.max_retries or not self.is_retryable(e):
+                    raise
+                await asyncio.sleep(self._backoff(attempt, e))
+                attempt += 1
+                continue
+            
+            self._on_success()
+            return result
+    
+    @classmethod
+    def is_retryable(cls, exc: Exception) -> bool:
+        """リトライ対象のエラーかどうか"""
+        if isinstance(exc, HttpError):
+            return exc.resp.status in cls.RETRYABLE_STATUS
+        return isinstance(exc, cls.RETRYABLE_EXCEPTIONS)
+    
+    @staticmethod
+    def _is_quota_error(exc: Exception) -> bool:
+        """クォータ超過(429)のエラーかどうか"""
+        if isinstance(exc, HttpError):
+            return exc.resp.status == 429
+        return isinstance(exc, (api_exceptions.TooManyRequests, api_exceptions.ResourceExhausted))
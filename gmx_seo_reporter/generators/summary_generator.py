@@ -5,10 +5,32 @@ Executive Summaryを自動生成するモジュール
 
 from typing import Dict, List
 
+import pandas as pd
+
+from gmx_seo_reporter.analyzers.anomaly_detector import GmxAnomalyDetector
+
 
 class GmxSummaryGenerator:
     """サマリー生成クラス"""
     
+    # 推奨アクションに表示する異常値の件数
+    MAX_ANOMALY_ITEMS = 5
+    
+    # 推奨アクションに表示するカニバリゼーションの件数
+    MAX_CANNIBALIZATION_ITEMS = 3
+    
+    # 異常値の表示名
+    DIMENSION_LABELS = {
+        'query': 'クエリ',
+        'page': 'ページ',
+        'sessionDefaultChannelGroup': 'チャネル'
+    }
+    METRIC_LABELS = {
+        'clicks': 'クリック数',
+        'impressions': '表示回数',
+        'sessions': 'セッション数'
+    }
+    
     @staticmethod
     def generate_executive_summary(
         gsc_analysis: Dict,
@@ -96,6 +118,11 @@ class GmxSummaryGenerator:
             f"(前週比 {position_data['change_pct']:+.1f}%)"
         )
         
+        # 複数週の週平均との比較
+        parts.extend(GmxSummaryGenerator._generate_rolling_trends(
+            gsc_analysis, 'query', 'clicks', "\n📅 **先週のクリック数と複数週の週平均**"
+        ))
+        
         # トップクエリ
         top_query = gsc_analysis['top_queries'].iloc[0]
         parts.append(
@@ -119,6 +146,20 @@ class GmxSummaryGenerator:
                 f"({int(declined_query['clicks_delta']):+d}クリック)"
             )
         
+        # 最もクリック数が減少したディレクトリ
+        page_rollup = gsc_analysis.get('page_rollup')
+        if page_rollup is not None:
+            # 子ノードのあるノードがディレクトリ ('/blog/' のようにページを兼ねるものを含む)
+            directories = page_rollup[(page_rollup['children'] > 0) & (page_rollup['depth'] > 0)]
+            if len(directories) > 0:
+                directory = directories.loc[directories['clicks_delta'].idxmin()]
+                if directory['clicks_delta'] < 0:
+                    parts.append(
+                        f"📂 **最も減少したディレクトリ**: {directory['node']} "
+                        f"({int(directory['clicks_delta']):+d}クリック, "
+                        f"前週比 {directory['clicks_change_pct']:+.1f}%, {directory['pages']}ページ)"
+                    )
+        
         return "\n".join(parts)
     
     @staticmethod
@@ -170,8 +211,35 @@ class GmxSummaryGenerator:
                 f"(前週比 {organic_change:+.1f}%)"
             )
         
+        # 複数週の週平均との比較
+        parts.extend(GmxSummaryGenerator._generate_rolling_trends(
+            ga4_analysis, 'sessionDefaultChannelGroup', 'sessions',
+            "\n📅 **先週のセッション数と複数週の週平均**"
+        ))
+        
         return "\n".join(parts)
     
+    @staticmethod
+    def _generate_rolling_trends(analysis: Dict, key: str, metric: str, title: str) -> List[str]:
+        """先週の値と複数週(4週/13週/52週など)の週平均の比較を生成"""
+        trends = analysis.get('rolling_trends', {}).get(key)
+        if not trends:
+            return []
+        
+        lines = []
+        for window, df in sorted(trends.items()):
+            latest = df[f'{metric}_latest'].sum()
+            # 記録した週数が窓に満たない間はNaNのため表示しない
+            mean = df[f'{metric}_{window}w_mean'].sum(min_count=1)
+            if pd.isna(mean) or mean == 0:
+                continue
+            change_pct = (latest - mean) / mean * 100
+            lines.append(
+                f"   - 直近{window}週の週平均: {mean:,.0f} (先週 {latest:,.0f}, {change_pct:+.1f}%)"
+            )
+        
+        return [title] + lines if lines else []
+    
     @staticmethod
     def _generate_action_items(gsc_analysis: Dict, ga4_analysis: Dict) -> str:
         """改善アクションを生成"""
@@ -223,6 +291,19 @@ class GmxSummaryGenerator:
                 "全チャネルのパフォーマンスを確認し、問題を特定してください。"
             )
         
+        # 複数のページが競合しているクエリ
+        cannibalization = gsc_analysis.get('cannibalization')
+        if cannibalization is not None:
+            for row in cannibalization.head(GmxSummaryGenerator.MAX_CANNIBALIZATION_ITEMS).itertuples():
+                actions.append(
+                    f"🟠 **カニバリゼーション**: 「{row.query}」で{row.competing_pages}ページが競合しています "
+                    f"(推定損失 {row.lost_clicks:,.0f}クリック)。"
+                    f"主ページ {row.primary_page} への統合や内部リンクの整理を検討してください。"
+                )
+        
+        # 過去の週と比べて外れ値になったクエリ・ページ・チャネル
+        actions.extend(GmxSummaryGenerator._generate_anomaly_items(gsc_analysis, ga4_analysis))
+        
         if not actions:
             actions.append(
                 "✅ **安定**: 全体的に安定したパフォーマンスを維持しています。"
@@ -232,3 +313,28 @@ class GmxSummaryGenerator:
         parts.extend(actions)
         
         return "\n\n".join(parts)
+    
+    @staticmethod
+    def _generate_anomaly_items(gsc_analysis: Dict, ga4_analysis: Dict) -> List[str]:
+        """異常検知の結果からアクションを生成 (Zスコアの絶対値が大きい順)"""
+        frames = [
+            analysis['anomalies'] for analysis in (gsc_analysis, ga4_analysis)
+            if len(analysis.get('anomalies', [])) > 0
+        ]
+        if not frames:
+            return []
+        
+        anomalies = GmxAnomalyDetector.combine(frames).head(GmxSummaryGenerator.MAX_ANOMALY_ITEMS)
+        
+        items = []
+        for row in anomalies.itertuples(index=False):
+            dimension = GmxSummaryGenerator.DIMENSION_LABELS.get(row.dimension, row.dimension)
+            metric = GmxSummaryGenerator.METRIC_LABELS.get(row.metric, row.metric)
+            emoji = "📈" if row.z_score > 0 else "📉"
+            direction = "急増" if row.z_score > 0 else "急減"
+            items.append(
+                f"{emoji} **異常検知**: {dimension}「{row.key}」の{metric}が{direction}しています "
+                f"({row.latest:,.0f} / 過去の中央値 {row.baseline:,.0f}, "
+                f"{row.change_pct:+.1f}%, Z={row.z_score:+.1f})。"
+            )
+        return items
@@ -0,0 +1,129 @@
+"""
+Frame Compactor
+取得したデータのカラムを、値を変えずにより小さい型へ変換するモジュール
+"""
+
+import sys
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+class GmxFrameCompactor:
+    """
+    データ型の縮小クラス
+
+    - 文字列のディメンション: 重複が多い場合はカテゴリ型、少ない場合は
+      同じ文字列を1つのオブジェクトに共有(sys.intern)したobject型
+    - 整数のメトリクス: int32に収まる場合はint32
+    - 小数のメトリクス: float32に変換しても値が変わらない(または float_rtol 以内の)場合はfloat32
+    """
+
+    def __init__(self, category_max_ratio: float = 0.5, float_rtol: float = 0.0):
+        """
+        初期化
+
+        Args:
+            category_max_ratio: カテゴリ型にする「ユニーク数 / 行数」の上限
+            float_rtol: float32への変換で許容する相対誤差 (0の場合は値が変わらない場合のみ)
+        """
+        self.category_max_ratio = category_max_ratio
+        self.float_rtol = float_rtol
+
+    def compact(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        データ型を縮小
+
+        Args:
+            df: データフレーム
+
+        Returns:
+            pandas.DataFrame: 型を縮小したデータ (値は変わらない)
+        """
+        columns = {}
+        for column in df.columns:
+            series = df[column]
+            kind = series.dtype.kind
+            if kind in 'iu':
+                columns[column] = self._compact_int(series)
+            elif kind == 'f':
+                columns[column] = self._compact_float(series)
+            elif series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+                columns[column] = self._compact_strings(series)
+            else:
+                columns[column] = series
+        return pd.DataFrame(columns, index=df.index)
+
+    @staticmethod
+    def _compact_int(series: pd.Series) -> pd.Series:
+        """int32に収まる場合はint32に変換"""
+        info = np.iinfo(np.int32)
+        if len(series) == 0 or (series.min() >= info.min and series.max() <= info.max):
+            return series.astype(np.int32)
+        return series
+
+    def _compact_float(self, series: pd.Series) -> pd.Series:
+        """float32でも値が変わらない(許容誤差以内の)場合はfloat32に変換"""
+        values = series.to_numpy(dtype=np.float64)
+        restored = values.astype(np.float32).astype(np.float64)
+        if np.allclose(restored, values, rtol=self.float_rtol, atol=0, equal_nan=True):
+            return series.astype(np.float32)
+        return series
+
+    def _compact_strings(self, series: pd.Series) -> pd.Series:
+        """カテゴリ型、または同じ文字列を共有するobject型に変換"""
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+        if len(series) > 0 and len(uniques) / len(series) <= self.category_max_ratio:
+            return series.astype('category')
+
+        interned = np.array(
+            [sys.intern(value) if isinstance(value, str) else value for value in uniques],
+            dtype=object
+        )
+        return pd.Series(interned[codes], index=series.index, dtype=object, name=series.name)
+
+    @staticmethod
+    def memory_usage(df: pd.DataFrame) -> int:
+        """
+        データのメモリ使用量(バイト)
+
+        object型の文字列は、共有されているオブジェクトを1回だけ数える
+        (DataFrame.memory_usage(deep=True) は行ごとに数えるため縮小の効果が見えない)。
+
+        Args:
+            df: データフレーム
+
+        Returns:
+            int: メモリ使用量(バイト)
+        """
+        total = int(df.index.memory_usage(deep=True))
+        for column in df.columns:
+            series = df[column]
+            if series.dtype == object:
+                values = series.to_numpy()
+                unique_objects = {id(value): value for value in values}
+                total += values.nbytes + sum(sys.getsizeof(v) for v in unique_objects.values())
+            else:
+                total += int(series.memory_usage(index=False, deep=True))
+        return total
+
+    def compact_frames(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
+        """
+        複数のデータの型を縮小し、メモリ使用量を比較
+
+        Args:
+            frames: {名前: データフレーム}
+
+        Returns:
+            Dict: {名前: {'df': 縮小したデータ, 'before': 縮小前のバイト数, 'after': 縮小後のバイト数}}
+        """
+        result = {}
+        for name, df in frames.items():
+            compacted = self.compact(df)
+            result[name] = {
+                'df': compacted,
+                'before': self.memory_usage(df),
+                'after': self.memory_usage(compacted)
+            }
+        return result
@@ -0,0 +1,193 @@
+"""
+Raw Data Store
+GSC/GA4から取得した生データをローカルに保存するモジュール
+"""
+
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from datetime import date, datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+
+class GmxRawDataStore:
+    """
+    取得済みデータのローカルキャッシュ(SQLite)
+    
+    (ソース, サイト/プロパティ, ディメンションセット, パーティション) を
+    キーとしてDataFrameを保存する。パーティションはGSCでは日付、
+    GA4では期間 ('開始日_終了日') を使用する。
+    データが確定するまでの期間(settle_days)内に取得したパーティションは
+    未確定として保存し、次回の実行で再取得する。
+    """
+    
+    def __init__(self, db_path: str, settle_days: int = 3):
+        """
+        初期化
+        
+        Args:
+            db_path: SQLiteファイルのパス
+            settle_days: データが確定するまでの日数
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.settle_days = settle_days
+        self._lock = threading.Lock()
+        
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS partitions (
+                    source TEXT NOT NULL,
+                    property TEXT NOT NULL,
+                    dimension_key TEXT NOT NULL,
+                    partition TEXT NOT NULL,
+                    is_final INTEGER NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    PRIMARY KEY (source, property, dimension_key, partition)
+                )
+                """
+            )
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        SQLiteに接続 (スレッドごとに接続を分けるため毎回作成)
+        
+        sqlite3の接続のwithはコミット/ロールバックのみで接続を閉じないため、
+        コミットした後に接続を閉じる。
+        """
+        with closing(sqlite3.connect(str(self.db_path))) as conn:
+            with conn:
+                yield conn
+    
+    def is_final(self, day: date) -> bool:
+        """
+        指定日のデータが確定済みかどうか
+        
+        Args:
+            day: 対象日
+            
+        Returns:
+            bool: settle_daysより前の日付ならTrue
+        """
+        if isinstance(day, datetime):
+            day = day.date()
+        return day <= date.today() - timedelta(days=self.settle_days)
+    
+    def get(
+        self,
+        source: str,
+        property_id: str,
+        dimension_key: str,
+        partition: str
+    ) -> Optional[pd.DataFrame]:
+        """
+        確定済みのパーティションを取得
+        
+        Args:
+            source: データソース ('gsc' / 'ga4')
+            property_id: サイトURLまたはGA4プロパティID
+            dimension_key: ディメンション(とメトリクス)の組み合わせを表すキー
+            partition: パーティション (日付または期間)
+            
+        Returns:
+            pandas.DataFrame: 保存済みのデータ (未保存・未確定の場合はNone)
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT payload FROM partitions
+                WHERE source = ? AND property = ? AND dimension_key = ?
+                  AND partition = ? AND is_final = 1
+                """,
+                (source, property_id, dimension_key, partition)
+            ).fetchone()
+        
+        if row is None:
+            return None
+        
+        return pd.read_json(
+            StringIO(row[0]),
+            orient='split',
+            dtype=False,
+            convert_dates=False
+        )
+    
+    def put(
+        self,
+        source: str,
+        property_id: str,
+        dimension_key: str,
+        partition: str,
+        df: pd.DataFrame,
+        is_final: bool
+    ) -> None:
+        """
+        パーティションを保存 (既存のものは上書き)
+        
+        Args:
+            source: データソース ('gsc' / 'ga4')
+            property_id: サイトURLまたはGA4プロパティID
+            dimension_key: ディメンション(とメトリクス)の組み合わせを表すキー
+            partition: パーティション (日付または期間)
+            df: 保存するデータ
+            is_final: 確定済みのデータかどうか
+        """
+        payload = df.to_json(orient='split', index=False)
+        
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO partitions
+                    (source, property, dimension_key, partition,
+                     is_final, fetched_at, payload)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    source,
+                    property_id,
+                    dimension_key,
+                    partition,
+                    int(is_final),
+                    datetime.now().isoformat(timespec='seconds'),
+                    payload
+                )
+            )
+    
+    def missing_partitions(
+        self,
+        source: str,
+        property_id: str,
+        dimension_key: str,
+        partitions: List[str]
+    ) -> List[str]:
+        """
+        未保存または未確定のパーティションを取得
+        
+        Args:
+            source: データソース ('gsc' / 'ga4')
+            property_id: サイトURLまたはGA4プロパティID
+            dimension_key: ディメンション(とメトリクス)の組み合わせを表すキー
+            partitions: 確認するパーティションのリスト
+            
+        Returns:
+            List[str]: 取得が必要なパーティション
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT partition FROM partitions
+                WHERE source = ? AND property = ? AND dimension_key = ?
+                  AND is_final = 1
+                """,
+                (source, property_id, dimension_key)
+            ).fetchall()
+        
+        cached = {row[0] for row in rows}
+        return [p for p in partitions if p not in cached]
@@ -0,0 +1,176 @@
+"""
+Render Cache
+生成したグラフのファイルを、入力データと設定のハッシュをキーとしてローカルに保存するモジュール
+"""
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class GmxRenderCache:
+    """
+    グラフのレンダリング結果のキャッシュ
+
+    グラフの入力データと可視化設定から計算したハッシュをファイル名として
+    生成済みのファイルを保存する。再実行やバックフィルで同じデータが渡された場合は、
+    再生成せずに保存済みのファイルを出力先へハードリンク(できない場合はコピー)する。
+    合計サイズが上限を超えた場合は、最後に使われた日時(mtime)が古いものから削除する(LRU)。
+    """
+
+    # キーの形式を変更した場合に古いキャッシュを使わないためのバージョン
+    VERSION = 1
+
+    def __init__(self, cache_dir: str, max_bytes: int = 50 * 1024 * 1024):
+        """
+        初期化
+
+        Args:
+            cache_dir: キャッシュを保存するディレクトリ
+            max_bytes: キャッシュの合計サイズの上限(バイト)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def make_key(cls, *parts: Any) -> str:
+        """
+        入力データからキャッシュキーを作成
+
+        Args:
+            parts: キーに含める値 (DataFrame/Series/ndarray/dict/list/スカラー)
+
+        Returns:
+            str: SHA-256のハッシュ(16進数)
+        """
+        hasher = hashlib.sha256(f'v{cls.VERSION}'.encode())
+        for part in parts:
+            cls._update(hasher, part)
+        return hasher.hexdigest()
+
+    @classmethod
+    def _update(cls, hasher, value: Any) -> None:
+        """値の型と内容をハッシュに追加"""
+        if isinstance(value, pd.DataFrame):
+            hasher.update(b'D')
+            cls._update(hasher, [str(c) for c in value.columns])
+            cls._update(hasher, [str(t) for t in value.dtypes])
+            hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        elif isinstance(value, pd.Series):
+            hasher.update(b'S')
+            cls._update(hasher, [str(value.name), str(value.dtype)])
+            hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        elif isinstance(value, np.ndarray):
+            hasher.update(b'A' + str(value.dtype).encode() + str(value.shape).encode())
+            hasher.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, dict):
+            hasher.update(b'{')
+            for key in sorted(value, key=str):
+                cls._update(hasher, str(key))
+                cls._update(hasher, value[key])
+            hasher.update(b'}')
+        elif isinstance(value, (list, tuple)):
+            hasher.update(b'[')
+            for item in value:
+                cls._update(hasher, item)
+            hasher.update(b']')
+        else:
+            # numpyのスカラーはPythonの値に変換し、同じ値が同じキーになるようにする
+            if isinstance(value, np.generic):
+                value = value.item()
+            hasher.update(f'{type(value).__name__}:{value!r};'.encode())
+
+    def _entry_path(self, key: str, suffix: str) -> Path:
+        """キャッシュファイルのパス"""
+        return self.cache_dir / f'{key}{suffix}'
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """
+        キャッシュにあれば出力先にハードリンク(できない場合はコピー)
+
+        Args:
+            key: キャッシュキー
+            output_path: 出力先のパス
+
+        Returns:
+            bool: キャッシュにあった場合はTrue
+        """
+        output_path = Path(output_path)
+        entry = self._entry_path(key, output_path.suffix)
+        if not entry.exists():
+            return False
+
+        self.discard_output(output_path)
+        try:
+            os.link(entry, output_path)
+        except OSError:
+            shutil.copyfile(entry, output_path)
+
+        # LRUのため最後に使われた日時を更新
+        os.utime(entry)
+        return True
+
+    @staticmethod
+    def discard_output(output_path: str) -> None:
+        """
+        出力先の既存ファイルを削除
+
+        出力先がキャッシュへのハードリンクの場合に、上書きでキャッシュの内容が
+        変わらないよう、再生成の前に呼び出す。
+
+        Args:
+            output_path: 出力先のパス
+        """
+        try:
+            os.unlink(output_path)
+        except FileNotFoundError:
+            pass
+
+    def store(self, key: str, output_path: str) -> None:
+        """
+        生成したファイルをキャッシュに保存し、上限を超えた分を削除
+
+        Args:
+            key: キャッシュキー
+            output_path: 生成したファイルのパス
+        """
+        output_path = Path(output_path)
+        entry = self._entry_path(key, output_path.suffix)
+        tmp_path = entry.with_name(f'{entry.name}.{os.getpid()}.tmp')
+        shutil.copyfile(output_path, tmp_path)
+        os.replace(tmp_path, entry)
+        self.evict()
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        最後に使われた日時が古いものから、合計サイズが上限以下になるまで削除
+
+        Args:
+            max_bytes: 合計サイズの上限 (省略時は初期化時の値)
+
+        Returns:
+            int: 削除したファイル数
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = [
+            (stat.st_mtime, stat.st_size, path)
+            for path in self.cache_dir.iterdir()
+            if path.is_file() and not path.name.endswith('.tmp')
+            for stat in [path.stat()]
+        ]
+        total = sum(size for _, size, _ in entries)
+
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,145 @@
+"""
+Font Resolver
+グラフで使う日本語(CJK)フォントを決定し、結果をキャッシュするモジュール
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import matplotlib
+from matplotlib import font_manager
+
+
+class GmxFontResolver:
+    """
+    日本語フォントの決定クラス
+
+    設定の font_family、候補フォントの順に、インストールされている最初のフォントを選ぶ。
+    matplotlibにフォールバックの一覧をそのまま渡すと、プロセスごとの最初の描画で
+    見つからないフォントを順に探すため、選んだフォントだけを font.sans-serif に設定する。
+    選んだ結果はmatplotlibのフォントキャッシュ(fontlist-*.json)と同じディレクトリに保存し、
+    フォントキャッシュが再作成されるまで再利用する。
+    """
+
+    # 日本語フォントの候補 (優先順)
+    CJK_FONTS = [
+        'Hiragino Sans', 'Yu Gothic', 'Meiryo', 'Takao', 'IPAexGothic', 'IPAPGothic', 'Noto Sans CJK JP'
+    ]
+
+    # プロセス内で決定済みのフォント {候補の組: フォント名}
+    _resolved = {}
+
+    @classmethod
+    def resolve(cls, preferred: Optional[str] = None) -> Optional[str]:
+        """
+        使用する日本語フォントを決定
+
+        Args:
+            preferred: 優先するフォント名 (設定の font_family)
+
+        Returns:
+            Optional[str]: フォント名 (候補がインストールされていない場合はNone)
+        """
+        candidates = cls._candidates(preferred)
+        key = tuple(candidates)
+        if key in cls._resolved:
+            return cls._resolved[key]
+
+        cache_path = cls._cache_path()
+        font_cache_mtime = cls._font_cache_mtime()
+        family = cls._load_choice(cache_path, candidates, font_cache_mtime)
+        if family is None:
+            installed = {}
+            for font in font_manager.fontManager.ttflist:
+                installed.setdefault(font.name, font.fname)
+            family = next((name for name in candidates if name in installed), None)
+            cls._save_choice(
+                cache_path,
+                candidates,
+                font_cache_mtime,
+                family,
+                installed.get(family)
+            )
+
+        cls._resolved[key] = family
+        return family
+
+    @classmethod
+    def apply(cls, preferred: Optional[str] = None) -> Optional[str]:
+        """
+        決定した日本語フォントをmatplotlibの既定のフォントに設定
+
+        Args:
+            preferred: 優先するフォント名 (設定の font_family)
+
+        Returns:
+            Optional[str]: 設定したフォント名 (候補がない場合はNoneで、設定は変更しない)
+        """
+        family = cls.resolve(preferred)
+        if family is not None:
+            matplotlib.rcParams['font.family'] = 'sans-serif'
+            matplotlib.rcParams['font.sans-serif'] = [family, 'DejaVu Sans']
+        return family
+
+    @classmethod
+    def _candidates(cls, preferred: Optional[str]) -> List[str]:
+        """候補フォントの一覧 (優先するフォントを先頭に追加)"""
+        if preferred:
+            return list(dict.fromkeys([preferred] + cls.CJK_FONTS))
+        return list(cls.CJK_FONTS)
+
+    @staticmethod
+    def _cache_path() -> Path:
+        """決定したフォントを保存するファイルのパス (フォントキャッシュと同じディレクトリ)"""
+        return Path(matplotlib.get_cachedir()) / f'gmx_cjk_font-v{font_manager.FontManager.__version__}.json'
+
+    @staticmethod
+    def _font_cache_mtime() -> Optional[float]:
+        """matplotlibのフォントキャッシュの更新日時 (フォントの再検索を検知するため)"""
+        path = Path(matplotlib.get_cachedir()) / f'fontlist-v{font_manager.FontManager.__version__}.json'
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return None
+
+    @staticmethod
+    def _load_choice(cache_path: Path, candidates: List[str], font_cache_mtime: Optional[float]) -> Optional[str]:
+        """保存済みの決定結果を読み込む (候補・フォントキャッシュが同じで、フォントファイルがある場合のみ)"""
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if saved.get('candidates') != candidates or saved.get('font_cache_mtime') != font_cache_mtime:
+            return None
+        if not saved.get('family') or not saved.get('path') or not os.path.exists(saved['path']):
+            return None
+        return saved['family']
+
+    @staticmethod
+    def _save_choice(
+        cache_path: Path,
+        candidates: List[str],
+        font_cache_mtime: Optional[float],
+        family: Optional[str],
+        path: Optional[str]
+    ) -> None:
+        """決定結果を保存 (保存できない場合は次回も検索する)"""
+        if family is None:
+            return
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'candidates': candidates,
+                    'font_cache_mtime': font_cache_mtime,
+                    'family': family,
+                    'path': path
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
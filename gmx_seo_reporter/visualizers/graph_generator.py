@@ -5,35 +5,56 @@ Graph Generator
 
 import os
 from datetime import datetime
+from io import BytesIO
 from typing import Dict, List, Optional
 
 import matplotlib
-matplotlib.use('Agg')  # GUIなし環境用
-import matplotlib.pyplot as plt
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sns
 import pandas as pd
+from PIL import Image
 
-# 日本語フォント設定
-plt.rcParams['font.sans-serif'] = ['Hiragino Sans', 'Yu Gothic', 'Meirio', 'Takao', 'IPAexGothic', 'IPAPGothic', 'Noto Sans CJK JP']
-plt.rcParams['axes.unicode_minus'] = False
+from gmx_seo_reporter.storage.render_cache import GmxRenderCache
+from gmx_seo_reporter.visualizers.font_resolver import GmxFontResolver
+
+# マイナス記号を日本語フォントでも表示できるようにする (日本語フォントはGmxFontResolverで設定)
+matplotlib.rcParams['axes.unicode_minus'] = False
+
+# SVG出力の設定 (要素IDを固定して再実行で差分が出ないようにし、文字は使用するグリフのみパスとして埋め込む)
+matplotlib.rcParams['svg.hashsalt'] = 'gmx-seo-reporter'
+matplotlib.rcParams['svg.fonttype'] = 'path'
 
 
 class GmxReportVisualizer:
     """レポート用グラフ生成クラス"""
     
-    def __init__(self, config: Dict = None):
+    # render/render_batchで指定できるグラフの種類と生成メソッド
+    GRAPH_TYPES = {
+        'clicks_trend': 'create_clicks_trend_graph',
+        'ctr_comparison': 'create_ctr_comparison_graph',
+        'channel_sessions': 'create_channel_sessions_graph',
+        'top_queries': 'create_top_queries_graph'
+    }
+    
+    def __init__(self, config: Dict = None, render_cache: Optional[GmxRenderCache] = None):
         """
         初期化
         
         Args:
             config: ビジュアライゼーション設定
+            render_cache: render_batchで使うグラフのキャッシュ (Noneの場合は毎回生成)
         """
         self.config = config or {}
+        self.render_cache = render_cache
+        self.cache_hits = 0
         
-        # スタイル設定
-        style = self.config.get('graph_style', 'seaborn')
-        if style == 'seaborn':
-            sns.set_style("whitegrid")
+        # 日本語フォント (設定のfont_family、候補フォントの順に決定し、結果はキャッシュする)
+        self.font_family = GmxFontResolver.apply(self.config.get('font_family'))
+        
+        # スタイル設定 (グローバルなrcParamsは変更せず、図ごとに適用する)
+        self.style = self._style_template(self.config.get('graph_style', 'seaborn'))
         
         # カラースキーム
         self.colors = self.config.get('color_scheme', {
@@ -47,6 +68,199 @@ class GmxReportVisualizer:
         # 図のサイズとDPI
         self.figure_size = self.config.get('figure_size', [12, 6])
         self.dpi = self.config.get('dpi', 100)
+        
+        # 出力形式 ('png' / 'svg') と、PNGを減色する色数 (0の場合はフルカラー)
+        self.output_format = self.config.get('output_format', 'png')
+        if self.output_format not in ('png', 'svg'):
+            raise ValueError(f"visualization.output_format は 'png' か 'svg' を指定してください: {self.output_format}")
+        self.png_colors = self.config.get('png_colors', 256)
+    
+    @staticmethod
+    def _style_template(name: str) -> Dict:
+        """
+        グラフスタイルのテンプレートを作成
+        
+        Args:
+            name: graph_style ('seaborn' の場合はwhitegrid、それ以外はmatplotlibの既定)
+            
+        Returns:
+            Dict: _new_figureで各図に適用するスタイル
+        """
+        if name != 'seaborn':
+            return {}
+        
+        # フォント以外のwhitegridの設定 (日本語フォント設定を上書きしないため)
+        rc = sns.axes_style('whitegrid')
+        return {
+            'figure_facecolor': rc['figure.facecolor'],
+            'axes_facecolor': rc['axes.facecolor'],
+            'edge_color': rc['axes.edgecolor'],
+            'text_color': rc['text.color'],
+            'label_color': rc['axes.labelcolor'],
+            'tick_color': rc['xtick.color'],
+            'show_ticks': rc['xtick.bottom'],
+            'grid': {'color': rc['grid.color'], 'linestyle': rc['grid.linestyle']} if rc['axes.grid'] else None
+        }
+    
+    def _new_figure(self, figsize: Optional[List[float]] = None):
+        """
+        pyplotを使わずにAggキャンバスの図を作成し、スタイルを適用
+        
+        pyplotの図の管理を経由しないため、スレッドから並列に呼び出しても安全で、
+        plt.closeも不要 (参照がなくなれば解放される)。
+        
+        Args:
+            figsize: 図のサイズ (省略時は設定のfigure_size)
+            
+        Returns:
+            Tuple[Figure, Axes]: 図と軸
+        """
+        fig = Figure(figsize=figsize or self.figure_size, dpi=self.dpi)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        self._apply_style(ax)
+        return fig, ax
+    
+    def _apply_style(self, ax: Axes) -> None:
+        """スタイルのテンプレートを軸に適用"""
+        style = self.style
+        if not style:
+            return
+        
+        ax.figure.set_facecolor(style['figure_facecolor'])
+        ax.set_facecolor(style['axes_facecolor'])
+        for spine in ax.spines.values():
+            spine.set_edgecolor(style['edge_color'])
+        ax.tick_params(
+            colors=style['tick_color'],
+            labelcolor=style['text_color'],
+            bottom=style['show_ticks'],
+            left=style['show_ticks']
+        )
+        ax.xaxis.label.set_color(style['label_color'])
+        ax.yaxis.label.set_color(style['label_color'])
+        ax.title.set_color(style['text_color'])
+        ax.set_axisbelow(True)
+        if style['grid']:
+            ax.grid(True, **style['grid'])
+    
+    @property
+    def file_extension(self) -> str:
+        """出力ファイルの拡張子 ('.png' / '.svg')"""
+        return f'.{self.output_format}'
+    
+    def _save(self, fig: Figure, output_path: str) -> str:
+        """
+        図をファイルに保存
+        
+        同じ図からは常に同じバイト列になるよう、作成日時やソフトウェアの
+        メタデータは埋め込まない。PNGは減色してパレット形式で圧縮する。
+        
+        Args:
+            fig: 図
+            output_path: 出力パス
+            
+        Returns:
+            str: 保存したファイルパス
+        """
+        fig.tight_layout()
+        if self.output_format == 'svg':
+            fig.savefig(
+                output_path,
+                format='svg',
+                bbox_inches='tight',
+                metadata={'Creator': None, 'Date': None}
+            )
+            return output_path
+        
+        buffer = BytesIO()
+        fig.savefig(buffer, format='png', dpi=self.dpi, bbox_inches='tight', metadata={'Software': None})
+        self._write_png(buffer, output_path)
+        return output_path
+    
+    def _write_png(self, buffer: BytesIO, output_path: str) -> None:
+        """PNGを減色(パレット形式)し、最大の圧縮率で保存"""
+        buffer.seek(0)
+        with Image.open(buffer) as image:
+            if self.png_colors:
+                if image.mode == 'RGBA' and image.getextrema()[3] == (255, 255):
+                    # 背景が不透明の場合はアルファチャンネルを除いて減色する
+                    image = image.convert('RGB')
+                method = Image.Quantize.MEDIANCUT if image.mode == 'RGB' else Image.Quantize.FASTOCTREE
+                image = image.quantize(colors=self.png_colors, method=method, dither=Image.Dither.NONE)
+            image.save(output_path, format='PNG', optimize=True)
+    
+    def render(self, spec: Dict) -> str:
+        """
+        グラフ仕様からグラフを1つ生成
+        
+        Args:
+            spec: {'type': GRAPH_TYPESのキー, 生成メソッドの引数 (output_pathなど)}
+            
+        Returns:
+            str: 保存したファイルパス
+        """
+        kwargs = dict(spec)
+        graph_type = kwargs.pop('type')
+        if graph_type not in self.GRAPH_TYPES:
+            raise ValueError(f"未対応のグラフの種類です: {graph_type}")
+        return getattr(self, self.GRAPH_TYPES[graph_type])(**kwargs)
+    
+    def render_batch(self, specs: List[Dict]) -> List[str]:
+        """
+        複数のグラフを生成
+        
+        render_cacheがある場合は、キャッシュにないグラフのみ生成する。
+        
+        Args:
+            specs: グラフ仕様のリスト (renderを参照)
+            
+        Returns:
+            List[str]: 保存したファイルパスのリスト (specsと同じ順)
+        """
+        paths = [None] * len(specs)
+        for i, spec in enumerate(specs):
+            if self.render_cache is None:
+                paths[i] = self.render(spec)
+                continue
+            
+            # 同じデータ・設定で生成済みのグラフはキャッシュから出力
+            key = self.cache_key(spec)
+            if self.render_cache.fetch(key, spec['output_path']):
+                paths[i] = spec['output_path']
+                self.cache_hits += 1
+            else:
+                self.render_cache.discard_output(spec['output_path'])
+                paths[i] = self.render(spec)
+                self.render_cache.store(key, paths[i])
+        
+        return paths
+    
+    def cache_key(self, spec: Dict) -> str:
+        """
+        グラフ仕様のキャッシュキーを作成
+        
+        出力先以外のグラフ仕様(種類と入力データ)と、出力に影響する設定
+        (色・サイズ・DPI・スタイル・出力形式・フォント・matplotlibのバージョン)から計算する。
+        
+        Args:
+            spec: グラフ仕様 (renderを参照)
+            
+        Returns:
+            str: キャッシュキー
+        """
+        inputs = {name: value for name, value in spec.items() if name != 'output_path'}
+        return GmxRenderCache.make_key(
+            inputs,
+            self.colors,
+            list(self.figure_size),
+            self.dpi,
+            self.style,
+            self.output_format,
+            self.png_colors,
+            list(matplotlib.rcParams['font.sans-serif']),
+            matplotlib.__version__
+        )
     
     def create_clicks_trend_graph(
         self,
@@ -63,7 +277,7 @@ class GmxReportVisualizer:
         Returns:
             str: 保存したファイルパス
         """
-        fig, ax = plt.subplots(figsize=self.figure_size, dpi=self.dpi)
+        fig, ax = self._new_figure()
         
         # データ準備
         weeks = ['先々週', '先週']
@@ -107,11 +321,7 @@ class GmxReportVisualizer:
         ax.set_title('検索クリック数の推移', fontsize=14, fontweight='bold', pad=20)
         ax.grid(axis='y', alpha=0.3)
         
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=self.dpi, bbox_inches='tight')
-        plt.close()
-        
-        return output_path
+        return self._save(fig, output_path)
     
     def create_ctr_comparison_graph(
         self,
@@ -128,7 +338,7 @@ class GmxReportVisualizer:
         Returns:
             str: 保存したファイルパス
         """
-        fig, ax = plt.subplots(figsize=self.figure_size, dpi=self.dpi)
+        fig, ax = self._new_figure()
         
         # データ準備
         weeks = ['先々週', '先週']
@@ -172,11 +382,7 @@ class GmxReportVisualizer:
         ax.set_title('クリック率(CTR)の推移', fontsize=14, fontweight='bold', pad=20)
         ax.grid(axis='y', alpha=0.3)
         
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=self.dpi, bbox_inches='tight')
-        plt.close()
-        
-        return output_path
+        return self._save(fig, output_path)
     
     def create_channel_sessions_graph(
         self,
@@ -193,7 +399,7 @@ class GmxReportVisualizer:
         Returns:
             str: 保存したファイルパス
         """
-        fig, ax = plt.subplots(figsize=self.figure_size, dpi=self.dpi)
+        fig, ax = self._new_figure()
         
         wow_df = ga4_analysis['wow_comparison']
         
@@ -232,11 +438,7 @@ class GmxReportVisualizer:
         ax.legend()
         ax.grid(axis='y', alpha=0.3)
         
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=self.dpi, bbox_inches='tight')
-        plt.close()
-        
-        return output_path
+        return self._save(fig, output_path)
     
     def create_top_queries_graph(
         self,
@@ -255,7 +457,7 @@ class GmxReportVisualizer:
         Returns:
             str: 保存したファイルパス
         """
-        fig, ax = plt.subplots(figsize=self.figure_size, dpi=self.dpi)
+        fig, ax = self._new_figure()
         
         # 上位N件を取得
         data = top_queries.head(n).copy()
@@ -287,8 +489,4 @@ class GmxReportVisualizer:
         ax.set_title(f'トップ{n}検索クエリ', fontsize=14, fontweight='bold', pad=20)
         ax.grid(axis='x', alpha=0.3)
         
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=self.dpi, bbox_inches='tight')
-        plt.close()
-        
-        return output_path
+        return self._save(fig, output_path)
@@ -6,7 +6,7 @@ GearMix Weekly SEO Report Generator
 
 import os
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import yaml
@@ -17,11 +17,20 @@ sys.path.insert(0, str(project_root))
 
 from gmx_seo_reporter.clients.gsc_client import GmxGscClient
 from gmx_seo_reporter.clients.ga4_client import GmxGa4Client
+from gmx_seo_reporter.clients.async_fetcher import GmxAsyncFetcher
+from gmx_seo_reporter.clients.google_auth import GmxGoogleAuth
+from gmx_seo_reporter.clients.rate_limiter import GmxRateLimiter
 from gmx_seo_reporter.analyzers.data_analyzer import GmxDataAnalyzer
+from gmx_seo_reporter.analyzers.rolling_analyzer import GmxRollingAnalyzer
+from gmx_seo_reporter.analyzers.anomaly_detector import GmxAnomalyDetector
+from gmx_seo_reporter.analyzers.backends import get_analyzer_backend
 from gmx_seo_reporter.visualizers.graph_generator import GmxReportVisualizer
 from gmx_seo_reporter.generators.summary_generator import GmxSummaryGenerator
 from gmx_seo_reporter.generators.report_builder import GmxReportBuilder
 from gmx_seo_reporter.clients.drive_client import GmxDriveClient
+from gmx_seo_reporter.storage.raw_data_store import GmxRawDataStore
+from gmx_seo_reporter.storage.render_cache import GmxRenderCache
+from gmx_seo_reporter.storage.frame_compactor import GmxFrameCompactor
 
 
 def load_config(config_path: str = None) -> dict:
@@ -33,6 +42,126 @@ def load_config(config_path: str = None) -> dict:
         return yaml.safe_load(f)
 
 
+def create_rate_limiter(config: dict, api: str) -> GmxRateLimiter:
+    """設定ファイルからAPIごとのレート制限を作成"""
+    rate_limits = config.get('rate_limits', {})
+    return GmxRateLimiter(
+        qps=rate_limits.get(api, {}).get('qps', 10),
+        max_retries=rate_limits.get('max_retries', 5),
+        name=api
+    )
+
+
+def load_rolling_state(state_path: Path, key_column: str, metrics: list, windows: list, week_start):
+    """
+    移動集計の状態を読み込む
+    
+    履歴がない・引き継げない・週が抜けている場合は、黙って新規に開始せずに警告を表示する。
+    
+    Args:
+        state_path: 状態ファイルのパス
+        key_column: キーとなるカラム名
+        metrics: メトリクスのリスト
+        windows: 移動集計の週数のリスト
+        week_start: 追加する週の開始日 (月曜日)
+        
+    Returns:
+        GmxRollingAnalyzer: 移動集計クラス
+    """
+    if not state_path.exists():
+        print(f"   ⚠️ 移動集計の履歴がありません ({state_path.name})。この週から新規に記録します")
+        return GmxRollingAnalyzer(key_column, metrics, windows)
+    
+    try:
+        rolling = GmxRollingAnalyzer.load(state_path, key_column, metrics, windows)
+    except ValueError as e:
+        # 設定の変更などで引き継げない履歴は、上書きせずに退避してから新規に記録する
+        backup_path = state_path.with_name(state_path.name + '.bak')
+        state_path.replace(backup_path)
+        print(f"   ⚠️ {e}")
+        print(f"   ⚠️ 履歴を {backup_path.name} に退避し、この週から新規に記録します")
+        return GmxRollingAnalyzer(key_column, metrics, windows)
+    
+    if rolling.last_week is not None:
+        missing_weeks = (week_start - rolling.last_week).days // 7 - 1
+        if missing_weeks > 0:
+            print(
+                f"   ⚠️ {state_path.name}: {rolling.last_week} の後の{missing_weeks}週分の履歴がありません "
+                f"(データなしとして扱います)"
+            )
+    return rolling
+
+
+def update_completed_week_trends(config: dict, today: datetime, gsc_this_week, ga4_this_week) -> tuple:
+    """
+    直近の完了した週(レポートの「今週」)のデータで移動集計を更新する
+    
+    Args:
+        config: 設定
+        today: 実行日
+        gsc_this_week: 直近の完了した週のGSCデータ (get_weekly_data(week_offset=1))
+        ga4_this_week: 直近の完了した週のGA4データ
+        
+    Returns:
+        tuple: (週の開始日, 移動集計, 異常値) (update_rolling_trendsを参照)
+    """
+    # get_weekly_data(week_offset=1) と同じ週の月曜日
+    week_start = (today - timedelta(days=today.weekday() + 7)).date()
+    rolling_trends, anomalies = update_rolling_trends(config, week_start, {
+        ('gsc', 'query'): (gsc_this_week, GmxDataAnalyzer.GSC_METRICS),
+        ('gsc', 'page'): (gsc_this_week, GmxDataAnalyzer.GSC_METRICS),
+        ('ga4', 'sessionDefaultChannelGroup'): (ga4_this_week, config['ga4']['metrics'])
+    })
+    return week_start, rolling_trends, anomalies
+
+
+def update_rolling_trends(config: dict, week_start, frames: dict) -> tuple:
+    """
+    完了した週のデータで移動集計を更新して保存し、異常値を検出する
+    
+    Args:
+        config: 設定
+        week_start: 週の開始日 (月曜日)
+        frames: {(ソース, キー): (データ, メトリクスのリスト)}
+        
+    Returns:
+        tuple: ({(ソース, キー): {週数: 移動集計のDataFrame}},
+                {ソース: 異常値のDataFrame})
+    """
+    rolling_config = config.get('rolling', {})
+    anomaly_config = config.get('anomaly', {})
+    state_dir = project_root / rolling_config.get('path', 'state/rolling')
+    windows = rolling_config.get('windows', list(GmxRollingAnalyzer.DEFAULT_WINDOWS))
+    
+    trends = {}
+    anomalies = {}
+    for (source, key_column), (df, metrics) in frames.items():
+        state_path = state_dir / f"{source}_{key_column}.npz"
+        rolling = load_rolling_state(state_path, key_column, metrics, windows, week_start)
+        if key_column in df.columns:
+            rolling.update(week_start, df)
+            rolling.save(state_path)
+        trends[(source, key_column)] = rolling.get_all_trends()
+        
+        if anomaly_config.get('enabled', False):
+            anomaly_metrics = [
+                m for m in anomaly_config.get('metrics', {}).get(source, []) if m in metrics
+            ]
+            if not anomaly_metrics:
+                continue
+            detected = GmxAnomalyDetector.detect_from_rolling(
+                rolling,
+                anomaly_metrics,
+                threshold=anomaly_config.get('threshold', GmxAnomalyDetector.DEFAULT_THRESHOLD),
+                min_weeks=anomaly_config.get('min_weeks', 4),
+                min_volume=anomaly_config.get('min_volume', 0)
+            )
+            anomalies.setdefault(source, []).append(detected)
+    
+    anomalies = {source: GmxAnomalyDetector.combine(found) for source, found in anomalies.items()}
+    return trends, anomalies
+
+
 def main():
     """メイン処理"""
     print("=" * 60)
@@ -58,88 +187,171 @@ def main():
     print("🔍 STEP 1: データ取得")
     print("-" * 60)
     
-    # GSCクライアントを初期化
-    print("   Google Search Consoleに接続中...")
-    gsc_client = GmxGscClient()
+    # ローカルキャッシュを初期化
+    store = None
+    cache_config = config.get('cache', {})
+    if cache_config.get('enabled', False):
+        store = GmxRawDataStore(
+            project_root / cache_config.get('path', '.cache/gmx_raw_data.sqlite3'),
+            settle_days=cache_config.get('settle_days', 3)
+        )
+        print(f"   ローカルキャッシュを使用: {store.db_path}")
     
-    # GSCデータを取得
-    print("   GSCデータを取得中...")
-    gsc_this_week = gsc_client.get_this_week_data(
-        site_url=site_url,
-        dimensions=config['gsc']['dimensions'],
-        row_limit=config['gsc']['row_limit']
-    )
-    gsc_last_week = gsc_client.get_last_week_data(
-        site_url=site_url,
-        dimensions=config['gsc']['dimensions'],
-        row_limit=config['gsc']['row_limit']
-    )
-    print(f"   ✓ GSCデータ取得完了 (今週: {len(gsc_this_week)}件, 先週: {len(gsc_last_week)}件)")
+    # 認証情報とHTTPトランスポートを全クライアントで共有
+    fetch_config = config.get('fetch', {})
+    auth = GmxGoogleAuth(timeout=fetch_config.get('request_timeout_sec', 120))
     
-    # GA4クライアントを初期化
+    # APIクライアントを初期化
+    print("   Google Search Consoleに接続中...")
+    gsc_client = GmxGscClient(
+        store=store,
+        auth=auth,
+        rate_limiter=create_rate_limiter(config, 'gsc')
+    )
     print("   Google Analytics 4に接続中...")
-    ga4_client = GmxGa4Client()
+    ga4_client = GmxGa4Client(
+        store=store,
+        auth=auth,
+        rate_limiter=create_rate_limiter(config, 'ga4'),
+        page_size=config['ga4'].get('page_size', 100000),
+        max_workers=config['ga4'].get('max_workers', 4)
+    )
     
-    # GA4データを取得
-    print("   GA4データを取得中...")
-    ga4_this_week = ga4_client.get_this_week_data(
-        dimensions=config['ga4']['dimensions'],
-        metrics=config['ga4']['metrics']
+    # GSC/GA4データを並行して取得
+    print("   GSC/GA4データを取得中...")
+    fetcher = GmxAsyncFetcher(
+        gsc_client,
+        ga4_client,
+        deadline=fetch_config.get('deadline_sec', 600),
+        request_timeout=fetch_config.get('request_timeout_sec', 120)
     )
-    ga4_last_week = ga4_client.get_last_week_data(
-        dimensions=config['ga4']['dimensions'],
-        metrics=config['ga4']['metrics']
+    gsc_this_week, gsc_last_week, ga4_this_week, ga4_last_week = fetcher.fetch_weekly_data(
+        site_url=site_url,
+        gsc_options={
+            'dimensions': config['gsc']['dimensions'],
+            'row_limit': config['gsc']['row_limit'],
+            'paginate': config['gsc'].get('paginate', False),
+            'max_rows': config['gsc'].get('max_rows'),
+            'shard_by': config['gsc'].get('shard_by'),
+            'max_workers': config['gsc'].get('max_workers', 4)
+        },
+        ga4_dimensions=config['ga4']['dimensions'],
+        ga4_metrics=config['ga4']['metrics']
     )
+    print(f"   ✓ GSCデータ取得完了 (今週: {len(gsc_this_week)}件, 先週: {len(gsc_last_week)}件)")
     print(f"   ✓ GA4データ取得完了 (今週: {len(ga4_this_week)}件, 先週: {len(ga4_last_week)}件)")
+    for limiter in (gsc_client.rate_limiter, ga4_client.rate_limiter):
+        print(
+            f"   ⏱️ {limiter.name.upper()}: {limiter.request_count}リクエスト, "
+            f"リトライ {limiter.retry_count}回, 待機 {limiter.throttled_seconds:.1f}秒"
+        )
+    
+    # 取得したデータの型を縮小 (以降の分析・結合・移動集計は縮小後のデータで行う)
+    compact_config = config.get('compact', {})
+    if compact_config.get('enabled', False):
+        compactor = GmxFrameCompactor(
+            category_max_ratio=compact_config.get('category_max_ratio', 0.5),
+            float_rtol=compact_config.get('float_rtol', 0.0)
+        )
+        compacted = compactor.compact_frames({
+            'GSC 今週': gsc_this_week,
+            'GSC 先週': gsc_last_week,
+            'GA4 今週': ga4_this_week,
+            'GA4 先週': ga4_last_week
+        })
+        gsc_this_week, gsc_last_week, ga4_this_week, ga4_last_week = (
+            result['df'] for result in compacted.values()
+        )
+        for name, result in compacted.items():
+            print(
+                f"   🗜️ {name}: {result['before'] / 1024:,.0f}KB → {result['after'] / 1024:,.0f}KB"
+            )
     print()
     
     # === STEP 2: データ分析 ===
     print("📊 STEP 2: データ分析")
     print("-" * 60)
     
+    analyzer = get_analyzer_backend(config.get('analysis', {}).get('backend'))
+    print(f"   分析バックエンド: {analyzer.name}")
+    
     print("   GSCデータを分析中...")
-    gsc_analysis = GmxDataAnalyzer.analyze_gsc_data(gsc_this_week, gsc_last_week)
+    gsc_analysis = analyzer.analyze_gsc_data(gsc_this_week, gsc_last_week)
     print("   ✓ GSC分析完了")
     
     print("   GA4データを分析中...")
-    ga4_analysis = GmxDataAnalyzer.analyze_ga4_data(ga4_this_week, ga4_last_week)
+    ga4_analysis = analyzer.analyze_ga4_data(ga4_this_week, ga4_last_week)
     print("   ✓ GA4分析完了")
+    
+    # 直近の完了した週(今週のデータ)で複数週の移動集計を更新
+    if config.get('rolling', {}).get('enabled', False):
+        print("   複数週の移動集計を更新中...")
+        last_monday, rolling_trends, anomalies = update_completed_week_trends(
+            config, today, gsc_this_week, ga4_this_week
+        )
+        gsc_analysis['rolling_trends'] = {
+            key: trends for (source, key), trends in rolling_trends.items() if source == 'gsc'
+        }
+        ga4_analysis['rolling_trends'] = {
+            key: trends for (source, key), trends in rolling_trends.items() if source == 'ga4'
+        }
+        for source, analysis in (('gsc', gsc_analysis), ('ga4', ga4_analysis)):
+            if source in anomalies:
+                analysis['anomalies'] = anomalies[source]
+        print(f"   ✓ 移動集計を更新 (週の開始日: {last_monday})")
+        if anomalies:
+            print(f"   ✓ 異常値を検出: {sum(len(df) for df in anomalies.values())}件")
     print()
     
     # === STEP 3: グラフ生成 ===
     print("📈 STEP 3: グラフ生成")
     print("-" * 60)
     
-    visualizer = GmxReportVisualizer(config=config.get('visualization', {}))
-    graphs = []
+    render_cache = None
+    render_cache_config = config.get('render_cache', {})
+    if render_cache_config.get('enabled', False):
+        render_cache = GmxRenderCache(
+            project_root / render_cache_config.get('path', '.cache/graphs'),
+            max_bytes=int(render_cache_config.get('max_mb', 50) * 1024 * 1024)
+        )
+    visualizer = GmxReportVisualizer(
+        config=config.get('visualization', {}),
+        render_cache=render_cache
+    )
+    date_str = today.strftime('%Y-%m-%d')
+    
+    # 生成するグラフ (キャッシュキーに含めるため必要なデータのみ指定)
+    graph_specs = [
+        ('クリック数の推移', {
+            'type': 'clicks_trend',
+            'summary_stats': gsc_analysis['summary_stats']
+        }),
+        ('CTRの推移', {
+            'type': 'ctr_comparison',
+            'summary_stats': gsc_analysis['summary_stats']
+        }),
+        ('チャネル別セッション数', {
+            'type': 'channel_sessions',
+            'ga4_analysis': {'wow_comparison': ga4_analysis['wow_comparison']}
+        }),
+        ('トップ10検索クエリ', {
+            'type': 'top_queries',
+            'top_queries': gsc_analysis['top_queries'].head(10),
+            'n': 10
+        })
+    ]
+    for _, spec in graph_specs:
+        spec['output_path'] = str(output_dir / f"gmx_graph_{spec['type']}_{date_str}{visualizer.file_extension}")
+    
+    print(f"   {len(graph_specs)}個のグラフを生成中...")
+    graph_paths = visualizer.render_batch([spec for _, spec in graph_specs])
     
-    # クリック数トレンドグラフ
-    print("   クリック数トレンドグラフを生成中...")
-    clicks_graph_path = output_dir / f"gmx_graph_clicks_trend_{today.strftime('%Y-%m-%d')}.png"
-    visualizer.create_clicks_trend_graph(gsc_analysis['summary_stats'], str(clicks_graph_path))
-    graphs.append({'title': 'クリック数の推移', 'path': clicks_graph_path.name})
-    print(f"   ✓ 保存: {clicks_graph_path.name}")
-    
-    # CTR比較グラフ
-    print("   CTR比較グラフを生成中...")
-    ctr_graph_path = output_dir / f"gmx_graph_ctr_comparison_{today.strftime('%Y-%m-%d')}.png"
-    visualizer.create_ctr_comparison_graph(gsc_analysis['summary_stats'], str(ctr_graph_path))
-    graphs.append({'title': 'CTRの推移', 'path': ctr_graph_path.name})
-    print(f"   ✓ 保存: {ctr_graph_path.name}")
-    
-    # チャネル別セッショングラフ
-    print("   チャネル別セッショングラフを生成中...")
-    channel_graph_path = output_dir / f"gmx_graph_channel_sessions_{today.strftime('%Y-%m-%d')}.png"
-    visualizer.create_channel_sessions_graph(ga4_analysis, str(channel_graph_path))
-    graphs.append({'title': 'チャネル別セッション数', 'path': channel_graph_path.name})
-    print(f"   ✓ 保存: {channel_graph_path.name}")
-    
-    # トップクエリグラフ
-    print("   トップクエリグラフを生成中...")
-    top_queries_graph_path = output_dir / f"gmx_graph_top_queries_{today.strftime('%Y-%m-%d')}.png"
-    visualizer.create_top_queries_graph(gsc_analysis['top_queries'], str(top_queries_graph_path), n=10)
-    graphs.append({'title': 'トップ10検索クエリ', 'path': top_queries_graph_path.name})
-    print(f"   ✓ 保存: {top_queries_graph_path.name}")
+    graphs = []
+    for (title, _), path in zip(graph_specs, graph_paths):
+        graphs.append({'title': title, 'path': Path(path).name})
+        print(f"   ✓ 保存: {Path(path).name}")
+    if render_cache is not None:
+        print(f"   キャッシュから出力: {visualizer.cache_hits}/{len(graph_specs)}個")
     print()
     
     # === STEP 4: Executive Summary生成 ===
@@ -214,9 +426,16 @@ def main():
                     print(f"   ℹ️ 使用中のサービスアカウント: {creds_json.get('client_email')}")
                     
                     print(f"   Google Driveに接続中... (Target ID: {drive_folder_id})")
+                    # 共通の鍵と同じ場合は認証情報を再利用
+                    if creds_json == auth.credentials_info:
+                        drive_auth = auth
+                    else:
+                        drive_auth = GmxGoogleAuth(creds_json)
+                    
                     drive_client = GmxDriveClient(
                         folder_id=drive_folder_id,
-                        credentials_json=creds_json
+                        auth=drive_auth,
+                        rate_limiter=create_rate_limiter(config, 'drive')
                     )
                     
                     print(f"   フォルダをアップロード中...: {output_dir.name}")
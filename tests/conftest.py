@@ -0,0 +1,9 @@
+"""
+pytestの共通設定
+"""
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,49 @@
+"""
+GmxAnomalyDetector のテスト
+"""
+
+import numpy as np
+import pytest
+
+from gmx_seo_reporter.analyzers.anomaly_detector import GmxAnomalyDetector
+
+
+# 過去5週の中央値は11、MADは1
+BASELINE = [10, 12, 11, 13, 9]
+
+
+def test_robust_z_score_values():
+    matrix = np.array([BASELINE + [30]])
+
+    # MAD / 0.6745 = 1.48 より √中央値 = 3.32 が大きいため、件数の下限が使われる
+    assert GmxAnomalyDetector.robust_z_scores(matrix)[0] == pytest.approx(19 / np.sqrt(11))
+    assert GmxAnomalyDetector.robust_z_scores(matrix, count_floor=False)[0] == pytest.approx(19 * 0.6745)
+
+
+def test_zero_mad_falls_back_to_mean_absolute_deviation():
+    # 偏差は [0, 0, 0, 4] でMADは0、平均絶対偏差は1
+    matrix = np.array([[5, 5, 5, 9, 10]])
+    assert GmxAnomalyDetector.robust_z_scores(matrix, count_floor=False)[0] == pytest.approx(5 / 1.2533)
+
+
+def test_detect_threshold_and_min_weeks():
+    keys = np.array(['spike', 'normal', 'drop'])
+    matrix = np.array([
+        BASELINE + [30],   # z = 5.73
+        BASELINE + [16],   # z = 1.51
+        BASELINE + [0]     # z = -3.32
+    ])
+
+    result = GmxAnomalyDetector.detect(keys, matrix, threshold=3.5)
+    assert result['key'].tolist() == ['spike']
+    assert result['baseline'].tolist() == [11]
+    assert result['change_pct'].iloc[0] == pytest.approx((30 - 11) / 11 * 100)
+
+    # 閾値を下げると減少も検出し、Zスコアの絶対値が大きい順に並ぶ
+    assert GmxAnomalyDetector.detect(keys, matrix, threshold=3.0)['key'].tolist() == ['spike', 'drop']
+
+    # 基準の週数が足りない場合は検出しない
+    assert len(GmxAnomalyDetector.detect(keys, matrix, min_weeks=6)) == 0
+
+    # 直近の週・基準のどちらも min_volume 未満のキーは対象外
+    assert len(GmxAnomalyDetector.detect(keys, matrix, threshold=3.5, min_volume=31)) == 0
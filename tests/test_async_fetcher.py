@@ -0,0 +1,62 @@
+"""
+GmxAsyncFetcher のテスト
+"""
+
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from gmx_seo_reporter.clients.async_fetcher import GmxAsyncFetcher
+
+
+class FakeGscClient:
+    def __init__(self, seconds=0.0):
+        self.seconds = seconds
+
+    def get_this_week_data(self, site_url, **options):
+        time.sleep(self.seconds)
+        return pd.DataFrame({'query': ['this'], 'clicks': [2]})
+
+    def get_last_week_data(self, site_url, **options):
+        return pd.DataFrame({'query': ['last'], 'clicks': [1]})
+
+
+class FakeGa4Client:
+    def __init__(self):
+        self.timeouts = []
+        self.closed = False
+
+    async def get_comparison_data_async(self, dimensions, metrics, timeout=None):
+        self.timeouts.append(timeout)
+        return pd.DataFrame({'sessions': [20]}), pd.DataFrame({'sessions': [10]})
+
+    async def close_async(self):
+        self.closed = True
+
+
+def test_fetch_passes_request_timeout_and_closes_client():
+    ga4_client = FakeGa4Client()
+    fetcher = GmxAsyncFetcher(FakeGscClient(), ga4_client, deadline=10, request_timeout=30)
+
+    gsc_this_week, gsc_last_week, ga4_this_week, ga4_last_week = fetcher.fetch_weekly_data(
+        'https://example.com/', {}, ['sessionDefaultChannelGroup'], ['sessions']
+    )
+
+    assert gsc_this_week['query'].tolist() == ['this']
+    assert gsc_last_week['query'].tolist() == ['last']
+    assert ga4_this_week['sessions'].tolist() == [20]
+    assert ga4_last_week['sessions'].tolist() == [10]
+    assert ga4_client.timeouts == [30]
+    assert ga4_client.closed
+
+
+def test_deadline_applies_to_the_whole_fetch():
+    ga4_client = FakeGa4Client()
+    fetcher = GmxAsyncFetcher(FakeGscClient(seconds=0.5), ga4_client, deadline=0.1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        fetcher.fetch_weekly_data('https://example.com/', {}, [], [])
+    # 期限切れの場合も非同期クライアントは閉じる
+    assert ga4_client.closed
@@ -0,0 +1,40 @@
+"""
+GmxCannibalizationDetector のテスト
+"""
+
+import pandas as pd
+import pytest
+
+from gmx_seo_reporter.analyzers.cannibalization import GmxCannibalizationDetector
+
+
+def test_detects_competing_pages_and_lost_clicks():
+    df = pd.DataFrame([
+        # (query, page, device, clicks, impressions): /a はデバイス別の2行に分かれている
+        ('excel', '/a', 'MOBILE', 40, 400),
+        ('excel', '/a', 'DESKTOP', 20, 200),
+        ('excel', '/b', 'MOBILE', 8, 400),
+        ('excel', '/c', 'MOBILE', 0, 10),     # シェア1%のため競合ページではない
+        ('word', '/w', 'MOBILE', 50, 500),    # ページが1つのため対象外
+        ('tiny', '/t1', 'MOBILE', 1, 10),     # 表示回数が少ないため対象外
+        ('tiny', '/t2', 'MOBILE', 1, 10)
+    ], columns=['query', 'page', 'device', 'clicks', 'impressions'])
+
+    result = GmxCannibalizationDetector.detect(df, min_impressions=100, min_share=0.1)
+
+    assert result['query'].tolist() == ['excel']
+    row = result.iloc[0]
+    assert row['competing_pages'] == 2
+    assert row['impressions'] == 1010
+    assert row['clicks'] == 68
+    assert row['primary_page'] == '/a'
+    assert row['primary_share'] == pytest.approx(600 / 1010)
+    assert row['primary_ctr'] == pytest.approx(0.1)
+    # /b: 400 × (0.1 − 0.02) + /c: 10 × (0.1 − 0)
+    assert row['lost_clicks'] == pytest.approx(33.0)
+    assert row['pages'] == ['/a', '/b']
+
+
+def test_empty_input():
+    df = pd.DataFrame(columns=['query', 'page', 'clicks', 'impressions'])
+    assert len(GmxCannibalizationDetector.detect(df)) == 0
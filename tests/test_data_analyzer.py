@@ -0,0 +1,52 @@
+"""
+GmxDataAnalyzer のテスト
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gmx_seo_reporter.analyzers.data_analyzer import GmxDataAnalyzer
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=['query', 'device', 'clicks'])
+
+
+THIS_WEEK = frame([('a', 'MOBILE', 10), ('a', 'DESKTOP', 5), ('b', 'MOBILE', 3)])
+LAST_WEEK = frame([('a', 'MOBILE', 4), ('c', 'DESKTOP', 2)])
+
+
+def test_hashed_key_merge_matches_plain_merge():
+    keys = ['query', 'device']
+    hashed = GmxDataAnalyzer._merge_on_hashed_keys(THIS_WEEK, LAST_WEEK, keys)
+    plain = THIS_WEEK.merge(LAST_WEEK, on=keys, how='outer', suffixes=('_this_week', '_last_week'))
+
+    pd.testing.assert_frame_equal(
+        hashed.sort_values(keys).reset_index(drop=True),
+        plain[hashed.columns].sort_values(keys).reset_index(drop=True)
+    )
+
+
+def test_wow_comparison_on_composite_keys():
+    result = GmxDataAnalyzer.calculate_wow_comparison(
+        THIS_WEEK, LAST_WEEK, ['query', 'device'], ['clicks']
+    ).set_index(['query', 'device'])
+
+    assert result.loc[('a', 'MOBILE'), 'clicks_delta'] == 6
+    assert result.loc[('a', 'MOBILE'), 'clicks_change_pct'] == pytest.approx(150.0)
+    # 先週がない場合は100%、今週がない場合は-100%
+    assert result.loc[('a', 'DESKTOP'), 'clicks_change_pct'] == 100.0
+    assert result.loc[('c', 'DESKTOP'), 'clicks_delta'] == -2
+    assert result.loc[('c', 'DESKTOP'), 'clicks_change_pct'] == -100.0
+    assert len(result) == 4
+
+
+def test_wow_comparison_aggregates_duplicate_keys():
+    # queryだけで比較すると、デバイス別の行が多対多で結合されないよう先に集約する
+    result = GmxDataAnalyzer.calculate_wow_comparison(
+        THIS_WEEK, LAST_WEEK, 'query', ['clicks'], aggregate=True
+    ).set_index('query')
+
+    np.testing.assert_array_equal(result.loc[['a', 'b', 'c'], 'clicks_this_week'], [15, 3, 0])
+    np.testing.assert_array_equal(result.loc[['a', 'b', 'c'], 'clicks_last_week'], [4, 0, 2])
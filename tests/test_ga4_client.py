@@ -0,0 +1,65 @@
+"""
+GmxGa4Client のテスト
+"""
+
+from google.analytics.data_v1beta.types import (
+    DimensionHeader,
+    DimensionValue,
+    MetricHeader,
+    MetricValue,
+    Row,
+    RunReportResponse,
+)
+
+from gmx_seo_reporter.clients.ga4_client import GmxGa4Client
+
+
+def response(dimension_headers, rows):
+    """行を (ディメンションの値のリスト, sessions) で指定してRunReportResponseを作成"""
+    return RunReportResponse(
+        dimension_headers=[DimensionHeader(name=name) for name in dimension_headers],
+        metric_headers=[MetricHeader(name='sessions')],
+        rows=[
+            Row(
+                dimension_values=[DimensionValue(value=value) for value in values],
+                metric_values=[MetricValue(value=str(sessions))]
+            )
+            for values, sessions in rows
+        ],
+        row_count=len(rows)
+    )
+
+
+def test_split_multi_range_responses_by_date_range_header():
+    client = GmxGa4Client.__new__(GmxGa4Client)
+
+    # dateRangeの位置はレスポンスのdimension_headersから求める (ここでは先頭)
+    headers = ['dateRange', 'sessionDefaultChannelGroup']
+    pages = [
+        response(headers, [(['range_0', 'Direct'], 10), (['range_1', 'Direct'], 7)]),
+        response(headers, [(['range_1', 'Email'], 3), (['range_0', 'Organic Search'], 20)])
+    ]
+
+    this_week, last_week, empty = client._split_responses(
+        pages, 3, ['sessionDefaultChannelGroup'], ['sessions']
+    )
+
+    assert list(this_week.columns) == ['sessionDefaultChannelGroup', 'sessions']
+    assert this_week.to_dict('list') == {
+        'sessionDefaultChannelGroup': ['Direct', 'Organic Search'],
+        'sessions': [10, 20]
+    }
+    assert last_week.to_dict('list') == {
+        'sessionDefaultChannelGroup': ['Direct', 'Email'],
+        'sessions': [7, 3]
+    }
+    assert len(empty) == 0
+
+
+def test_split_single_range_response():
+    client = GmxGa4Client.__new__(GmxGa4Client)
+    page = response(['sessionDefaultChannelGroup'], [(['Direct'], 5)])
+
+    (df,) = client._split_responses([page], 1, ['sessionDefaultChannelGroup'], ['sessions'])
+
+    assert df.to_dict('list') == {'sessionDefaultChannelGroup': ['Direct'], 'sessions': [5]}
@@ -0,0 +1,54 @@
+"""
+GmxGoogleAuth のテスト
+"""
+
+import threading
+
+from gmx_seo_reporter.clients.google_auth import GmxGoogleAuth
+
+
+SCOPES = ['https://www.googleapis.com/auth/webmasters.readonly']
+
+
+def make_auth(monkeypatch):
+    auth = GmxGoogleAuth({'type': 'service_account'})
+    created = []
+
+    def new_http(scopes):
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(auth, 'authorized_http', new_http)
+    return auth, created
+
+
+def test_transport_is_reused_across_threads(monkeypatch):
+    auth, created = make_auth(monkeypatch)
+    used = []
+
+    def borrow():
+        with auth.borrow_http(SCOPES) as http:
+            used.append(http)
+
+    # 呼び出しごとに新しいスレッドで実行しても同じトランスポートを使う
+    for _ in range(3):
+        thread = threading.Thread(target=borrow)
+        thread.start()
+        thread.join()
+
+    assert len(created) == 1
+    assert used == created * 3
+
+
+def test_concurrent_borrowers_get_separate_transports(monkeypatch):
+    auth, created = make_auth(monkeypatch)
+
+    with auth.borrow_http(SCOPES) as first, auth.borrow_http(SCOPES) as second:
+        assert first is not second
+    with auth.borrow_http(SCOPES) as third:
+        assert third in (first, second)
+    # スコープが異なる場合は別のトランスポート
+    with auth.borrow_http(['https://www.googleapis.com/auth/drive']) as other:
+        assert other not in (first, second)
+
+    assert len(created) == 3
@@ -0,0 +1,184 @@
+"""
+GmxGscClient のテスト
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from gmx_seo_reporter.clients.gsc_client import GmxGscClient
+from gmx_seo_reporter.clients.rate_limiter import GmxRateLimiter
+from gmx_seo_reporter.storage.raw_data_store import GmxRawDataStore
+
+
+# 日別の (query, clicks, impressions)
+DAILY_ROWS = {
+    '2024-05-06': [('a', 5, 50), ('steady', 4, 40)],
+    '2024-05-07': [('b', 6, 60), ('steady', 4, 40)],
+    '2024-05-08': [('a', 7, 70), ('steady', 4, 40)],
+    '2024-05-09': [('a', 1, 10)],
+    '2024-05-10': [('b', 2, 20)]
+}
+
+
+class FakeRequest:
+    def __init__(self, func):
+        self.func = func
+
+    def execute(self, http=None):
+        return self.func()
+
+
+class FakeService:
+    """Search Analytics APIの代わりに DAILY_ROWS をクリック数の多い順に返す"""
+
+    def __init__(self):
+        self.requests = []
+
+    def searchanalytics(self):
+        return self
+
+    def query(self, siteUrl, body):
+        return FakeRequest(lambda: self._query(body))
+
+    def _query(self, body):
+        self.requests.append(body)
+        start = datetime.strptime(body['startDate'], '%Y-%m-%d')
+        end = datetime.strptime(body['endDate'], '%Y-%m-%d')
+
+        totals = {}
+        day = start
+        while day <= end:
+            date_key = day.strftime('%Y-%m-%d')
+            for query, clicks, impressions in DAILY_ROWS.get(date_key, []):
+                keys = tuple(date_key if d == 'date' else query for d in body['dimensions'])
+                current = totals.get(keys, (0, 0))
+                totals[keys] = (current[0] + clicks, current[1] + impressions)
+            day += timedelta(days=1)
+
+        rows = [
+            {'keys': list(keys), 'clicks': clicks, 'impressions': impressions,
+             'ctr': clicks / impressions, 'position': 1.0}
+            for keys, (clicks, impressions) in sorted(totals.items(), key=lambda item: -item[1][0])
+        ]
+        page = rows[body['startRow']:body['startRow'] + body['rowLimit']]
+        return {'rows': page} if page else {}
+
+
+class FakeAuth:
+    @contextmanager
+    def borrow_http(self, scopes):
+        yield None
+
+
+def make_client(store):
+    client = GmxGscClient.__new__(GmxGscClient)
+    client.auth = FakeAuth()
+    client.service = FakeService()
+    client.store = store
+    client.rate_limiter = GmxRateLimiter(qps=1000)
+    return client
+
+
+def requested_ranges(client):
+    return [(body['startDate'], body['endDate']) for body in client.service.requests]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return GmxRawDataStore(str(tmp_path / 'raw.sqlite3'))
+
+
+def test_contiguous_days():
+    days = ['2024-05-06', '2024-05-07', '2024-05-09', '2024-05-31', '2024-06-01']
+    assert GmxGscClient._contiguous_days(days) == [
+        ['2024-05-06', '2024-05-07'],
+        ['2024-05-09'],
+        ['2024-05-31', '2024-06-01']
+    ]
+    assert GmxGscClient._contiguous_days([]) == []
+
+
+def test_cached_fetches_only_missing_runs(store):
+    client = make_client(store)
+    client.get_search_analytics_cached(
+        'https://example.com/', datetime(2024, 5, 8), datetime(2024, 5, 8), paginate=True
+    )
+    client.service.requests.clear()
+
+    result = client.get_search_analytics_cached(
+        'https://example.com/', datetime(2024, 5, 6), datetime(2024, 5, 10), paginate=True
+    ).set_index('query')
+
+    # キャッシュ済みの5/8を挟む2つの期間だけを取得する
+    assert requested_ranges(client) == [('2024-05-06', '2024-05-07'), ('2024-05-09', '2024-05-10')]
+    assert result.loc['a', 'clicks'] == 13
+    assert result.loc['steady', 'clicks'] == 12
+    assert result.loc['b', 'impressions'] == 80
+
+    client.service.requests.clear()
+    client.get_search_analytics_cached(
+        'https://example.com/', datetime(2024, 5, 6), datetime(2024, 5, 10), paginate=True
+    )
+    assert client.service.requests == []
+
+
+def test_row_cap_is_part_of_the_cache_key(store):
+    client = make_client(store)
+    client.get_search_analytics_cached(
+        'https://example.com/', datetime(2024, 5, 6), datetime(2024, 5, 7), row_limit=1
+    )
+
+    # 上限は日ごとに適用する
+    assert requested_ranges(client) == [('2024-05-06', '2024-05-06'), ('2024-05-07', '2024-05-07')]
+    assert {body['rowLimit'] for body in client.service.requests} == {1}
+
+    days = ['2024-05-06', '2024-05-07']
+    assert store.missing_partitions('gsc', 'https://example.com/', 'query|rows=1', days) == []
+    assert store.missing_partitions('gsc', 'https://example.com/', 'query|rows=2', days) == days
+    assert store.missing_partitions('gsc', 'https://example.com/', 'query', days) == days
+
+
+def test_row_cap_keeps_daily_top_rows_only(store):
+    client = make_client(store)
+    result = client.get_search_analytics_cached(
+        'https://example.com/', datetime(2024, 5, 6), datetime(2024, 5, 8), row_limit=2
+    )
+
+    # 週全体では 'steady' が12クリックで2位だが、どの日も日別の1位ではないため
+    # 上限1では含まれない (日ごとの上位N行を集約する近似)
+    capped = client.get_search_analytics_cached(
+        'https://example.com/', datetime(2024, 5, 6), datetime(2024, 5, 8), row_limit=1
+    )
+    assert capped['query'].tolist() == ['a']
+    assert capped['clicks'].tolist() == [12]
+    assert result['query'].tolist() == ['a', 'steady']
+
+
+def test_device_shards_without_row_cap(store):
+    client = make_client(store)
+    client.get_search_analytics_cached(
+        'https://example.com/', datetime(2024, 5, 6), datetime(2024, 5, 7),
+        paginate=True, shard_by='device', max_workers=1
+    )
+    devices = [
+        body['dimensionFilterGroups'][0]['filters'][0]['expression']
+        for body in client.service.requests
+    ]
+    assert devices == GmxGscClient.DEVICES
+
+
+def test_unsupported_shard_options(store):
+    client = make_client(store)
+    with pytest.raises(ValueError):
+        client.get_search_analytics_cached(
+            'https://example.com/', datetime(2024, 5, 6), datetime(2024, 5, 7), shard_by='page'
+        )
+
+    with pytest.warns(UserWarning):
+        client.get_search_analytics_cached(
+            'https://example.com/', datetime(2024, 5, 6), datetime(2024, 5, 7),
+            row_limit=1, shard_by='device'
+        )
+    assert requested_ranges(client) == [('2024-05-06', '2024-05-06'), ('2024-05-07', '2024-05-07')]
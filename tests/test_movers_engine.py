@@ -0,0 +1,35 @@
+"""
+GmxMoversEngine のテスト
+"""
+
+import numpy as np
+import pandas as pd
+
+from gmx_seo_reporter.analyzers.movers_engine import GmxMoversEngine
+
+
+def test_top_and_bottom_with_ties_and_nan():
+    df = pd.DataFrame({'delta': [3, 1, 3, np.nan, 2]})
+
+    # 同値は元の行順、NaNは選択しない
+    assert GmxMoversEngine.top(df, 'delta', 2).tolist() == [0, 2]
+    assert GmxMoversEngine.bottom(df, 'delta', 2).tolist() == [1, 4]
+    assert GmxMoversEngine.top(df, 'delta', 10).tolist() == [0, 2, 4, 1]
+
+
+def test_partition_matches_full_sort():
+    rng = np.random.default_rng(0)
+    values = rng.integers(-20, 20, size=(500, 3)).astype(float)
+    values[rng.random(values.shape) < 0.05] = np.nan
+    df = pd.DataFrame(values, columns=['clicks', 'impressions', 'position'])
+
+    ranked = GmxMoversEngine.rank(df, list(df.columns), 25)
+
+    for column in df.columns:
+        column_values = df[column].to_numpy()
+        valid = np.flatnonzero(~np.isnan(column_values))
+        # 安定ソートでの完全な並べ替えの先頭N件と一致する
+        top = valid[np.argsort(-column_values[valid], kind='stable')][:25]
+        bottom = valid[np.argsort(column_values[valid], kind='stable')][:25]
+        np.testing.assert_array_equal(ranked[column]['top'], top)
+        np.testing.assert_array_equal(ranked[column]['bottom'], bottom)
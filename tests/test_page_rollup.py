@@ -0,0 +1,56 @@
+"""
+GmxPageTrie / GmxPageRollup のテスト
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gmx_seo_reporter.analyzers.page_rollup import GmxPageRollup, GmxPageTrie
+
+
+def test_trie_nodes_and_rollup_sums():
+    trie = GmxPageTrie()
+    node_ids = trie.insert_many(np.array([
+        'https://example.com/a/x',
+        'https://example.com/a/y',
+        'https://example.com/b',
+        'https://example.com/a/x'
+    ], dtype=object))
+
+    sums = trie.rollup(node_ids, np.array([[1.0], [2.0], [4.0], [8.0]]))[:, 0]
+    totals = dict(zip(trie.labels, sums))
+
+    assert totals == {
+        'https://example.com/': 15,
+        'https://example.com/a/': 11,
+        'https://example.com/a/x': 9,
+        'https://example.com/a/y': 2,
+        'https://example.com/b': 4
+    }
+    assert trie.depths[trie.labels.index('https://example.com/a/x')] == 2
+
+
+def test_rollup_weeks_recomputes_ratios():
+    this_week = pd.DataFrame({
+        'page': ['https://example.com/blog/', 'https://example.com/blog/a'],
+        'clicks': [10, 30],
+        'impressions': [100, 300],
+        'ctr': [0.1, 0.1],
+        'position': [2.0, 6.0]
+    })
+    last_week = this_week.iloc[:1]
+
+    result = GmxPageRollup.rollup_weeks(
+        this_week, last_week, ['clicks', 'ctr', 'position']
+    ).set_index('node')
+
+    blog = result.loc['https://example.com/blog/']
+    # '/blog/' はページでもあり、子ノード('/blog/a')を持つディレクトリでもある
+    assert blog['is_page'] and blog['children'] == 1 and blog['pages'] == 2
+    assert blog['clicks_this_week'] == 40
+    assert blog['ctr_this_week'] == pytest.approx(0.1)
+    # 表示回数による加重平均: (2×100 + 6×300) / 400
+    assert blog['position_this_week'] == pytest.approx(5.0)
+    assert blog['clicks_last_week'] == 10
+    assert result.loc['https://example.com/', 'clicks_this_week'] == 40
@@ -0,0 +1,154 @@
+"""
+GmxRateLimiter のテスト
+"""
+
+import asyncio
+
+import httplib2
+import pytest
+from google.api_core import exceptions as api_exceptions
+from googleapiclient.errors import HttpError
+
+from gmx_seo_reporter.clients.rate_limiter import GmxRateLimiter
+
+
+class FakeClock:
+    """sleepで進む時計"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def http_error(status):
+    return HttpError(httplib2.Response({'status': status}), b'')
+
+
+def make_limiter(clock, **kwargs):
+    return GmxRateLimiter(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def failing(errors, result='ok'):
+    """errorsを順に送出した後にresultを返す関数 (呼び出し回数はcalls)"""
+    errors = list(errors)
+
+    def func():
+        func.calls += 1
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    func.calls = 0
+    return func
+
+
+def failing_async(error):
+    """常にerrorを送出するコルーチン関数"""
+    async def func():
+        raise error
+    return func
+
+
+def test_token_bucket_throttles_after_burst():
+    clock = FakeClock()
+    limiter = make_limiter(clock, qps=2, burst=2)
+
+    for _ in range(4):
+        assert limiter.call(lambda: 'ok') == 'ok'
+
+    # バケットの2回分は待たず、以降は1/qps = 0.5秒ずつ待つ
+    assert clock.sleeps == [0.5, 0.5]
+    assert limiter.throttled_seconds == pytest.approx(1.0)
+    assert limiter.request_count == 4
+
+
+def test_quota_error_halves_rate_and_recovers():
+    clock = FakeClock()
+    limiter = make_limiter(clock, qps=10, base_delay=1.0)
+
+    func = failing([http_error(429)])
+    assert limiter.call(func) == 'ok'
+    assert func.calls == 2
+    assert limiter.retry_count == 1
+
+    # 429で10→5に下がり、成功で設定値の1/10ずつ戻る
+    assert limiter.qps == pytest.approx(6.0)
+    for _ in range(3):
+        limiter.call(lambda: 'ok')
+    assert limiter.qps == pytest.approx(9.0)
+    for _ in range(3):
+        limiter.call(lambda: 'ok')
+    assert limiter.qps == pytest.approx(10.0)
+
+    # バックオフの待機時間(0〜base_delay)も待機時間に含める
+    assert len(clock.sleeps) == 1 and 0 <= clock.sleeps[0] <= 1.0
+    assert limiter.throttled_seconds == pytest.approx(sum(clock.sleeps))
+
+
+def test_server_error_retries_without_lowering_rate():
+    clock = FakeClock()
+    limiter = make_limiter(clock, qps=10)
+
+    assert limiter.call(failing([http_error(503), http_error(500)])) == 'ok'
+    assert limiter.retry_count == 2
+    assert limiter.qps == 10
+
+
+def test_client_errors_are_not_retried():
+    clock = FakeClock()
+    limiter = make_limiter(clock, qps=10)
+
+    for status in (400, 403, 404):
+        func = failing([http_error(status)])
+        with pytest.raises(HttpError):
+            limiter.call(func)
+        assert func.calls == 1
+
+    func = failing([ValueError('bad request')])
+    with pytest.raises(ValueError):
+        limiter.call(func)
+    assert func.calls == 1
+    assert limiter.retry_count == 0
+    assert clock.sleeps == []
+
+
+def test_retries_stop_at_max_retries():
+    clock = FakeClock()
+    limiter = make_limiter(clock, qps=10, max_retries=2, base_delay=1.0, max_delay=1.5)
+
+    func = failing([http_error(503)] * 5)
+    with pytest.raises(HttpError):
+        limiter.call(func)
+
+    assert func.calls == 3
+    assert limiter.retry_count == 2
+    # バックオフはmin(max_delay, base_delay × 2^試行回数)以下
+    assert len(clock.sleeps) == 2
+    assert 0 <= clock.sleeps[0] <= 1.0 and 0 <= clock.sleeps[1] <= 1.5
+
+
+def test_call_async_retries_resource_exhausted():
+    clock = FakeClock()
+    limiter = make_limiter(clock, qps=8, base_delay=0.0)
+    errors = [api_exceptions.ResourceExhausted('quota')]
+    calls = []
+
+    async def run_report():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return 'report'
+
+    assert asyncio.run(limiter.call_async(run_report)) == 'report'
+    assert len(calls) == 2
+    assert limiter.qps == pytest.approx(4.8)
+
+    with pytest.raises(api_exceptions.InvalidArgument):
+        asyncio.run(limiter.call_async(failing_async(api_exceptions.InvalidArgument('bad'))))
@@ -0,0 +1,62 @@
+"""
+GmxRawDataStore のテスト
+"""
+
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from gmx_seo_reporter.storage.raw_data_store import GmxRawDataStore
+
+
+def test_is_final_uses_settle_days(tmp_path):
+    store = GmxRawDataStore(str(tmp_path / 'raw.sqlite3'), settle_days=3)
+    today = date.today()
+
+    assert store.is_final(today - timedelta(days=3))
+    assert not store.is_final(today - timedelta(days=2))
+    assert store.is_final(datetime.combine(today - timedelta(days=10), datetime.min.time()))
+
+
+def test_missing_partitions_skip_only_final_data(tmp_path):
+    store = GmxRawDataStore(str(tmp_path / 'raw.sqlite3'))
+    df = pd.DataFrame({'query': ['a'], 'clicks': [3]})
+
+    store.put('gsc', 'site', 'query', '2024-05-06', df, is_final=True)
+    store.put('gsc', 'site', 'query', '2024-05-07', df, is_final=False)
+    store.put('gsc', 'site', 'query,page', '2024-05-08', df, is_final=True)
+
+    days = ['2024-05-06', '2024-05-07', '2024-05-08']
+    assert store.missing_partitions('gsc', 'site', 'query', days) == ['2024-05-07', '2024-05-08']
+
+    pd.testing.assert_frame_equal(store.get('gsc', 'site', 'query', '2024-05-06'), df)
+    # 未確定のパーティションは返さない
+    assert store.get('gsc', 'site', 'query', '2024-05-07') is None
+
+    # 確定したデータで上書きすると取得済みになる
+    store.put('gsc', 'site', 'query', '2024-05-07', df, is_final=True)
+    assert store.missing_partitions('gsc', 'site', 'query', days) == ['2024-05-08']
+
+
+def test_connections_are_closed(tmp_path, monkeypatch):
+    connections = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        connections.append(conn)
+        return conn
+
+    monkeypatch.setattr(sqlite3, 'connect', tracking_connect)
+
+    store = GmxRawDataStore(str(tmp_path / 'raw.sqlite3'))
+    store.put('gsc', 'site', 'query', '2024-05-06', pd.DataFrame({'clicks': [1]}), is_final=True)
+    store.get('gsc', 'site', 'query', '2024-05-06')
+    store.missing_partitions('gsc', 'site', 'query', ['2024-05-06'])
+
+    assert len(connections) == 4
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
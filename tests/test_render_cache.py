@@ -0,0 +1,77 @@
+"""
+GmxRenderCache のテスト
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from gmx_seo_reporter.storage.render_cache import GmxRenderCache
+from gmx_seo_reporter.visualizers.graph_generator import GmxReportVisualizer
+
+
+def test_make_key_depends_on_content():
+    df = pd.DataFrame({'query': ['a', 'b'], 'clicks': [1, 2]})
+
+    key = GmxRenderCache.make_key({'top_queries': df, 'n': 10}, [12, 6], 100)
+    assert key == GmxRenderCache.make_key({'n': 10, 'top_queries': df.copy()}, [12, 6], 100)
+    # numpyのスカラーとPythonの値は同じキー
+    assert key == GmxRenderCache.make_key({'top_queries': df, 'n': np.int64(10)}, [12, 6], 100)
+
+    assert key != GmxRenderCache.make_key({'top_queries': df.assign(clicks=[1, 3]), 'n': 10}, [12, 6], 100)
+    assert key != GmxRenderCache.make_key({'top_queries': df, 'n': 10}, [12, 6], 150)
+
+
+def test_fetch_store_and_hit(tmp_path):
+    cache = GmxRenderCache(tmp_path / 'cache')
+    rendered = tmp_path / 'graph.png'
+    rendered.write_bytes(b'png-bytes')
+
+    assert cache.fetch('k1', str(tmp_path / 'out.png')) is False
+    cache.store('k1', str(rendered))
+
+    output = tmp_path / 'out.png'
+    output.write_bytes(b'old')
+    assert cache.fetch('k1', str(output)) is True
+    assert output.read_bytes() == b'png-bytes'
+    assert output.stat().st_ino == (tmp_path / 'cache' / 'k1.png').stat().st_ino
+
+    # 再生成の前に出力先を削除するため、キャッシュの内容は上書きされない
+    cache.discard_output(str(output))
+    output.write_bytes(b'new')
+    assert (tmp_path / 'cache' / 'k1.png').read_bytes() == b'png-bytes'
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = GmxRenderCache(tmp_path / 'cache', max_bytes=20)
+    source = tmp_path / 'graph.png'
+    source.write_bytes(b'0123456789')
+
+    for i, key in enumerate(['old', 'used']):
+        cache.store(key, str(source))
+        os.utime(tmp_path / 'cache' / f'{key}.png', (1000 + i, 1000 + i))
+
+    # 'old' を使うと最後に使われた日時が更新され、'used' が最も古くなる
+    assert cache.fetch('old', str(tmp_path / 'out.png'))
+    cache.store('new', str(source))
+
+    remaining = sorted(path.name for path in (tmp_path / 'cache').iterdir())
+    assert remaining == ['new.png', 'old.png']
+    assert cache.evict(max_bytes=0) == 2
+
+
+def test_render_batch_uses_cache(tmp_path):
+    cache = GmxRenderCache(tmp_path / 'cache')
+    visualizer = GmxReportVisualizer(render_cache=cache)
+    stats = {'clicks': {'this_week': 10, 'last_week': 8, 'change_pct': 25.0}}
+
+    def spec(name):
+        return {'type': 'clicks_trend', 'summary_stats': stats, 'output_path': str(tmp_path / name)}
+
+    visualizer.render_batch([spec('first.png')])
+    assert visualizer.cache_hits == 0
+
+    visualizer.render_batch([spec('second.png')])
+    assert visualizer.cache_hits == 1
+    assert (tmp_path / 'second.png').read_bytes() == (tmp_path / 'first.png').read_bytes()
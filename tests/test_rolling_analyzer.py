@@ -0,0 +1,122 @@
+"""
+GmxRollingAnalyzer のテスト
+"""
+
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import gmx_weekly_report
+from gmx_seo_reporter.analyzers.rolling_analyzer import GmxRollingAnalyzer
+
+
+def week(clicks: dict) -> pd.DataFrame:
+    """{クエリ: クリック数} から1週分のデータを作成 (表示回数はクリック数の10倍)"""
+    return pd.DataFrame({
+        'query': list(clicks),
+        'clicks': list(clicks.values()),
+        'impressions': [c * 10 for c in clicks.values()]
+    })
+
+
+def trends(rolling: GmxRollingAnalyzer, window: int) -> pd.DataFrame:
+    return rolling.get_trends(window).set_index('query')
+
+
+def test_window_sums_roll_over():
+    rolling = GmxRollingAnalyzer('query', ['clicks', 'impressions'], windows=[2])
+    rolling.update('2024-01-01', week({'a': 1, 'b': 5}))
+
+    # 1週しかない間は2週の値はNaN、直近の値は返す
+    first = trends(rolling, 2)
+    assert np.isnan(first.loc['a', 'clicks_2w'])
+    assert first.loc['a', 'clicks_latest'] == 1
+
+    rolling.update('2024-01-08', week({'a': 2}))
+    rolling.update('2024-01-15', week({'a': 3}))
+    rolling.update('2024-01-22', week({'a': 4}))
+
+    result = trends(rolling, 2)
+    assert result.loc['a', 'clicks_2w'] == 7
+    assert result.loc['a', 'clicks_2w_mean'] == 3.5
+    assert result.loc['a', 'clicks_2w_std'] == 0.5
+    assert result.loc['a', 'clicks_vs_2w_pct'] == pytest.approx((4 - 3.5) / 3.5 * 100)
+
+    # 'b' は窓から外れ、保持している週にもないため削除される
+    assert list(result.index) == ['a']
+    assert list(rolling.keys) == ['a']
+    np.testing.assert_array_equal(rolling.get_week_matrix('clicks'), [[2, 3, 4]])
+
+
+def test_same_week_replaces_and_gap_is_zero():
+    rolling = GmxRollingAnalyzer('query', ['clicks', 'impressions'], windows=[3])
+    rolling.update('2024-01-01', week({'a': 1}))
+    rolling.update('2024-01-08', week({'a': 100}))
+    rolling.update('2024-01-08', week({'a': 2}))
+    # 2024-01-15 は抜けている
+    rolling.update('2024-01-22', week({'a': 6}))
+
+    assert rolling.update('2024-01-01', week({'a': 9})) is False
+    assert trends(rolling, 3).loc['a', 'clicks_3w'] == 8
+    np.testing.assert_array_equal(rolling.get_week_matrix('clicks'), [[1, 2, 0, 6]])
+
+
+def test_npz_round_trip(tmp_path):
+    rolling = GmxRollingAnalyzer('query', ['clicks', 'impressions', 'ctr'], windows=[2, 4])
+    for i, clicks in enumerate([{'a': 1, 'b': 2}, {'a': 3}, {'b': 4, 'c': 1}, {'a': 5, 'c': 2}, {'c': 3}]):
+        df = week(clicks)
+        df['ctr'] = 0.1
+        rolling.update(date(2024, 1, 1 + 7 * i), df)
+
+    path = tmp_path / 'gsc_query.npz'
+    rolling.save(path)
+    loaded = GmxRollingAnalyzer.load(path, 'query', ['clicks', 'impressions', 'ctr'], [2, 4])
+
+    assert loaded.last_week == rolling.last_week
+    assert loaded.week_count == rolling.week_count
+    for window in (2, 4):
+        pd.testing.assert_frame_equal(loaded.get_trends(window), rolling.get_trends(window))
+    pd.testing.assert_frame_equal(loaded.get_history(), rolling.get_history())
+
+    # 読み込んだ状態からも同じように更新できる
+    for analyzer in (rolling, loaded):
+        analyzer.update('2024-02-05', week({'d': 7}))
+    pd.testing.assert_frame_equal(loaded.get_trends(4), rolling.get_trends(4))
+
+
+def test_load_rejects_different_settings(tmp_path):
+    path = tmp_path / 'gsc_query.npz'
+    rolling = GmxRollingAnalyzer('query', ['clicks'], windows=[4])
+    rolling.update('2024-01-01', week({'a': 1})[['query', 'clicks']])
+    rolling.save(path)
+
+    with pytest.raises(ValueError):
+        GmxRollingAnalyzer.load(path, 'query', ['clicks'], windows=[13])
+
+
+def test_report_records_latest_completed_week(tmp_path):
+    config = {
+        'rolling': {'path': str(tmp_path), 'windows': [4]},
+        'anomaly': {'enabled': False},
+        'ga4': {'metrics': ['sessions']}
+    }
+    gsc_this_week = week({'a': 3})
+    gsc_this_week['page'] = 'https://example.com/a'
+    for metric in ('ctr', 'position'):
+        gsc_this_week[metric] = 0.5
+    ga4_this_week = pd.DataFrame({'sessionDefaultChannelGroup': ['Direct'], 'sessions': [8]})
+
+    # 2024-05-15(水) の実行では、前の週 (2024-05-06〜12) が直近の完了した週
+    week_start, rolling_trends, _ = gmx_weekly_report.update_completed_week_trends(
+        config, datetime(2024, 5, 15), gsc_this_week, ga4_this_week
+    )
+
+    assert week_start == date(2024, 5, 6)
+    saved = GmxRollingAnalyzer.load(
+        tmp_path / 'gsc_query.npz', 'query', gmx_weekly_report.GmxDataAnalyzer.GSC_METRICS, [4]
+    )
+    assert saved.last_week == date(2024, 5, 6)
+    assert rolling_trends[('gsc', 'query')][4].set_index('query').loc['a', 'clicks_latest'] == 3
+    assert rolling_trends[('ga4', 'sessionDefaultChannelGroup')][4]['sessions_latest'].tolist() == [8]